@@ -0,0 +1,212 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from metrics import METRICS
+
+# Bump whenever analyzer output changes so stale cached results are never reused
+ANALYZER_VERSION = "4"
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'TESTCOVERAGEMASTER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'testcoveragemaster')
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Pending writes and access-time updates are committed in batches of this size
+FLUSH_EVERY = 500
+
+# Eviction trims the cache to this fraction of max_bytes so it does not run on every write
+EVICTION_TARGET = 0.9
+
+def content_hash(content: str) -> str:
+    """
+    Return the SHA-256 hex digest of a file's content.
+    """
+    return hashlib.sha256(content.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+def fingerprint_files(files: Iterable[Dict]) -> str:
+    """
+    Return a digest identifying a set of files by their names and contents, in order.
+
+    Memory-mapped records (see utils.iter_project_files) are identified by their size and
+    modification time instead, so fingerprinting does not read them.
+    """
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file['name'].encode('utf-8', errors='surrogatepass') + b'\0')
+        if 'content' in file:
+            digest.update(content_hash(file['content']).encode('ascii'))
+        else:
+            digest.update(f"mapped:{file['size']}:{os.stat(file['path']).st_mtime_ns}".encode('ascii'))
+    return digest.hexdigest()
+
+class DiskLRUCache:
+    """
+    Persistent, size-bounded LRU key/value store backed by SQLite.
+
+    Values are pickled. Each entry records when it was written and last read; once the
+    database exceeds max_bytes the least recently used entries are evicted, and entries
+    older than ttl_seconds (if set) are treated as misses.
+    """
+
+    # Name under which lookups are counted in the process metrics
+    metrics_name = 'disk'
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: Optional[float] = None):
+        self.path = path
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, "
+            "created REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if 'created' not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN created REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_key(self, key: str) -> Optional[Any]:
+        """
+        Return the value stored under key, or None if it is missing or expired.
+        """
+        row = self._conn.execute("SELECT value, created, size FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total_bytes -= row[2]
+            self._after_write()
+            row = None
+        METRICS.record_cache(self.metrics_name, row is not None)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._after_write()
+        return pickle.loads(row[0])
+
+    def put_key(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries if the cache grows too large.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_access, created) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, now)
+        )
+        self._total_bytes += len(blob) - (previous[0] if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+        self._after_write()
+
+    def evict(self) -> None:
+        """
+        Delete least recently used entries until the cache is below its size bound.
+        """
+        target = self.max_bytes * EVICTION_TARGET
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access, rowid")
+        evicted = []
+        for key, size in cursor:
+            if self._total_bytes <= target:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        cursor.close()
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """
+        Remove every cached entry.
+        """
+        self._conn.execute("DELETE FROM entries")
+        self._conn.commit()
+        self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the current cache size.
+        """
+        entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': self._total_bytes}
+
+    def flush(self) -> None:
+        """
+        Commit pending writes.
+        """
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """
+        Commit pending writes and close the database.
+        """
+        self.flush()
+        self._conn.close()
+
+    def _after_write(self) -> None:
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            self.flush()
+
+class AnalysisCache(DiskLRUCache):
+    """
+    Persistent, size-bounded LRU cache of per-file analysis results.
+
+    Entries are keyed by (result kind, project type, analyzer version, content hash), so a
+    file is only re-analyzed when its content, the project type or the analyzers change.
+    """
+
+    metrics_name = 'analysis'
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(path or os.path.join(DEFAULT_CACHE_DIR, 'analysis.sqlite'), max_bytes)
+
+    @staticmethod
+    def make_key(kind: str, content: str, project_type: str) -> str:
+        """
+        Build the cache key for a result kind computed from a file's content.
+        """
+        return f"{kind}:{project_type}:{ANALYZER_VERSION}:{content_hash(content)}"
+
+    def get(self, kind: str, content: str, project_type: str) -> Optional[Any]:
+        """
+        Return the cached result, or None if it is not cached.
+        """
+        return self.get_key(self.make_key(kind, content, project_type))
+
+    def put(self, kind: str, content: str, project_type: str, value: Any) -> None:
+        """
+        Store a result computed from a file's content.
+        """
+        self.put_key(self.make_key(kind, content, project_type), value)
+
+    def get_or_compute(self, kind: str, content: str, project_type: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result, computing and storing it on a miss.
+        """
+        value = self.get(kind, content, project_type)
+        if value is None:
+            value = compute()
+            self.put(kind, content, project_type, value)
+        return value
@@ -0,0 +1,143 @@
+"""
+Generated tests written to disk as they are produced, one file per test.
+
+    with TestArtifactWriter("Python", "generated_tests.zip") as artifacts:
+        generate_tests_concurrently(code_analysis, test_analysis, "Python", artifacts=artifacts)
+
+Each test is added to a zip archive on disk as soon as it is final, at a path that
+mirrors the source file of the function it tests:
+
+    unit/src/billing/invoice/test_total.py
+    integration/src/billing/invoice/test_total.py
+
+Only the test being written is held in memory, however many are generated; the archive's
+central directory is written when the writer is closed. The app serves its download
+straight from that file.
+"""
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import zipfile
+from typing import List, NamedTuple, Optional
+
+# Characters kept from function names in file names
+UNSAFE_NAME_PATTERN = re.compile(r'[^\w-]+')
+
+# File name of a unit test and of an integration test, by project type
+TEST_FILE_NAMES = {
+    'Python': ('test_{name}.py', 'test_{name}.py'),
+    'JavaScript': ('{name}.test.js', '{name}.cy.js'),
+    'React': ('{name}.test.js', '{name}.cy.js'),
+    'Angular': ('{name}.spec.ts', '{name}.cy.ts'),
+    'Java': ('{Name}Test.java', '{Name}IT.java'),
+    '.NET': ('{Name}Tests.cs', '{Name}IntegrationTests.cs')
+}
+DEFAULT_TEST_FILE_NAMES = ('{name}.unit.txt', '{name}.integration.txt')
+
+class TestArtifact(NamedTuple):
+    """
+    A test written to the archive: what it tests and where it is stored.
+    """
+    function_name: str
+    test_type: str
+    name: str
+    size: int
+
+def test_file_name(function_name: str, project_type: str, test_type: str) -> str:
+    """
+    Return the conventional file name of a test of a function for the project type.
+    """
+    name = UNSAFE_NAME_PATTERN.sub('_', function_name).strip('_') or 'function'
+    unit, integration = TEST_FILE_NAMES.get(project_type, DEFAULT_TEST_FILE_NAMES)
+    template = unit if test_type == 'unit' else integration
+    return template.format(name=name, Name=name[0].upper() + name[1:])
+
+def artifact_name(function_name: str, project_type: str, test_type: str, source_file: Optional[str] = None) -> str:
+    """
+    Return the archive path of a test: <test type>/<source directory>/<source file stem>/<test file>.
+
+    Source paths are made relative and stripped of '..' components, so every test stays
+    inside its test type's directory.
+    """
+    parts = [test_type]
+    if source_file:
+        source = [part for part in re.split(r'[\\/]+', source_file) if part not in ('', '.', '..')]
+        if source and source[0].endswith(':'):
+            # A Windows drive
+            source = source[1:]
+        if source:
+            parts.extend(source[:-1])
+            parts.append(posixpath.splitext(source[-1])[0])
+    parts.append(test_file_name(function_name, project_type, test_type))
+    return posixpath.join(*(part for part in parts if part))
+
+class TestArtifactWriter:
+    """
+    Writes generated tests of one project type into a zip archive, one file per test.
+
+    write() may be called from several threads. Use the writer as a context manager, or
+    call close(), to finish the archive; without a path it is created as a temporary file
+    that the caller removes.
+    """
+    __test__ = False  # not a test case, despite the name
+
+    def __init__(self, project_type: str, path: Optional[str] = None):
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='testcoveragemaster-', suffix='.zip')
+            os.close(handle)
+        self.project_type = project_type
+        self.path = path
+        self.artifacts: List[TestArtifact] = []
+        self._names = set()
+        self._lock = threading.Lock()
+        self._archive: Optional[zipfile.ZipFile] = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def __enter__(self) -> 'TestArtifactWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+
+    def write(self, function_name: str, test_type: str, test: str, source_file: Optional[str] = None) -> TestArtifact:
+        """
+        Add a test to the archive and return where it was stored.
+
+        Tests that would land on the same path (a function name defined twice in one
+        file) get a numeric suffix.
+        """
+        name = artifact_name(function_name, self.project_type, test_type, source_file)
+        data = test.encode('utf-8')
+        with self._lock:
+            if self._archive is None:
+                raise ValueError("The test archive is closed")
+            name = self._unique(name)
+            self._archive.writestr(name, data)
+            artifact = TestArtifact(function_name, test_type, name, len(data))
+            self.artifacts.append(artifact)
+        return artifact
+
+    def _unique(self, name: str) -> str:
+        directory, file_name = posixpath.split(name)
+        stem, dot, extension = file_name.partition('.')
+        candidate = name
+        suffix = 1
+        while candidate in self._names:
+            suffix += 1
+            candidate = posixpath.join(directory, f"{stem}_{suffix}{dot}{extension}")
+        self._names.add(candidate)
+        return candidate
+
+def read_artifact(path: str, name: str) -> str:
+    """
+    Read one test back from a finished archive.
+    """
+    with zipfile.ZipFile(path) as archive:
+        return archive.read(name).decode('utf-8', errors='replace')
@@ -0,0 +1,347 @@
+"""
+Benchmarks for the analyzers and test generation on synthetic repositories.
+
+    python -m benchmark --types Python Java --sizes 1000 10000 --save-baseline baseline.json
+    python -m benchmark --types Python Java --sizes 1000 10000 --baseline baseline.json
+
+Each benchmark runs in a fresh process, so the peak RSS it reports is its own. Test
+generation talks to a local stub of the OpenAI API (openai_stub), so it measures the
+client side only. With --baseline the run is compared against a saved report and the
+exit status is 1 if any benchmark got slower or bigger by more than --tolerance.
+
+    python -m benchmark --pathological
+
+times every registered language pattern on inputs built to trigger catastrophic
+backtracking (long blank runs, unclosed parentheses and tags, minified one-line files)
+at growing sizes, and exits with status 1 if any scan grows faster than linearly.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from code_analyzer import analyze_code, count_ui_elements
+from language_registry import LANGUAGES, DEFINITION_PATTERN, TEST_CALL_PATTERN, TEST_NAME_PATTERN
+from python_symbols import clear_memo
+from synthetic_repo import iter_synthetic_repo, write_synthetic_repo, SOURCE_EXTENSIONS
+from test_analyzer import analyze_tests
+from utils import ProjectFiles
+
+BENCHMARKS = ('analyze_code', 'analyze_tests', 'generate_tests', 'generate_tests_concurrently')
+DEFAULT_SIZES = (1000,)
+DEFAULT_REPEAT = 3
+
+# Uncovered functions sent to the stubbed API per generation benchmark; every function
+# costs two requests, so this keeps generation runs short on large repositories
+DEFAULT_GENERATE_FUNCTIONS = 100
+
+# Allowed slowdown (or peak RSS growth) relative to the baseline before a regression is reported
+DEFAULT_TOLERANCE = 0.25
+
+# 2: repositories are read from disk as the analyzers go instead of held in memory
+REPORT_VERSION = 2
+
+# Input sizes in characters for --pathological, and the largest growth exponent accepted:
+# time(n) ~ n ** growth, so a linear scan measures about 1 and a quadratic one about 2
+PATHOLOGICAL_SIZES = (20_000, 160_000)
+MAX_PATHOLOGICAL_GROWTH = 1.5
+
+# Each scan is repeated until a run of this many seconds at the smallest size, so that
+# timer resolution does not dominate the growth estimate
+PATHOLOGICAL_MIN_SECONDS = 0.005
+
+# Inputs of about n characters that made the earlier patterns backtrack superlinearly
+PATHOLOGICAL_INPUTS: Dict[str, Callable[[int], str]] = {
+    'blank run': lambda n: 'a' + ' ' * n + '!',
+    'declaration with blank run': lambda n: 'const a' + ' ' * n + 'x',
+    'return type with blank run': lambda n: 'f(): a' + ' ' * n + '!',
+    'unclosed parentheses': lambda n: 'a b(' * (n // 4),
+    'long identifier': lambda n: 'a' * n,
+    'test attributes without methods': lambda n: '@Test [Test] ' * (n // 13),
+    'unclosed tags': lambda n: '<a ' * (n // 3),
+    'minified script': lambda n: 'function f(a){return a}const g=(b)=>{f(b)};' * (n // 44),
+}
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.pathological:
+        results = run_pathological(log=print)
+        superlinear = [result for result in results if result['growth'] > MAX_PATHOLOGICAL_GROWTH]
+        for result in superlinear:
+            print(f"superlinear: {result['scan']} on {result['input']} (growth {result['growth']:.2f})",
+                  file=sys.stderr)
+        return EXIT_REGRESSION if superlinear else EXIT_OK
+    report = run_suite(args.types, args.sizes, args.benchmarks, repeat=args.repeat, seed=args.seed,
+                       generate_functions=args.generate_functions, isolate=not args.in_process,
+                       log=print)
+
+    if args.save_baseline:
+        save_report(report, args.save_baseline)
+    if args.output:
+        save_report(report, args.output)
+
+    if args.baseline:
+        regressions = compare_reports(report, load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            return EXIT_REGRESSION
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='benchmark', description="Benchmark analysis and test generation.")
+    parser.add_argument('--types', nargs='+', default=["Python"], choices=list(SOURCE_EXTENSIONS),
+                        help="project types to generate (default: Python)")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help="repository sizes in files (default: 1000)")
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark; the best is kept")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic repositories")
+    parser.add_argument('--generate-functions', type=int, default=DEFAULT_GENERATE_FUNCTIONS,
+                        help="uncovered functions to generate tests for")
+    parser.add_argument('--in-process', action='store_true',
+                        help="run every benchmark in this process (faster, but peak RSS is shared)")
+    parser.add_argument('-o', '--output', help="write the report as JSON to this file")
+    parser.add_argument('--save-baseline', help="write the report as the new baseline")
+    parser.add_argument('--baseline', help="compare against this baseline and fail on regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown or RSS growth (default: 0.25)")
+    parser.add_argument('--pathological', action='store_true',
+                        help="only check that the language patterns scan pathological inputs in linear time")
+    return parser
+
+def run_suite(project_types: List[str], sizes: List[int], benchmarks: List[str] = BENCHMARKS,
+              repeat: int = DEFAULT_REPEAT, seed: int = 0, generate_functions: int = DEFAULT_GENERATE_FUNCTIONS,
+              isolate: bool = True, log: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Run every benchmark for every project type and size and return the report.
+
+    log, when given, receives a formatted line as each benchmark finishes.
+    """
+    results = []
+    for project_type in project_types:
+        for size in sizes:
+            for name in benchmarks:
+                spec = {'benchmark': name, 'project_type': project_type, 'files': size, 'seed': seed,
+                        'repeat': repeat, 'generate_functions': generate_functions}
+                result = run_isolated(spec) if isolate else run_benchmark(spec)
+                if log:
+                    log(format_result(result))
+                results.append(result)
+    return {'version': REPORT_VERSION, 'environment': environment(), 'results': results}
+
+def run_isolated(spec: Dict) -> Dict:
+    """
+    Run one benchmark in a freshly spawned process and return its result.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_benchmark, spec).result()
+
+def run_benchmark(spec: Dict) -> Dict:
+    """
+    Generate the synthetic repository for spec and time the benchmark on it.
+
+    The repository is written to a temporary directory before timing starts and the
+    benchmark reads it back through utils.ProjectFiles, as the app and CLI do, so the
+    peak RSS covers the streaming ingestion and not a fixture held in memory. Of repeat
+    runs the fastest is reported, each starting from empty in-memory memos.
+    """
+    name = spec['benchmark']
+    project_type = spec['project_type']
+
+    timings = []
+    with ExitStack() as stack:
+        root = stack.enter_context(tempfile.TemporaryDirectory(prefix='benchmark-'))
+        input_bytes = write_synthetic_repo(iter_synthetic_repo(project_type, spec['files'], seed=spec['seed']), root)
+        files = ProjectFiles(root)
+        run, functions = prepare(name, files, project_type, spec['generate_functions'], stack)
+        for _ in range(max(1, spec['repeat'])):
+            clear_memo()
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    result = dict(spec)
+    result.update({
+        'seconds': seconds,
+        'input_bytes': input_bytes,
+        'files_per_second': spec['files'] / seconds if seconds else None,
+        'mb_per_second': input_bytes / 1e6 / seconds if seconds else None,
+        'peak_rss_bytes': peak_rss_bytes()
+    })
+    if functions is not None:
+        result['functions'] = functions
+        result['functions_per_second'] = functions / seconds if seconds else None
+    return result
+
+def prepare(name: str, files: Iterable[Dict], project_type: str, generate_functions: int,
+            stack: ExitStack) -> Tuple[Callable[[], object], Optional[int]]:
+    """
+    Return the benchmark body for name and, for generation, the number of functions it covers.
+
+    Anything the body needs torn down afterwards is registered on stack.
+    """
+    if name == 'analyze_code':
+        return lambda: analyze_code(files, project_type), None
+    if name == 'analyze_tests':
+        return lambda: analyze_tests(files, project_type), None
+    if name not in BENCHMARKS:
+        raise ValueError(f"Unknown benchmark: {name}")
+
+    # Generation benchmarks: the analysis is setup, and the API is a local stub
+    from openai import AsyncOpenAI, OpenAI
+    from openai_stub import StubChatCompletionsServer
+    import test_generator
+
+    uncovered = analyze_code(files, project_type)['coverage']['uncovered_functions'][:generate_functions]
+    code_analysis = {'coverage': {'uncovered_functions': uncovered}}
+    server = stack.enter_context(StubChatCompletionsServer())
+
+    if name == 'generate_tests':
+        stack.callback(setattr, test_generator, 'client', test_generator.client)
+        test_generator.client = OpenAI(base_url=server.base_url, api_key='benchmark', max_retries=0)
+        return lambda: test_generator.generate_tests(code_analysis, {}, project_type), len(uncovered)
+
+    def generate_concurrently():
+        async_client = AsyncOpenAI(base_url=server.base_url, api_key='benchmark', max_retries=0)
+        return test_generator.generate_tests_concurrently(code_analysis, {}, project_type, async_client=async_client)
+    return generate_concurrently, len(uncovered)
+
+def pathological_scans() -> Dict[str, Callable[[str], object]]:
+    """
+    Return every pattern scan the analyzers run on file content, by name.
+    """
+    scans = {}
+    for name, plugin in LANGUAGES.items():
+        if plugin.function_patterns:
+            scans[f"{name} functions"] = plugin.find_functions
+        scans[f"{name} tested functions"] = plugin.find_tested_functions
+    scans['test names'] = TEST_NAME_PATTERN.findall
+    scans['test calls'] = TEST_CALL_PATTERN.findall
+    scans['definitions'] = DEFINITION_PATTERN.findall
+    scans['ui elements'] = count_ui_elements
+    return scans
+
+def run_pathological(sizes: Tuple[int, ...] = PATHOLOGICAL_SIZES, min_seconds: float = PATHOLOGICAL_MIN_SECONDS,
+                     log: Optional[Callable[[str], None]] = None) -> List[Dict]:
+    """
+    Time every scan on every pathological input at each size and estimate its growth.
+
+    growth is the exponent of the time between the smallest and largest size: about 1
+    for a linear scan. Each timing is the best of three runs of the same number of calls,
+    enough for min_seconds at the smallest size.
+    """
+    results = []
+    scans = pathological_scans()
+    for input_name, make_input in PATHOLOGICAL_INPUTS.items():
+        contents = [make_input(size) for size in sizes]
+        for scan_name, scan in scans.items():
+            number = calibrate(scan, contents[0], min_seconds)
+            seconds = [min(time_calls(scan, content, number) for _ in range(3)) for content in contents]
+            lengths = [len(content) for content in contents]
+            growth = math.log(max(seconds[-1], 1e-9) / max(seconds[0], 1e-9)) / math.log(lengths[-1] / lengths[0])
+            result = {'input': input_name, 'scan': scan_name, 'sizes': lengths, 'seconds': seconds, 'growth': growth}
+            if log:
+                log(f"{input_name:<32} {scan_name:<28} " +
+                    " ".join(f"{value * 1000:>9.3f}ms" for value in seconds) + f"  growth {growth:.2f}")
+            results.append(result)
+    return results
+
+def calibrate(scan: Callable[[str], object], content: str, min_seconds: float) -> int:
+    """
+    Return how many calls of scan on content take at least min_seconds.
+    """
+    number = 1
+    while time_calls(scan, content, number) < min_seconds:
+        number *= 2
+    return number
+
+def time_calls(scan: Callable[[str], object], content: str, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        scan(content)
+    return time.perf_counter() - start
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Return the peak resident set size of this process, or None where it is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+
+def result_key(result: Dict) -> Tuple[str, str, int]:
+    return result['benchmark'], result['project_type'], result['files']
+
+def compare_reports(report: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Return a description of every benchmark that regressed against the baseline.
+
+    A benchmark regresses when its time or peak RSS exceeds the baseline's by more than
+    tolerance (a fraction). Benchmarks missing from either report are not compared.
+    """
+    previous = {result_key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        label = "{} {} ({} files)".format(*result_key(result))
+        if result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append(f"{label}: {result['seconds']:.3f}s vs {before['seconds']:.3f}s baseline")
+        if result.get('peak_rss_bytes') and before.get('peak_rss_bytes') and \
+                result['peak_rss_bytes'] > before['peak_rss_bytes'] * (1 + tolerance):
+            regressions.append(f"{label}: peak RSS {result['peak_rss_bytes'] / 1e6:.1f} MB vs "
+                               f"{before['peak_rss_bytes'] / 1e6:.1f} MB baseline")
+    return regressions
+
+def save_report(report: Dict, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+def load_report(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as handle:
+        report = json.load(handle)
+    if report.get('version') != REPORT_VERSION:
+        raise ValueError(f"Unsupported benchmark report version in {path}")
+    return report
+
+def format_result(result: Dict) -> str:
+    rss = f"{result['peak_rss_bytes'] / 1e6:.1f} MB" if result.get('peak_rss_bytes') else "n/a"
+    line = (f"{result['benchmark']:<28} {result['project_type']:<10} {result['files']:>7} files "
+            f"{result['seconds']:>9.3f}s {result['files_per_second']:>10.0f} files/s "
+            f"{result['mb_per_second']:>8.2f} MB/s  peak RSS {rss}")
+    if 'functions_per_second' in result:
+        line += f"  {result['functions_per_second']:.0f} functions/s"
+    return line
+
+if __name__ == '__main__':
+    sys.exit(main())
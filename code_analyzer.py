@@ -1,127 +1,420 @@
-import re
-import ast
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Set, Tuple
+from analysis_cache import AnalysisCache
+from coverage_reports import CoverageReport
+from coverage_tree import build_coverage_tree
+from language_registry import (
+    get_language_plugin, findall_bounded, LANGUAGES, TEST_NAME_PATTERN, UI_ELEMENT_PATTERN, UI_ELEMENT_END
+)
+from mapped_scanner import (
+    open_mapped, scan_script_buffer, count_code_lines_buffer, count_literals_buffer, count_ui_elements_buffer,
+    find_functions_buffer, find_test_names, Buffer
+)
+from metrics import METRICS
+from python_symbols import PARSE_ERRORS, build_symbol_table, get_symbol_table
+from scanner import (
+    scan_script, count_code_lines, count_literals, DECLARATION_PATTERN, TEST_CALL_PATTERN, EVENT_HANDLER_LITERALS
+)
+from utils import decode_content
 
-def analyze_code(files: List[Dict], project_type: str) -> Dict:
+JS_TS_EXTENSIONS = ('.js', '.ts', '.jsx', '.tsx')
+
+def analyze_code(files: List[Dict], project_type: str, cache: Optional[AnalysisCache] = None,
+                 report: Optional[CoverageReport] = None) -> Dict:
     """
     Analyze the code files and return code coverage information.
+
+    When an AnalysisCache is given, per-file results are looked up by content hash and
+    only files that changed since the last run are analyzed. When a CoverageReport is
+    given, line and function coverage come from it (see apply_coverage_report).
+    """
+    with METRICS.stage('analyze_code') as stage:
+        files = stage.track(files)
+
+        def analyze(file: Dict) -> Dict:
+            if cache is not None:
+                return cached_file_partial(file, project_type, cache)
+            return analyze_file_partial(file, project_type)
+
+        partials = ((file['name'], apply_coverage_report(analyze(file), file['name'], report)) for file in files)
+        return reduce_partials(partials, project_type)
+
+def new_coverage() -> Dict:
+    """
+    Create an empty aggregate coverage dictionary.
     """
-    coverage = {
+    return {
         'total_lines': 0,
         'covered_lines': 0,
         'coverage_percentage': 0,
         'unit_coverage': 0,
         'functional_coverage': 0,
-        'uncovered_functions': []
+        'uncovered_functions': [],
+        'uncovered_function_files': []
+    }
+
+def is_source_file(file_name: str, project_type: str) -> bool:
+    """
+    Check if a file should be analyzed as source code for the given project type.
+
+    Files without an extension (such as pasted content) are always analyzed; others must
+    have one of the source extensions registered for the project type.
+    """
+    base_name = file_name.rsplit('/', 1)[-1]
+    if '.' not in base_name.lstrip('.'):
+        return True
+    plugin = LANGUAGES.get(project_type)
+    return plugin is not None and base_name.endswith(plugin.source_extensions)
+
+def analyze_file(content: str, project_type: str, functional_coverage: float = 0,
+                 test_names: Optional[Set[str]] = None) -> Dict:
+    """
+    Analyze a single source file with the analyzer for the given project type.
+
+    functional_coverage is the project-wide value computed by the functional coverage
+    stage (see reduce_functional_counts); JavaScript-family analyzers report it as is.
+    """
+    if project_type == "JavaScript":
+        return analyze_javascript(content, functional_coverage, test_names)
+    elif project_type == "Angular":
+        return analyze_angular(content, functional_coverage, test_names)
+    elif project_type == "React":
+        return analyze_react(content, functional_coverage, test_names)
+    elif project_type == "Python":
+        return analyze_python(content, test_names)
+    elif project_type == "Java":
+        return analyze_java(content, test_names)
+    elif project_type == ".NET":
+        return analyze_dotnet(content, test_names)
+    raise ValueError(f"Unsupported project type: {project_type}")
+
+def index_test_names(content: str) -> Set[str]:
+    """
+    Collect the test identifiers in a file, plus their prefixes at word boundaries.
+
+    A test named test_parse_header_empty covers parse_header, so test_parse and
+    test_parse_header are indexed too; camelCase names (testParseHeader) are split at
+    capital letters the same way.
+    """
+    return expand_test_names(TEST_NAME_PATTERN.findall(content))
+
+def expand_test_names(tokens: Iterable[str]) -> Set[str]:
+    """
+    Index test identifiers together with their prefixes at word boundaries.
+    """
+    names = set()
+    for token in tokens:
+        names.add(token)
+        for i in range(5, len(token)):
+            if token[i] == '_' or token[i].isupper():
+                names.add(token[:i])
+    return names
+
+def expected_test_name(function_name: str, project_type: str) -> str:
+    """
+    Return the test identifier that marks a function as covered for the project type.
+    """
+    if project_type == "Java":
+        return f"test{function_name.capitalize()}"
+    elif project_type == ".NET":
+        return f"Test{function_name}"
+    return f"test_{function_name}"
+
+def find_uncovered_functions(functions: List[str], project_type: str, test_names: Set[str],
+                             function_hits: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Return the functions that have no matching test identifier in the test name index.
+
+    Functions that a coverage report measured (function_hits) are uncovered exactly when
+    the report saw no call to them.
+    """
+    function_hits = function_hits or {}
+    return [
+        f for f in functions
+        if (function_hits[f] == 0 if f in function_hits else expected_test_name(f, project_type) not in test_names)
+    ]
+
+def merge_file_coverage(coverage: Dict, file_coverage: Dict) -> None:
+    """
+    Add the results of a single file analysis into the aggregate coverage dictionary.
+    """
+    coverage['total_lines'] += file_coverage['total_lines']
+    coverage['covered_lines'] += file_coverage['covered_lines']
+    coverage['uncovered_functions'].extend(file_coverage['uncovered_functions'])
+    if 'measured' in file_coverage:
+        coverage['measured_files'] = coverage.get('measured_files', 0) + file_coverage['measured']
+    
+    if 'unit_coverage' in file_coverage:
+        coverage['unit_coverage'] += file_coverage['unit_coverage']
+    if 'functional_coverage' in file_coverage:
+        coverage['functional_coverage'] += file_coverage['functional_coverage']
+
+def analyze_file_partial(file: Dict, project_type: str) -> Dict:
+    """
+    Analyze a single file in isolation and return its partial results.
+
+    The partial holds the file's coverage and test identifiers (if it is a source file) and
+    its functional counts (see functional_counts). Functional coverage and the test name
+    index are project-wide, so they are applied by reduce_partials; this makes partials
+    depend only on the file itself and therefore safe to cache or compute in another process.
+
+    Records without content but with a 'path' (see utils.iter_project_files) are analyzed
+    from a memory map of the file by analyze_mapped_partial.
+    """
+    if 'content' not in file:
+        return analyze_mapped_partial(file, project_type)
+    name = file['name']
+    content = file['content']
+    with METRICS.stage('analyze_file', len(content)):
+        partial = functional_counts(file)
+        if is_source_file(name, project_type):
+            partial['test_names'] = index_test_names(content)
+            partial['coverage'] = analyze_file(content, project_type, 0, partial['test_names'])
+    return partial
+
+def analyze_mapped_partial(file: Dict, project_type: str) -> Dict:
+    """
+    Return the partial results of a file record that has a 'path' instead of content.
+
+    The file is memory-mapped and scanned as bytes, so it is never decoded as a whole
+    (except for Python, whose functions come from the AST). The partial equals that of
+    analyze_file_partial on the decoded content for ASCII source; see mapped_scanner.
+    """
+    name = file['name']
+    with open_mapped(file['path']) as buffer, METRICS.stage('analyze_file', len(buffer)):
+        scan = None
+        plugin = LANGUAGES.get(project_type)
+        if plugin is not None and plugin.scripted and is_source_file(name, project_type):
+            scan = scan_script_buffer(buffer)
+        
+        partial = {}
+        if name.endswith('.html'):
+            partial['ui_elements'] = count_ui_elements_buffer(buffer)
+        if name.endswith(JS_TS_EXTENSIONS):
+            partial['event_handlers'] = (
+                scan['event_handlers'] if scan else count_literals_buffer(buffer, EVENT_HANDLER_LITERALS)
+            )
+        if is_source_file(name, project_type):
+            partial['test_names'] = expand_test_names(find_test_names(buffer))
+            partial['coverage'] = analyze_buffer(buffer, project_type, partial['test_names'], scan)
+    return partial
+
+def analyze_buffer(buffer: Buffer, project_type: str, test_names: Set[str], scan: Optional[Dict] = None) -> Dict:
+    """
+    Buffer counterpart of analyze_file, as called by analyze_file_partial.
+
+    scan is the scan_script_buffer result, required for JavaScript-family project types.
+    """
+    plugin = get_language_plugin(project_type)
+    if plugin.scripted:
+        if project_type == "React":
+            functions = scan['declarations']
+        else:
+            functions = find_functions_buffer(plugin, buffer)
+        return {
+            'total_lines': scan['total_lines'],
+            'covered_lines': scan['covered_lines'],
+            'functions': functions,
+            'uncovered_functions': find_uncovered_functions(functions, project_type, test_names),
+            'unit_coverage': unit_coverage_ratio(len(scan['declarations']), scan['test_calls']),
+            'functional_coverage': 0
+        }
+    
+    total_lines, covered_lines = count_code_lines_buffer(buffer, plugin.comment_prefix)
+    if plugin.function_patterns:
+        functions = find_functions_buffer(plugin, buffer)
+    else:
+        # Python: the parse needs the decoded source; it bypasses the symbol table memo,
+        # which would otherwise keep the whole file alive
+        try:
+            functions = build_symbol_table(decode_content(buffer[:])).function_names()
+        except PARSE_ERRORS:
+            return unparsed_python_coverage(total_lines, covered_lines)
+    return {
+        'total_lines': total_lines,
+        'covered_lines': covered_lines,
+        'functions': functions,
+        'uncovered_functions': find_uncovered_functions(functions, project_type, test_names)
     }
+
+def apply_coverage_report(partial: Dict, name: str, report: Optional[CoverageReport]) -> Dict:
+    """
+    Replace the line counts of a source file's partial with those measured by a report.
+
+    total_lines becomes the number of executable lines and covered_lines the number
+    executed, so coverage_percentage is real line coverage instead of the share of
+    non-blank, non-comment lines. Formats that do not record executable lines
+    (coverage.py) are measured against the file's non-blank, non-comment lines, and a
+    source file missing from the report counts as not executed at all. 'measured' marks
+    whether the file was found in the report. The partial is copied, not modified.
+    """
+    if report is None or 'coverage' not in partial:
+        return partial
+    file_coverage = dict(partial['coverage'])
+    code_lines = file_coverage['covered_lines']
+    measured = report.lookup(name)
+    if measured is None:
+        file_coverage.update(total_lines=code_lines, covered_lines=0, measured=False)
+    else:
+        executable = measured.executable_lines
+        if executable is None:
+            executable = code_lines
+        file_coverage.update(
+            total_lines=executable,
+            covered_lines=min(measured.executed_lines, executable),
+            function_hits=measured.functions,
+            measured=True
+        )
+    return dict(partial, coverage=file_coverage)
+
+def partial_kind(file_name: str, project_type: str) -> str:
+    """
+    Return the cache kind for a file's partial results.
+
+    Which parts a partial contains depends on how the file name is classified, so the
+    classification is part of the cache key alongside the content hash.
+    """
+    flags = (file_name.endswith('.html'), file_name.endswith(JS_TS_EXTENSIONS), is_source_file(file_name, project_type))
+    return 'file_partial:' + ''.join('1' if flag else '0' for flag in flags)
+
+def cached_file_partial(file: Dict, project_type: str, cache: AnalysisCache) -> Dict:
+    """
+    Return a file's partial results from the cache, analyzing the file on a miss.
+
+    For Python sources the symbol table is looked up in the cache first, so a miss does
+    not necessarily mean parsing the file again. Memory-mapped records are not cached:
+    hashing the file would cost as much as scanning it.
+    """
+    if 'content' not in file:
+        return analyze_mapped_partial(file, project_type)
     
-    js_ts_files = [f for f in files if f['name'].endswith(('.js', '.ts', '.jsx', '.tsx'))]
-    html_files = [f for f in files if f['name'].endswith('.html')]
-    
-    for file in files:
-        if project_type == "JavaScript":
-            file_coverage = analyze_javascript(file['content'], js_ts_files, html_files)
-        elif project_type == "Angular":
-            file_coverage = analyze_angular(file['content'], js_ts_files, html_files)
-        elif project_type == "React":
-            file_coverage = analyze_react(file['content'], js_ts_files, html_files)
-        elif project_type == "Python":
-            file_coverage = analyze_python(file['content'])
-        elif project_type == "Java":
-            file_coverage = analyze_java(file['content'])
-        elif project_type == ".NET":
-            file_coverage = analyze_dotnet(file['content'])
+    def compute():
+        if project_type == "Python" and is_source_file(file['name'], project_type):
+            try:
+                get_symbol_table(file['content'], cache)
+            except PARSE_ERRORS:
+                pass
+        return analyze_file_partial(file, project_type)
+    
+    return cache.get_or_compute(partial_kind(file['name'], project_type), file['content'], project_type, compute)
+
+def reduce_partials(partials: Iterable[Tuple[str, Dict]], project_type: str) -> Dict:
+    """
+    Merge per-file partial results, given in order as (file name, partial), into the analyze_code result.
+
+    The file each uncovered function was found in is listed, in the same order, as
+    'uncovered_function_files', and 'coverage_tree' rolls line coverage up the directory
+    tree (see coverage_tree.build_coverage_tree).
+    """
+    partials = list(partials)
+    file_rows = []
+    with METRICS.stage('aggregate_coverage'):
+        coverage = new_coverage()
         
-        coverage['total_lines'] += file_coverage['total_lines']
-        coverage['covered_lines'] += file_coverage['covered_lines']
-        coverage['uncovered_functions'].extend(file_coverage['uncovered_functions'])
+        test_names = set()
+        for _, partial in partials:
+            test_names |= partial.get('test_names', set())
+        functional_coverage, js_ts_count = reduce_functional_counts([partial for _, partial in partials])
         
-        if 'unit_coverage' in file_coverage:
-            coverage['unit_coverage'] += file_coverage['unit_coverage']
-        if 'functional_coverage' in file_coverage:
-            coverage['functional_coverage'] += file_coverage['functional_coverage']
+        for name, partial in partials:
+            if 'coverage' not in partial:
+                continue
+            file_coverage = partial['coverage']
+            file_coverage['uncovered_functions'] = find_uncovered_functions(
+                file_coverage['functions'], project_type, test_names, file_coverage.get('function_hits')
+            )
+            if 'functional_coverage' in file_coverage:
+                file_coverage['functional_coverage'] = functional_coverage
+            merge_file_coverage(coverage, file_coverage)
+            if file_coverage.get('unparsed'):
+                coverage.setdefault('unparsed_files', []).append(name)
+            coverage['uncovered_function_files'].extend([name] * len(file_coverage['uncovered_functions']))
+            file_rows.append((name, file_coverage['total_lines'], file_coverage['covered_lines'],
+                              len(file_coverage['uncovered_functions'])))
+        coverage = finalize_coverage(coverage, js_ts_count)
     
+    with METRICS.stage('build_coverage_tree'):
+        return {'coverage': coverage, 'coverage_tree': build_coverage_tree(file_rows)}
+
+def finalize_coverage(coverage: Dict, js_ts_count: int) -> Dict:
+    """
+    Compute percentages and averages once all files have been merged.
+    """
     if coverage['total_lines'] > 0:
         coverage['coverage_percentage'] = (coverage['covered_lines'] / coverage['total_lines']) * 100
     
-    if len(js_ts_files) > 0:
-        coverage['unit_coverage'] /= len(js_ts_files)
-        coverage['functional_coverage'] /= len(js_ts_files)
+    if js_ts_count > 0:
+        coverage['unit_coverage'] /= js_ts_count
+        coverage['functional_coverage'] /= js_ts_count
     
-    return {'coverage': coverage}
+    return coverage
 
-def analyze_javascript(content: str, js_ts_files: List[Dict], html_files: List[Dict]) -> Dict:
+def analyze_javascript(content: str, functional_coverage: float = 0,
+                       test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze JavaScript code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith('//'))
+    scan = scan_script(content)
     
-    functions = re.findall(r'function\s+(\w+)', content)
-    uncovered_functions = [f for f in functions if f"test_{f}" not in content]
+    functions = get_language_plugin("JavaScript").find_functions(content)
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(functions, "JavaScript", test_names)
     
-    unit_coverage = calculate_unit_coverage(content)
-    functional_coverage = calculate_functional_coverage(js_ts_files, html_files)
+    unit_coverage = unit_coverage_ratio(len(scan['declarations']), scan['test_calls'])
     
     return {
-        'total_lines': total_lines,
-        'covered_lines': covered_lines,
+        'total_lines': scan['total_lines'],
+        'covered_lines': scan['covered_lines'],
+        'functions': functions,
         'uncovered_functions': uncovered_functions,
         'unit_coverage': unit_coverage,
         'functional_coverage': functional_coverage
     }
 
-def analyze_angular(content: str, js_ts_files: List[Dict], html_files: List[Dict]) -> Dict:
+def analyze_angular(content: str, functional_coverage: float = 0,
+                    test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze Angular code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith('//'))
-    
-    # Find TypeScript/Angular functions and methods
-    functions = re.findall(r'(public|private)?\s*(\w+)\s*\([^)]*\)\s*{', content)
-    functions = [f[1] for f in functions]  # Extract function names
-    
-    # Find component properties
-    properties = re.findall(r'(\w+)\s*:\s*(\w+)\s*;', content)
-    properties = [p[0] for p in properties]  # Extract property names
+    scan = scan_script(content)
     
-    all_functions = functions + properties
-    uncovered_functions = [f for f in all_functions if f"test_{f}" not in content]
+    # Find TypeScript/Angular functions and methods, then component properties
+    all_functions = get_language_plugin("Angular").find_functions(content)
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(all_functions, "Angular", test_names)
     
-    unit_coverage = calculate_unit_coverage(content)
-    functional_coverage = calculate_functional_coverage(js_ts_files, html_files)
+    unit_coverage = unit_coverage_ratio(len(scan['declarations']), scan['test_calls'])
     
     return {
-        'total_lines': total_lines,
-        'covered_lines': covered_lines,
+        'total_lines': scan['total_lines'],
+        'covered_lines': scan['covered_lines'],
+        'functions': all_functions,
         'uncovered_functions': uncovered_functions,
         'unit_coverage': unit_coverage,
         'functional_coverage': functional_coverage
     }
 
-def analyze_react(content: str, js_ts_files: List[Dict], html_files: List[Dict]) -> Dict:
+def analyze_react(content: str, functional_coverage: float = 0,
+                  test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze React code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith('//'))
+    scan = scan_script(content)
     
     # Find React component functions and methods
-    functions = re.findall(r'(function|const)\s+(\w+)\s*[=]?\s*(\([^)]*\)|)\s*[=]?\s*[{(]', content)
-    functions = [f[1] for f in functions]  # Extract function names
+    functions = scan['declarations']
     
-    uncovered_functions = [f for f in functions if f"test_{f}" not in content]
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(functions, "React", test_names)
     
-    unit_coverage = calculate_unit_coverage(content)
-    functional_coverage = calculate_functional_coverage(js_ts_files, html_files)
+    unit_coverage = unit_coverage_ratio(len(scan['declarations']), scan['test_calls'])
     
     return {
-        'total_lines': total_lines,
-        'covered_lines': covered_lines,
+        'total_lines': scan['total_lines'],
+        'covered_lines': scan['covered_lines'],
+        'functions': functions,
         'uncovered_functions': uncovered_functions,
         'unit_coverage': unit_coverage,
         'functional_coverage': functional_coverage
@@ -131,9 +424,14 @@ def calculate_unit_coverage(content: str) -> float:
     """
     Calculate unit test coverage based on the presence of test functions.
     """
-    total_functions = len(re.findall(r'(function|const)\s+(\w+)\s*[=]?\s*(\([^)]*\)|)\s*[=]?\s*[{(]', content))
-    test_functions = len(re.findall(r'(describe|it|test)\s*\(', content))
-    
+    total_functions = len(DECLARATION_PATTERN.findall(content))
+    test_functions = len(TEST_CALL_PATTERN.findall(content))
+    return unit_coverage_ratio(total_functions, test_functions)
+
+def unit_coverage_ratio(total_functions: int, test_functions: int) -> float:
+    """
+    Convert declaration and test call counts into a unit coverage percentage.
+    """
     if total_functions == 0:
         return 0
     return (test_functions / total_functions) * 100
@@ -142,73 +440,131 @@ def calculate_functional_coverage(js_ts_files: List[Dict], html_files: List[Dict
     """
     Calculate functional coverage based on the presence of UI elements and corresponding event handlers.
     """
+    counts = [functional_counts(file) for file in html_files + js_ts_files]
+    return reduce_functional_counts(counts)[0]
+
+def functional_counts(file: Dict) -> Dict:
+    """
+    Count the UI elements of an HTML template and the event handlers of a JS/TS file.
+
+    These per-file counts are the input of the functional coverage stage; they depend only
+    on the file, so they are cached and computed in parallel as part of the file partials.
+    """
+    counts = {}
+    if file['name'].endswith('.html'):
+        counts['ui_elements'] = count_ui_elements(file['content'])
+    if file['name'].endswith(JS_TS_EXTENSIONS):
+        counts['event_handlers'] = count_event_handlers(file['content'])
+    return counts
+
+def reduce_functional_counts(counts: Iterable[Dict]) -> Tuple[float, int]:
+    """
+    Combine per-file functional counts into the project-wide functional coverage.
+
+    Returns the coverage percentage and the number of JS/TS files counted.
+    """
     ui_elements = 0
     event_handlers = 0
-    
-    for html_file in html_files:
-        ui_elements += len(re.findall(r'<(\w+)[^>]*>', html_file['content']))
-    
-    for js_ts_file in js_ts_files:
-        event_handlers += len(re.findall(r'(onClick|onSubmit|onChange|addEventListener)', js_ts_file['content']))
-    
+    js_ts_count = 0
+    for file_counts in counts:
+        ui_elements += file_counts.get('ui_elements', 0)
+        if 'event_handlers' in file_counts:
+            js_ts_count += 1
+            event_handlers += file_counts['event_handlers']
+    return functional_coverage_ratio(ui_elements, event_handlers), js_ts_count
+
+def count_ui_elements(content: str) -> int:
+    """
+    Count the HTML elements in a template.
+    """
+    return len(findall_bounded(UI_ELEMENT_PATTERN, content, UI_ELEMENT_END))
+
+def count_event_handlers(content: str) -> int:
+    """
+    Count the UI event handlers referenced in a JavaScript/TypeScript file.
+    """
+    return count_literals(content, EVENT_HANDLER_LITERALS)
+
+def functional_coverage_ratio(ui_elements: int, event_handlers: int) -> float:
+    """
+    Convert UI element and event handler counts into a functional coverage percentage.
+    """
     if ui_elements == 0:
         return 0
     return min((event_handlers / ui_elements) * 100, 100)
 
-def analyze_python(content: str) -> Dict:
+def analyze_python(content: str, test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze Python code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith('#'))
+    total_lines, covered_lines = count_code_lines(content, get_language_plugin("Python").comment_prefix)
     
-    tree = ast.parse(content)
-    functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-    uncovered_functions = [f for f in functions if f"test_{f}" not in content]
+    try:
+        functions = get_symbol_table(content).function_names()
+    except PARSE_ERRORS:
+        return unparsed_python_coverage(total_lines, covered_lines)
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(functions, "Python", test_names)
     
     return {
         'total_lines': total_lines,
         'covered_lines': covered_lines,
+        'functions': functions,
         'uncovered_functions': uncovered_functions
     }
 
-def analyze_java(content: str) -> Dict:
+def unparsed_python_coverage(total_lines: int, covered_lines: int) -> Dict:
+    """
+    Coverage of a Python file that does not parse (Python 2, a broken fixture): its lines
+    count, it has no functions, and it is listed in the aggregate's 'unparsed_files'.
+    """
+    return {
+        'total_lines': total_lines,
+        'covered_lines': covered_lines,
+        'functions': [],
+        'uncovered_functions': [],
+        'unparsed': True
+    }
+
+def analyze_java(content: str, test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze Java code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith("//"))
+    plugin = get_language_plugin("Java")
+    total_lines, covered_lines = count_code_lines(content, plugin.comment_prefix)
     
     # Find Java methods
-    methods = re.findall(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{', content)
-    methods = [m[1] for m in methods]  # Extract method names
+    methods = plugin.find_functions(content)
     
-    uncovered_functions = [m for m in methods if f"test{m.capitalize()}" not in content]
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(methods, "Java", test_names)
     
     return {
         'total_lines': total_lines,
         'covered_lines': covered_lines,
+        'functions': methods,
         'uncovered_functions': uncovered_functions
     }
 
-def analyze_dotnet(content: str) -> Dict:
+def analyze_dotnet(content: str, test_names: Optional[Set[str]] = None) -> Dict:
     """
     Analyze .NET (C#) code for coverage.
     """
-    lines = content.split('\n')
-    total_lines = len(lines)
-    covered_lines = sum(1 for line in lines if line.strip() and not line.strip().startswith("//"))
+    plugin = get_language_plugin(".NET")
+    total_lines, covered_lines = count_code_lines(content, plugin.comment_prefix)
     
     # Find C# methods
-    methods = re.findall(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{', content)
-    methods = [m[1] for m in methods]  # Extract method names
+    methods = plugin.find_functions(content)
     
-    uncovered_functions = [m for m in methods if f"Test{m}" not in content]
+    if test_names is None:
+        test_names = index_test_names(content)
+    uncovered_functions = find_uncovered_functions(methods, ".NET", test_names)
     
     return {
         'total_lines': total_lines,
         'covered_lines': covered_lines,
+        'functions': methods,
         'uncovered_functions': uncovered_functions
     }
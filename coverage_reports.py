@@ -0,0 +1,384 @@
+"""
+Importers for coverage reports produced by real test runs.
+
+    report = load_coverage_report("coverage/lcov.info")
+    analyze_code(files, "JavaScript", report=report)
+
+Supported are lcov tracefiles (lcov.info), Cobertura and JaCoCo XML, and the SQLite
+.coverage database written by coverage.py 5 and later. Reports are read incrementally,
+a line or an XML element at a time, and only per-file results are kept: the lines each
+file can execute and the lines it did execute, as bitmaps (bit n set for line n), and
+hit counts of the functions where the format records them. Memory therefore grows with
+the measured source, not with the size of the report.
+"""
+import itertools
+import os
+import re
+import sqlite3
+from operator import itemgetter
+from typing import Callable, Collection, Dict, Iterator, List, NamedTuple, Optional, TextIO
+from urllib.parse import quote
+from xml.etree import ElementTree as ET
+
+REPORT_FORMATS = ('lcov', 'cobertura', 'jacoco', 'coverage.py')
+
+# Bytes read to recognize a report's format
+SNIFF_BYTES = 4096
+
+# Characters of a text report read at a time
+READ_WINDOW = 1 << 20
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+class FileCoverage(NamedTuple):
+    """
+    Coverage of one source file as measured by a report.
+
+    executable is None for formats that only record executed lines (coverage.py), and
+    functions is empty for formats that do not record functions.
+    """
+    path: str
+    executable: Optional[int]
+    executed: int
+    functions: Dict[str, int]
+
+    @property
+    def executable_lines(self) -> Optional[int]:
+        return None if self.executable is None else self.executable.bit_count()
+
+    @property
+    def executed_lines(self) -> int:
+        return self.executed.bit_count()
+
+def line_bitmap(numbers: Collection[int]) -> int:
+    """
+    Return an int with bit n set for every line number n (all positive).
+    """
+    if not numbers:
+        return 0
+    bits = bytearray((max(numbers) >> 3) + 1)
+    for number in numbers:
+        bits[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(bits, 'little')
+
+def combine(first: FileCoverage, second: FileCoverage) -> FileCoverage:
+    """
+    Merge two measurements of the same file, such as two classes of one Cobertura file.
+    """
+    if first.executable is None or second.executable is None:
+        executable = first.executable if second.executable is None else second.executable
+    else:
+        executable = first.executable | second.executable
+    functions = dict(first.functions)
+    for name, hits in second.functions.items():
+        functions[name] = functions.get(name, 0) + hits
+    return FileCoverage(first.path, executable, first.executed | second.executed, functions)
+
+class CoverageReport:
+    """
+    Per-file results of a coverage report, looked up by the analyzer's file names.
+
+    Report paths are absolute, relative to a source root or relative to a package, while
+    analyzer names are relative to the analyzed project, so a name is matched to the
+    report path sharing the most trailing path components with it (at least the file name).
+    """
+
+    def __init__(self, report_format: str):
+        self.format = report_format
+        self._files: Dict[str, FileCoverage] = {}
+        self._by_basename: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def add(self, file_coverage: FileCoverage) -> None:
+        """
+        Add a file's measurement, merging it with an earlier one for the same path.
+        """
+        path = normalize_path(file_coverage.path)
+        previous = self._files.get(path)
+        if previous is None:
+            self._by_basename.setdefault(path.rsplit('/', 1)[-1], []).append(path)
+            self._files[path] = file_coverage._replace(path=path)
+        else:
+            self._files[path] = combine(previous, file_coverage._replace(path=path))
+
+    def lookup(self, name: str) -> Optional[FileCoverage]:
+        """
+        Return the measurement of the analyzed file name, or None if the report lacks it.
+        """
+        parts = normalize_path(name).split('/')
+        best = None
+        best_length = 0
+        for path in self._by_basename.get(parts[-1], ()):
+            length = common_suffix_length(parts, path.split('/'))
+            if length > best_length:
+                best, best_length = path, length
+        return None if best is None else self._files[best]
+
+def normalize_path(path: str) -> str:
+    """
+    Return a path with forward slashes and without leading './' or drive components.
+    """
+    path = path.replace('\\', '/')
+    path = re.sub(r'^[A-Za-z]:/', '/', path)
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+def common_suffix_length(first: List[str], second: List[str]) -> int:
+    length = 0
+    for a, b in zip(reversed(first), reversed(second)):
+        if a != b:
+            break
+        length += 1
+    return length
+
+def load_coverage_report(path: str, report_format: Optional[str] = None) -> CoverageReport:
+    """
+    Read a coverage report, detecting its format unless one is given.
+
+    Raises ValueError for unknown or unrecognized formats.
+    """
+    report_format = report_format or detect_format(path)
+    report = CoverageReport(report_format)
+    for file_coverage in iter_report(path, report_format):
+        report.add(file_coverage)
+    return report
+
+def iter_report(path: str, report_format: str) -> Iterator[FileCoverage]:
+    """
+    Stream the per-file measurements of a report in the given format.
+
+    A file may be yielded more than once (CoverageReport.add merges them).
+    """
+    readers: Dict[str, Callable[[str], Iterator[FileCoverage]]] = {
+        'lcov': iter_lcov,
+        'cobertura': iter_cobertura,
+        'jacoco': iter_jacoco,
+        'coverage.py': iter_coverage_py
+    }
+    if report_format not in readers:
+        raise ValueError(f"Unsupported coverage report format: {report_format}")
+    return readers[report_format](path)
+
+def detect_format(path: str) -> str:
+    """
+    Recognize a report from its first bytes.
+    """
+    with open(path, 'rb') as handle:
+        head = handle.read(SNIFF_BYTES)
+    if head.startswith(SQLITE_HEADER):
+        return 'coverage.py'
+    # The root element follows the XML declaration, comments and the doctype
+    root = re.search(rb'<([A-Za-z][\w.:-]*)', re.sub(rb'<[?!][^>]*>', b'', head))
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<') and root:
+        if root.group(1) == b'coverage':
+            return 'cobertura'
+        if root.group(1) == b'report':
+            return 'jacoco'
+    elif re.search(rb'^(?:TN|SF):', head, re.MULTILINE):
+        return 'lcov'
+    raise ValueError(f"Unrecognized coverage report format: {path}")
+
+LCOV_BOUNDARY_PATTERN = re.compile(r'^(SF|end_of_record):?(.*)$', re.MULTILINE)
+LCOV_LINE_PATTERN = re.compile(r'^DA:(\d+)', re.MULTILINE)
+# Hit counts of at least one; '0', '-' and fractions below one are not executed lines
+LCOV_EXECUTED_PATTERN = re.compile(r'^DA:(\d+),0*[1-9]', re.MULTILINE)
+LCOV_FUNCTION_PATTERN = re.compile(r'^(FN|FNDA|FNA):(.*?)\r?$', re.MULTILINE)
+
+def iter_lcov(path: str) -> Iterator[FileCoverage]:
+    """
+    Stream an lcov tracefile: SF starts a file, DA records line hits, FN/FNDA (or the
+    FNL/FNA records of lcov 2.2) function hits, and end_of_record ends the file.
+
+    The file is read in windows of whole lines, and the records between two file
+    boundaries are extracted with one findall per record type instead of line by line.
+    """
+    source = None
+    executable: List[int] = []
+    executed: List[int] = []
+    functions: Dict[str, int] = {}
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='\n') as handle:
+        for chunk in iter_line_windows(handle):
+            position = 0
+            for boundary in LCOV_BOUNDARY_PATTERN.finditer(chunk):
+                if source is not None:
+                    _scan_lcov_records(chunk[position:boundary.start()], executable, executed, functions)
+                position = boundary.end()
+                if boundary.group(1) == 'SF':
+                    source = boundary.group(2).rstrip('\r')
+                    executable, executed, functions = [], [], {}
+                elif source is not None:
+                    yield FileCoverage(source, line_bitmap(executable), line_bitmap(executed), functions)
+                    source = None
+            if source is not None:
+                _scan_lcov_records(chunk[position:], executable, executed, functions)
+
+def iter_line_windows(handle: TextIO, size: int = READ_WINDOW) -> Iterator[str]:
+    """
+    Yield the text of a file in pieces of about size characters, each ending after a newline.
+    """
+    carry = ''
+    while True:
+        block = handle.read(size)
+        if not block:
+            if carry:
+                yield carry
+            return
+        block = carry + block
+        end = block.rfind('\n') + 1
+        carry = block[end:]
+        if end:
+            yield block[:end]
+
+def _scan_lcov_records(text: str, executable: List[int], executed: List[int], functions: Dict[str, int]) -> None:
+    executable.extend(map(int, LCOV_LINE_PATTERN.findall(text)))
+    executed.extend(map(int, LCOV_EXECUTED_PATTERN.findall(text)))
+    if 'FN' not in text:
+        return
+    for key, value in LCOV_FUNCTION_PATTERN.findall(text):
+        if key == 'FN':
+            # FN:<line>,<name> or, since lcov 2.0, FN:<line>,<end line>,<name>
+            fields = value.split(',', 2)
+            name = fields[2] if len(fields) == 3 and fields[1].isdigit() else value.split(',', 1)[-1]
+            functions.setdefault(name, 0)
+        elif key == 'FNDA':
+            hits, _, name = value.partition(',')
+            functions[name] = functions.get(name, 0) + _hits(hits)
+        else:
+            _, hits, name = value.split(',', 2)
+            functions[name] = functions.get(name, 0) + _hits(hits)
+
+def _hits(value: str) -> int:
+    # Some generators write '-' for lines they could not measure, or floats
+    try:
+        return int(float(value))
+    except ValueError:
+        return 0
+
+def iter_cobertura(path: str) -> Iterator[FileCoverage]:
+    """
+    Stream a Cobertura XML report one class at a time.
+
+    Lines come from each class's own lines element; method lines repeat them and only
+    count towards the method's hits.
+    """
+    filename = None
+    method = None
+    executable: List[int] = []
+    executed: List[int] = []
+    functions: Dict[str, int] = {}
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == 'class':
+                filename = element.get('filename') or element.get('name')
+                executable, executed, functions = [], [], {}
+            elif tag == 'method' and filename is not None:
+                method = element.get('name')
+                functions.setdefault(method, 0)
+            continue
+        if tag == 'line' and filename is not None:
+            hits = _hits(element.get('hits', '0'))
+            if method is not None:
+                functions[method] += hits
+            else:
+                number = int(element.get('number', '0'))
+                executable.append(number)
+                if hits > 0:
+                    executed.append(number)
+        elif tag == 'method':
+            method = None
+        elif tag == 'class' and filename is not None:
+            yield FileCoverage(filename, line_bitmap(executable), line_bitmap(executed), functions)
+            filename = None
+        elif tag not in ('package', 'packages', 'classes', 'lines', 'methods'):
+            continue
+        # Drop what has been counted, so that the tree never holds more than one class
+        element.clear()
+
+def iter_jacoco(path: str) -> Iterator[FileCoverage]:
+    """
+    Stream a JaCoCo XML report one source file at a time.
+
+    A package lists its classes, whose methods carry METHOD counters, before its source
+    files, whose lines carry covered and missed instruction counts; method hits are held
+    per source file until that file's lines are read.
+    """
+    package = ''
+    source = None
+    functions_by_source: Dict[str, Dict[str, int]] = {}
+    executable: List[int] = []
+    executed: List[int] = []
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == 'package':
+                package = element.get('name', '')
+                functions_by_source = {}
+            elif tag == 'class':
+                source = element.get('sourcefilename')
+            elif tag == 'sourcefile':
+                executable, executed = [], []
+            continue
+        if tag == 'line':
+            number = int(element.get('nr', '0'))
+            executable.append(number)
+            if int(element.get('ci', '0')) > 0:
+                executed.append(number)
+        elif tag == 'method' and source is not None:
+            covered = 0
+            for counter in element.iter('counter'):
+                if counter.get('type') == 'METHOD':
+                    covered = int(counter.get('covered', '0'))
+            functions = functions_by_source.setdefault(source, {})
+            name = element.get('name', '')
+            functions[name] = functions.get(name, 0) + covered
+        elif tag == 'sourcefile':
+            name = element.get('name', '')
+            yield FileCoverage(f"{package}/{name}" if package else name, line_bitmap(executable),
+                               line_bitmap(executed), functions_by_source.pop(name, {}))
+        elif tag == 'class':
+            source = None
+        elif tag not in ('package', 'report'):
+            continue
+        element.clear()
+
+def iter_coverage_py(path: str) -> Iterator[FileCoverage]:
+    """
+    Stream the executed lines of a coverage.py SQLite database, one file at a time.
+
+    Line data (line_bits) is stored per file and context as numbits, which are already
+    line bitmaps; branch data (arc) records pairs of lines. The database does not record
+    which lines are executable, so executable is None.
+    """
+    connection = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'file' not in tables:
+            raise ValueError(f"Not a coverage.py database: {path}")
+        if 'line_bits' in tables:
+            rows = connection.execute(
+                "SELECT file.path, line_bits.numbits FROM line_bits JOIN file ON file.id = line_bits.file_id "
+                "ORDER BY line_bits.file_id"
+            )
+            for source, group in itertools.groupby(rows, key=itemgetter(0)):
+                executed = 0
+                for _, numbits in group:
+                    executed |= int.from_bytes(numbits, 'little')
+                yield FileCoverage(source, None, executed, {})
+        if 'arc' in tables:
+            rows = connection.execute(
+                "SELECT file.path, arc.fromno, arc.tono FROM arc JOIN file ON file.id = arc.file_id "
+                "ORDER BY arc.file_id"
+            )
+            for source, group in itertools.groupby(rows, key=itemgetter(0)):
+                numbers = set()
+                for _, start, end in group:
+                    numbers.add(start)
+                    numbers.add(end)
+                # Negative numbers mark entering and leaving a code object
+                yield FileCoverage(source, None, line_bitmap({number for number in numbers if number > 0}), {})
+    finally:
+        connection.close()
@@ -0,0 +1,144 @@
+"""
+Per-directory and per-file coverage, rolled up into a tree of bounded size.
+
+    tree = build_coverage_tree([("src/app.py", 120, 90, 2), ("src/util/io.py", 40, 10, 3)])
+
+Every file's lines and uncovered functions are added up the directory tree once, bottom
+up. The tree is then flattened into the parallel lists a Plotly treemap or sunburst
+takes, largest directories first, within max_nodes nodes: files and directories smaller
+than 1/max_nodes of the project are merged into one "N smaller files" node per
+directory, and once the budget runs out the remaining directories are kept as leaves
+with their totals. Figures built from it stay the same size however large the
+repository is.
+"""
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Nodes of a flattened tree, the root included
+DEFAULT_MAX_NODES = 2000
+
+ROOT_ID = '.'
+ROOT_LABEL = 'All files'
+
+# (file name, total lines, covered lines, uncovered functions) of one source file
+FileRow = Tuple[str, int, int, int]
+
+class CoverageNode:
+    """
+    A directory or file of the tree, with the counts of everything under it.
+    """
+    __slots__ = ('id', 'label', 'children', 'files', 'total_lines', 'covered_lines', 'uncovered_functions')
+
+    def __init__(self, node_id: str, label: str):
+        self.id = node_id
+        self.label = label
+        self.children: Optional[Dict[str, 'CoverageNode']] = None
+        self.files = 0
+        self.total_lines = 0
+        self.covered_lines = 0
+        self.uncovered_functions = 0
+
+    def child(self, label: str) -> 'CoverageNode':
+        if self.children is None:
+            self.children = {}
+        node = self.children.get(label)
+        if node is None:
+            node_id = label if self.id == ROOT_ID else f"{self.id}/{label}"
+            node = self.children[label] = CoverageNode(node_id, label)
+        return node
+
+def build_coverage_tree(files: Iterable[FileRow], max_nodes: int = DEFAULT_MAX_NODES) -> Dict[str, List]:
+    """
+    Roll file coverage up the directory tree and flatten it into at most max_nodes nodes.
+
+    Returns parallel lists: 'ids', 'labels', 'parents' (the root's parent is ''),
+    'total_lines', 'covered_lines', 'uncovered_functions' and 'files', the number of
+    files under each node. A parent's counts are the sums of its children's.
+    """
+    root = CoverageNode(ROOT_ID, ROOT_LABEL)
+    for name, total_lines, covered_lines, uncovered_functions in files:
+        node = root
+        for part in split_path(name):
+            node = node.child(part)
+        node.files += 1
+        node.total_lines += total_lines
+        node.covered_lines += covered_lines
+        node.uncovered_functions += uncovered_functions
+    roll_up(root)
+    return flatten(root, max_nodes)
+
+def split_path(name: str) -> List[str]:
+    """
+    Split a file name into its directories and base name, ignoring '.' and empty components.
+    """
+    return [part for part in re.split(r'[\\/]+', name) if part not in ('', '.')] or [name]
+
+def roll_up(root: CoverageNode) -> None:
+    """
+    Add every node's counts into its parent's, children before parents.
+    """
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.children:
+            stack.extend(node.children.values())
+    for node in reversed(order):
+        if node.children:
+            for child in node.children.values():
+                node.files += child.files
+                node.total_lines += child.total_lines
+                node.covered_lines += child.covered_lines
+                node.uncovered_functions += child.uncovered_functions
+
+def flatten(root: CoverageNode, max_nodes: int) -> Dict[str, List]:
+    """
+    Emit the root and then the children of the largest directories first, within max_nodes nodes.
+    """
+    tree = {key: [] for key in ('ids', 'labels', 'parents', 'total_lines', 'covered_lines', 'uncovered_functions',
+                                'files')}
+
+    def emit(node: CoverageNode, parent: str) -> None:
+        tree['ids'].append(node.id)
+        tree['labels'].append(node.label)
+        tree['parents'].append(parent)
+        tree['total_lines'].append(node.total_lines)
+        tree['covered_lines'].append(node.covered_lines)
+        tree['uncovered_functions'].append(node.uncovered_functions)
+        tree['files'].append(node.files)
+
+    emit(root, '')
+    min_lines = root.total_lines / max_nodes
+    # Directories waiting to be expanded, largest first; the counter keeps the order stable
+    pending = [(-root.total_lines, 0, root)] if root.children else []
+    counter = 1
+    while pending:
+        _, _, node = heapq.heappop(pending)
+        room = max_nodes - len(tree['ids'])
+        children = sorted(node.children.values(), key=lambda child: (-child.total_lines, child.label))
+        large = [child for child in children if child.total_lines >= min_lines]
+        small = children[len(large):]
+        if len(small) == 1:
+            large, small = children, []
+        if len(large) + bool(small) > room:
+            if room < 2:
+                # No room to show more than the directory itself
+                continue
+            large, small = children[:room - 1], children[room - 1:]
+
+        for child in large:
+            emit(child, node.id)
+            if child.children:
+                heapq.heappush(pending, (-child.total_lines, counter, child))
+                counter += 1
+        if small:
+            bucket = CoverageNode(f"{node.id}/*", f"{sum(child.files for child in small)} smaller files")
+            for child in small:
+                bucket.files += child.files
+                bucket.total_lines += child.total_lines
+                bucket.covered_lines += child.covered_lines
+                bucket.uncovered_functions += child.uncovered_functions
+            emit(bucket, node.id)
+    return tree
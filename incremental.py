@@ -0,0 +1,169 @@
+import hashlib
+import os
+import pickle
+import posixpath
+import subprocess
+from typing import Dict, Optional, Set, Tuple
+from analysis_cache import AnalysisCache, ANALYZER_VERSION, DEFAULT_CACHE_DIR
+from code_analyzer import analyze_file_partial, apply_coverage_report, cached_file_partial, reduce_partials
+from coverage_reports import CoverageReport
+from test_analyzer import analyze_test_file_partial, reduce_test_partials
+from utils import iter_project_files, read_project_file, DEFAULT_MAX_FILE_SIZE
+
+# Bump whenever the layout of the saved state changes; changes to the partials themselves
+# are tracked by analysis_cache.ANALYZER_VERSION, which is saved alongside
+STATE_VERSION = 2
+
+def analyze_incremental(repo_path: str, project_type: str, base_commit: Optional[str] = None,
+                        state_path: Optional[str] = None, cache: Optional[AnalysisCache] = None,
+                        max_file_size: int = DEFAULT_MAX_FILE_SIZE, report: Optional[CoverageReport] = None) -> Dict:
+    """
+    Analyze a git checkout, re-analyzing only the files that changed since the last run.
+
+    Per-file partial results from the previous run are kept in a state file together with
+    the commit they describe. Changes are diffed from that commit, since it is what the
+    partials describe, whatever base_commit is (which is only checked to exist): only
+    files reported by git diff, plus files that were uncommitted last time, are re-read
+    with the .gitignore rules of a full scan; deleted files are dropped and the aggregate
+    coverage and functional coverage are recomputed from the stored partials. The whole
+    tree is scanned to seed the state when there is none, when its commit no longer
+    exists, or when a .gitignore changed, which may change what is analyzed. A
+    CoverageReport applies to the aggregate only; the state keeps the partials as analyzed.
+
+    Returns a dictionary with 'code_analysis' and 'test_analysis' (shaped like the results
+    of analyze_code and analyze_tests) plus 'analyzed_files', 'deleted_files' and
+    'full_scan' describing the work done.
+    """
+    repo_path = os.path.abspath(repo_path)
+    state_path = state_path or default_state_path(repo_path, project_type)
+    state = load_state(state_path)
+    if base_commit:
+        resolve_commit(repo_path, base_commit)
+
+    head = resolve_commit(repo_path, 'HEAD')
+    usable = state is not None and state['project_type'] == project_type
+    if usable:
+        try:
+            changed, deleted = changed_files(repo_path, state['commit'])
+        except subprocess.CalledProcessError:
+            # The state's commit was rewritten away and pruned
+            usable = False
+        else:
+            changed |= set(state['dirty']) - deleted
+            usable = not any(posixpath.basename(name) == '.gitignore' for name in changed | deleted)
+
+    if usable:
+        partials = state['partials']
+        for name in deleted:
+            partials.pop(name, None)
+        gitignore_cache = {}
+        for name in sorted(changed):
+            file = read_project_file(repo_path, name, max_file_size, gitignore_cache=gitignore_cache)
+            if file is None:
+                partials.pop(name, None)
+            else:
+                partials[name] = _file_partials(file, project_type, cache)
+        analyzed = len(changed)
+    else:
+        partials = {}
+        for file in iter_project_files(repo_path, max_file_size):
+            partials[file['name']] = _file_partials(file, project_type, cache)
+        deleted = set()
+        analyzed = len(partials)
+
+    dirty, _ = changed_files(repo_path, head)
+    save_state(state_path, {
+        'version': STATE_VERSION,
+        'analyzer_version': ANALYZER_VERSION,
+        'project_type': project_type,
+        'commit': head,
+        'dirty': sorted(dirty),
+        'partials': partials
+    })
+
+    ordered = [(name, partials[name]) for name in sorted(partials)]
+    return {
+        'code_analysis': reduce_partials(
+            ((name, apply_coverage_report(code, name, report)) for name, (code, _) in ordered), project_type
+        ),
+        'test_analysis': reduce_test_partials(tests for _, (_, tests) in ordered),
+        'analyzed_files': analyzed,
+        'deleted_files': len(deleted),
+        'full_scan': not usable
+    }
+
+def default_state_path(repo_path: str, project_type: str) -> str:
+    """
+    Return the state file location for a checkout and project type.
+    """
+    repo_key = hashlib.sha256(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:16]
+    project_key = ''.join(c for c in project_type if c.isalnum()).lower() or 'project'
+    return os.path.join(DEFAULT_CACHE_DIR, 'incremental', f"{repo_key}-{project_key}.pickle")
+
+def load_state(state_path: str) -> Optional[Dict]:
+    """
+    Load saved incremental state, returning None if it is missing, unreadable or outdated.
+
+    State saved by another analyzer version is outdated too: its partials may differ from
+    what the current analyzers produce for the same files.
+    """
+    try:
+        with open(state_path, 'rb') as handle:
+            state = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return None
+    if state.get('analyzer_version') != ANALYZER_VERSION:
+        return None
+    return state
+
+def save_state(state_path: str, state: Dict) -> None:
+    """
+    Atomically write incremental state.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'wb') as handle:
+        pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path)
+
+def resolve_commit(repo_path: str, revision: str) -> str:
+    """
+    Resolve a revision (branch, tag, abbreviated hash) to a full commit hash.
+    """
+    return _git(repo_path, 'rev-parse', '--verify', f"{revision}^{{commit}}").strip()
+
+def changed_files(repo_path: str, commit: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Return the (changed or added, deleted) repository-relative paths between a commit and
+    the working tree, including untracked files that are not ignored.
+    """
+    changed = set()
+    deleted = set()
+    entries = _git(repo_path, 'diff', '--name-status', '--no-renames', '--relative', '-z', commit, '--').split('\0')
+    for status, name in zip(entries[0::2], entries[1::2]):
+        if status.startswith('D'):
+            deleted.add(name)
+        elif status:
+            changed.add(name)
+    untracked = _git(repo_path, 'ls-files', '--others', '--exclude-standard', '-z').split('\0')
+    changed.update(name for name in untracked if name)
+    return changed, deleted
+
+def _file_partials(file: Dict, project_type: str, cache: Optional[AnalysisCache]) -> Tuple[Dict, Dict]:
+    """
+    Compute the code and test analysis partials for one file.
+    """
+    if cache is not None:
+        code = cached_file_partial(file, project_type, cache)
+    else:
+        code = analyze_file_partial(file, project_type)
+    return code, analyze_test_file_partial(file, project_type)
+
+def _git(repo_path: str, *args: str) -> str:
+    """
+    Run a git command in the checkout and return its output.
+    """
+    result = subprocess.run(['git', '-C', repo_path, *args], check=True, capture_output=True)
+    return result.stdout.decode('utf-8', errors='surrogateescape')
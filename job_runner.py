@@ -0,0 +1,244 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Jobs run at once; further jobs wait in the pool's queue
+DEFAULT_MAX_JOBS = 2
+
+# Finished jobs kept in the job table before the oldest are forgotten
+DEFAULT_MAX_FINISHED_JOBS = 32
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job once it has been asked to stop.
+    """
+
+class Job:
+    """
+    A background job and its progress.
+
+    The job function receives the Job as its first argument and reports progress through
+    it: set_stage, track_files while consuming files and report_functions while generating
+    tests. Each of these raises JobCancelled once cancel() has been called, so a job stops
+    at the next file or function without the process being interrupted. Values placed in
+    partial (with set_partial) can be shown before the job finishes.
+    """
+
+    def __init__(self, job_id: str, description: str = ''):
+        self.id = job_id
+        self.description = description
+        self.status = PENDING
+        self.stage = 'Queued'
+        self.files_done = 0
+        self.files_total: Optional[int] = None
+        self.functions_done = 0
+        self.functions_total: Optional[int] = None
+        self.partial: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """
+        Ask the job to stop at its next progress report.
+        """
+        self._cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def set_stage(self, stage: str) -> None:
+        self.check_cancelled()
+        with self._lock:
+            self.stage = stage
+
+    def set_partial(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.partial[key] = value
+
+    def update_partial(self, key: str, item: Any, value: Any) -> None:
+        """
+        Set one entry of the dictionary held in partial under key, creating it if needed.
+        """
+        with self._lock:
+            self.partial.setdefault(key, {})[item] = value
+
+    def get_partial(self, key: str) -> Any:
+        """
+        Return a shallow copy of partial[key] (None if unset), safe to read while the job updates it.
+        """
+        with self._lock:
+            value = self.partial.get(key)
+            return value.copy() if isinstance(value, dict) else value
+
+    def track_files(self, files: Iterable[Dict], total: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield files unchanged, counting each one as done once the consumer asks for the next.
+        """
+        with self._lock:
+            self.files_done = 0
+            self.files_total = total if total is not None else (len(files) if hasattr(files, '__len__') else None)
+        for file in files:
+            self.check_cancelled()
+            yield file
+            with self._lock:
+                self.files_done += 1
+
+    def report_functions(self, done: int, total: int) -> None:
+        """
+        Progress callback for test generation: done of total functions have tests.
+        """
+        with self._lock:
+            self.functions_done = done
+            self.functions_total = total
+        self.check_cancelled()
+
+    def progress(self) -> Optional[float]:
+        """
+        Return the completed fraction of the current stage, or None if it is not known.
+        """
+        with self._lock:
+            if self.functions_total:
+                return min(1.0, self.functions_done / self.functions_total)
+            if self.files_total:
+                return min(1.0, self.files_done / self.files_total)
+        return 1.0 if self.status == DONE else None
+
+    def snapshot(self) -> Dict:
+        """
+        Return the job's current state as a plain dictionary.
+        """
+        with self._lock:
+            return {
+                'id': self.id,
+                'description': self.description,
+                'status': self.status,
+                'stage': self.stage,
+                'files_done': self.files_done,
+                'files_total': self.files_total,
+                'functions_done': self.functions_done,
+                'functions_total': self.functions_total,
+                'error': self.error,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished
+            }
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+            self.stage = {DONE: 'Done', FAILED: 'Failed', CANCELLED: 'Cancelled'}[status]
+
+class JobRunner:
+    """
+    Runs jobs on a thread pool and keeps a table of them by id.
+
+    Threads are enough here: the CPU-heavy part of an analysis already runs in worker
+    processes (parallel_analyzer) and test generation waits on the network, so a job
+    thread mostly coordinates. The runner is thread-safe and meant to be shared by every
+    Streamlit session of the process.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_JOBS, max_finished: int = DEFAULT_MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._futures: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, target: Callable[..., Any], *args, description: str = '', **kwargs) -> Job:
+        """
+        Queue target(job, *args, **kwargs) and return its Job.
+        """
+        with self._lock:
+            job = Job(f"job-{next(self._ids)}", description)
+            self._jobs[job.id] = job
+            self._prune()
+            self._futures[job.id] = self._executor.submit(self._run, job, target, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """
+        Return the jobs in the table, oldest first.
+        """
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job; a queued job is dropped, a running one stops at its next progress report.
+
+        Returns False if the job is unknown or already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancel()
+        if future is not None and future.cancel():
+            job._finish(CANCELLED)
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancel every unfinished job and stop the worker threads.
+        """
+        for job in self.jobs():
+            if not job.is_finished:
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, target: Callable[..., Any], args: tuple, kwargs: Dict) -> None:
+        with job._lock:
+            job.status = RUNNING
+            job.started = time.time()
+        try:
+            job.check_cancelled()
+            result = target(job, *args, **kwargs)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, error=str(e))
+        else:
+            job._finish(DONE, result)
+        finally:
+            with self._lock:
+                self._futures.pop(job.id, None)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,234 @@
+"""
+Per-language patterns and conventions, compiled once and shared by every analyzer.
+
+    plugin = get_language_plugin("Java")
+    names = plugin.find_functions(content)
+
+Each project type is described by a LanguagePlugin: its source extensions, comment
+prefix, the patterns naming the functions a source file defines and the functions a
+test file tests, and its test quality markers. register_language adds or replaces one.
+
+The patterns run in linear time on any input, including minified files with very long
+lines. Quantifiers that are always followed by something they cannot match are
+possessive, identifiers are only tried from the start of a word, and argument lists
+stop at the next parenthesis, so a failed attempt never rescans what an earlier one
+already gave up on. PATHOLOGICAL_INPUTS in benchmark.py exercises the worst cases.
+"""
+import re
+from typing import AnyStr, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+# A match that would start inside a word can never succeed where one starting at the
+# beginning of that word failed, so the leading guard skips those positions instead of
+# retrying the identifier scan at each one; the names found are the same as without it.
+WORD_START = r'(?!(?<=\w)\w)'
+
+# Marks the capturing identifier in modifier_pattern bodies
+NAME = 'NAME'
+
+def modifier_pattern(modifiers: str, body: str) -> Pattern[str]:
+    """
+    Compile an optional access modifier followed by body, starting at a word.
+
+    body must contain NAME where the captured identifier goes. The result finds the same
+    names as WORD_START + (?:modifiers)?\\s*body, whose leading \\s* lets a match start in
+    the whitespace before a word: there the word is tried without a modifier first, so
+    an indented 'privateHelper()' names privateHelper, not Helper. That order is kept
+    by a lookahead instead of by starting at every whitespace position, which took
+    quadratic time on long runs of blanks.
+    """
+    bare = body.replace(NAME, r'\w++')
+    captured = body.replace(NAME, r'(\w++)')
+    return re.compile(WORD_START + r'(?:(?!(?<=\s)' + bare + r')(?:' + modifiers + r')\s*+)?' + captured)
+
+# Function and const declarations, and describe/it/test calls, in JavaScript-family code.
+# Whitespace and '=' around the parameters are matched in one way only.
+DECLARATION_PATTERN = re.compile(
+    r'(?:function|const)\s++(\w++)\s*+(?:=\s*+)?(?:\([^()]*+\)\s*+(?:=\s*+)?|=\s*+)?[{(]'
+)
+TEST_CALL_PATTERN = re.compile(r'(?:describe|it|test)\s*+\(')
+JS_FUNCTION_PATTERN = re.compile(r'function\s++(\w++)')
+
+# Method and property declarations
+ANGULAR_METHOD_PATTERN = modifier_pattern(r'public|private', NAME + r'\s*+\([^()]*+\)\s*+{')
+PROPERTY_PATTERN = re.compile(WORD_START + r'(\w++)\s*+:\s*+\w++\s*+;')
+METHOD_PATTERN = modifier_pattern(r'public|private|protected', r'\w++\s++' + NAME + r'\s*+\([^()]*+\)\s*+{')
+
+# Identifiers that name tests, e.g. test_parse_header, testParse, TestParse
+TEST_NAME_PATTERN = re.compile(r'\b[Tt]est\w++')
+
+# Elements of an HTML template. An unclosed '<' would scan to the end of the content, so
+# searches are bounded by the last '>' (UI_ELEMENT_END, see findall_bounded).
+UI_ELEMENT_PATTERN = re.compile(r'<(\w++)[^>]*+>')
+UI_ELEMENT_END = re.compile(r'>')
+
+# Function definitions in brace-delimited languages, used to locate source snippets. The
+# return type annotation is atomic: once it has matched, only a following brace is tried.
+DEFINITION_PATTERN = re.compile(
+    r'function\s++(\w++)|(?:const|let|var)\s++(\w++)\s*+=|'
+    + WORD_START + r'(\w++)\s*+\([^()\n]*+\)\s*+(?>:\s*[\w<>\[\], ]+\s*)?\{'
+)
+
+# Tested functions: the first void method after each test attribute. The lazy scan is
+# bounded by the end of the last TESTED_METHOD_END match, so that test attributes with no
+# method after them cannot each rescan the rest of the file.
+JAVA_TESTED_PATTERN = re.compile(r'@Test.*?void\s+(\w+)', re.DOTALL)
+DOTNET_TESTED_PATTERN = re.compile(r'\[Test(?:Method)?\].*?void\s+(\w+)', re.DOTALL)
+TESTED_METHOD_END = re.compile(r'void\s++\w++')
+
+# Literal markers counted in test files for each test quality metric; a metric with
+# several markers sums their counts
+DEFAULT_QUALITY_MARKERS = {
+    'total_tests': ('test(',),
+    'assertions': ('expect(',),
+    'mocks': ('jest.mock(',),
+    'test_depth': ('describe(',)
+}
+
+class LanguagePlugin(NamedTuple):
+    """
+    The conventions of one project type.
+
+    function_patterns each capture one function name per match; they are empty for
+    languages whose functions come from a parser (Python). tested_pattern captures the
+    functions exercised by a test file, and tested_bound, if set, bounds its search (see
+    find_tested_functions). scripted marks the JavaScript family, whose analyzers also
+    measure unit coverage from declarations and functional coverage from event handlers.
+    """
+    name: str
+    source_extensions: Tuple[str, ...]
+    comment_prefix: str
+    function_patterns: Tuple[Pattern[str], ...]
+    tested_pattern: Pattern[str]
+    quality_markers: Dict[str, Tuple[str, ...]]
+    tested_bound: Optional[Pattern[str]] = None
+    scripted: bool = False
+
+    def find_functions(self, content: str) -> List[str]:
+        """
+        Return the names matched by each function pattern, pattern by pattern.
+        """
+        names = []
+        for pattern in self.function_patterns:
+            names += pattern.findall(content)
+        return names
+
+    def find_tested_functions(self, content: str) -> List[str]:
+        """
+        Return the names of the functions a test file exercises.
+        """
+        return findall_bounded(self.tested_pattern, content, self.tested_bound)
+
+def bounded_end(bound: Pattern[AnyStr], content: AnyStr) -> int:
+    """
+    Return the end of the last match of bound in content, or 0 if there is none.
+    """
+    end = 0
+    for match in bound.finditer(content):
+        end = match.end()
+    return end
+
+def findall_bounded(pattern: Pattern[str], content: str, bound: Optional[Pattern[str]]) -> List[str]:
+    """
+    Return pattern.findall(content), searching no further than the end of bound's last match.
+
+    For a pattern whose every match ends with a match of bound, this finds the same matches
+    while failed attempts stop at that point instead of scanning to the end of the content.
+    """
+    end = len(content) if bound is None else bounded_end(bound, content)
+    return pattern.findall(content, 0, end)
+
+LANGUAGES: Dict[str, LanguagePlugin] = {}
+
+def register_language(plugin: LanguagePlugin) -> LanguagePlugin:
+    """
+    Add a language, replacing any registered under the same name.
+    """
+    LANGUAGES[plugin.name] = plugin
+    return plugin
+
+def get_language_plugin(project_type: str) -> LanguagePlugin:
+    """
+    Return the registered plugin for a project type.
+
+    Raises ValueError for project types that are not registered.
+    """
+    plugin = LANGUAGES.get(project_type)
+    if plugin is None:
+        raise ValueError(f"Unsupported project type: {project_type}")
+    return plugin
+
+JEST_TESTED_PATTERN = re.compile(r'test\([\'"](.+?)[\'"]')
+
+register_language(LanguagePlugin(
+    name="JavaScript",
+    source_extensions=('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'),
+    comment_prefix='//',
+    function_patterns=(JS_FUNCTION_PATTERN,),
+    tested_pattern=JEST_TESTED_PATTERN,
+    quality_markers=DEFAULT_QUALITY_MARKERS,
+    scripted=True
+))
+register_language(LanguagePlugin(
+    name="Angular",
+    source_extensions=('.ts', '.js'),
+    comment_prefix='//',
+    function_patterns=(ANGULAR_METHOD_PATTERN, PROPERTY_PATTERN),
+    tested_pattern=re.compile(r'it\([\'"](.+?)[\'"]'),
+    quality_markers={
+        'total_tests': ('it(',),
+        'assertions': ('expect(',),
+        'mocks': ('jasmine.createSpy', 'jasmine.createSpyObj'),
+        'test_depth': ('describe(',)
+    },
+    scripted=True
+))
+register_language(LanguagePlugin(
+    name="React",
+    source_extensions=('.js', '.jsx', '.ts', '.tsx'),
+    comment_prefix='//',
+    function_patterns=(DECLARATION_PATTERN,),
+    tested_pattern=JEST_TESTED_PATTERN,
+    quality_markers=DEFAULT_QUALITY_MARKERS,
+    scripted=True
+))
+register_language(LanguagePlugin(
+    name="Python",
+    source_extensions=('.py',),
+    comment_prefix='#',
+    function_patterns=(),
+    tested_pattern=re.compile(r'def\s++test_(\w++)'),
+    quality_markers={
+        'total_tests': ('def test_',),
+        'assertions': ('assert',),
+        'mocks': ('mock.patch',),
+        'test_depth': ('class Test',)
+    }
+))
+register_language(LanguagePlugin(
+    name="Java",
+    source_extensions=('.java',),
+    comment_prefix='//',
+    function_patterns=(METHOD_PATTERN,),
+    tested_pattern=JAVA_TESTED_PATTERN,
+    tested_bound=TESTED_METHOD_END,
+    quality_markers={
+        'total_tests': ('@Test',),
+        'assertions': ('assert',),
+        'mocks': ('mock(', 'when('),
+        'test_depth': ('class',)
+    }
+))
+register_language(LanguagePlugin(
+    name=".NET",
+    source_extensions=('.cs',),
+    comment_prefix='//',
+    function_patterns=(METHOD_PATTERN,),
+    tested_pattern=DOTNET_TESTED_PATTERN,
+    tested_bound=TESTED_METHOD_END,
+    quality_markers={
+        'total_tests': ('[Test]', '[TestMethod]'),
+        'assertions': ('Assert.',),
+        'mocks': ('Mock<', '.Setup('),
+        'test_depth': ('[TestClass]', '[TestFixture]')
+    }
+))
@@ -1,28 +1,33 @@
 import streamlit as st
 import pandas as pd
 import os
+from contextlib import nullcontext
 from code_analyzer import analyze_code
+from coverage_reports import load_coverage_report
+from parallel_analyzer import analyze_code_parallel
 from test_analyzer import analyze_tests
-from test_generator import generate_tests
-from visualization import display_coverage, display_test_quality, display_functional_coverage
-from utils import process_upload
+from test_generator import generate_tests_concurrently, generate_tests_batched, DEFAULT_MAX_CONCURRENCY
+from test_validator import TestValidator
+from artifact_writer import TestArtifactWriter, read_artifact
+from visualization import display_coverage, display_coverage_tree, display_test_quality, display_functional_coverage, display_performance
+from utils import process_upload, is_archive, ProjectFiles
+from analysis_cache import AnalysisCache, fingerprint_files
+from response_cache import ResponseCache
+from incremental import analyze_incremental
+from job_runner import JobRunner, DONE, FAILED
+from metrics import METRICS
 
 # Add version number
 __version__ = "1.4.0"
 
-def get_file_extension(project_type):
-    if project_type in ["JavaScript", "React"]:
-        return "js"
-    elif project_type == "Angular":
-        return "ts"
-    elif project_type == "Python":
-        return "py"
-    elif project_type == "Java":
-        return "java"
-    elif project_type == ".NET":
-        return "cs"
-    else:
-        return "txt"
+# Analyses kept in memory by Streamlit, keyed by project contents
+ANALYSIS_MEMO_ENTRIES = 16
+
+# Seconds between progress updates while an analysis job runs
+JOB_POLL_SECONDS = 0.5
+
+# Generated test files listed at once for preview
+MAX_LISTED_TESTS = 500
 
 def add_numbers(a: int, b: int) -> int:
     """Add two numbers together."""
@@ -49,6 +54,143 @@ def get_test_quality_suggestions():
     ]
     return suggestions
 
+def run_project_analysis(files, project_type, parallel, max_workers, cache=None, job=None, report=None):
+    """
+    Run code and test analysis over the processed project files.
+
+    When a job is given, its stage and files done are updated as the analysis goes. A
+    coverage report, if given, supplies the measured line and function coverage.
+    """
+    # Analyze code, spreading whole repositories across worker processes
+    code_files = files
+    if job is not None:
+        job.set_stage("Analyzing code")
+        code_files = job.track_files(files)
+    if parallel:
+        code_analysis = analyze_code_parallel(code_files, project_type, max_workers=max_workers, cache=cache,
+                                              report=report)
+    else:
+        code_analysis = analyze_code(code_files, project_type, cache=cache, report=report)
+    
+    # Analyze existing tests
+    if job is not None:
+        job.set_stage("Analyzing tests")
+    test_analysis = analyze_tests(files, project_type, cache=cache)
+    return code_analysis, test_analysis
+
+@st.cache_data(show_spinner=False, max_entries=ANALYSIS_MEMO_ENTRIES)
+def memoized_project_analysis(files_key, project_type, parallel, report_key, _files, _max_workers, _job=None):
+    """
+    Memoized run_project_analysis, backed by the on-disk analysis cache.
+
+    files_key fingerprints _files (see fingerprint_files), so Streamlit does not have to
+    hash the file contents itself on every rerun. report_key identifies the coverage
+    report, if any (see coverage_report_key); it is only read on a miss.
+    """
+    report = load_coverage_report(report_key[0]) if report_key else None
+    with AnalysisCache() as cache:
+        return run_project_analysis(_files, project_type, parallel, _max_workers, cache, _job, report)
+
+def coverage_report_key(path):
+    """
+    Identify a coverage report file by its path, modification time and size.
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+@st.cache_resource
+def get_job_runner():
+    """
+    Return the job runner shared by every session of this process.
+    """
+    return JobRunner()
+
+def analysis_job(job, file_content, project_path, project_type, settings):
+    """
+    Analyze a project and generate tests for it; runs as a background job.
+
+    Nothing here touches the page: the session polls the job for its progress and
+    renders the returned results once it is done.
+    """
+    use_cache = settings['use_cache']
+    report_path = settings['coverage_report']
+    processed_files = None
+    if settings['base_commit']:
+        # Re-analyze only the files changed since the base commit
+        report = load_coverage_report(report_path) if report_path else None
+        job.set_stage("Analyzing changed files")
+        with AnalysisCache() if use_cache else nullcontext() as cache:
+            incremental = analyze_incremental(project_path, project_type, base_commit=settings['base_commit'], cache=cache,
+                                              report=report)
+        code_analysis = incremental['code_analysis']
+        test_analysis = incremental['test_analysis']
+    else:
+        # Process input; a repository is walked again by each pass rather than held in memory
+        if project_path:
+            processed_files = ProjectFiles(project_path, mapped_file_size=settings['mapped_file_size'])
+        else:
+            processed_files = process_upload(file_content)
+        
+        parallel = project_path is not None
+        if use_cache:
+            job.set_stage("Reading files")
+            files_key = fingerprint_files(job.track_files(processed_files))
+            code_analysis, test_analysis = memoized_project_analysis(
+                files_key, project_type, parallel,
+                coverage_report_key(report_path) if report_path else None, processed_files, settings['max_workers'], job
+            )
+        else:
+            report = load_coverage_report(report_path) if report_path else None
+            code_analysis, test_analysis = run_project_analysis(
+                processed_files, project_type, parallel, settings['max_workers'], job=job, report=report
+            )
+    job.set_partial('code_analysis', code_analysis)
+    job.set_partial('test_analysis', test_analysis)
+    
+    # Generate new tests, each written to the archive on disk as soon as it is final
+    job.set_stage("Generating tests")
+    cache_caption = None
+    artifacts = TestArtifactWriter(project_type)
+    try:
+        with artifacts, ResponseCache() if use_cache else nullcontext() as response_cache:
+            if settings['batch_size'] > 1:
+                # Send several functions per request to cut per-request prompt overhead
+                generate_tests_batched(
+                    code_analysis, test_analysis, project_type, files=processed_files,
+                    max_functions_per_batch=settings['batch_size'], response_cache=response_cache,
+                    progress=job.report_functions, artifacts=artifacts
+                )
+            else:
+                # Streamed tokens are kept per function and test type for display_job_progress
+                def on_update(function_name: str, test_type: str, text: str) -> None:
+                    job.update_partial('generated_tests', (function_name, test_type), text)
+
+                # Python tests import the project's modules, which only a directory provides
+                project_root = project_path if project_path and os.path.isdir(project_path) else None
+                with TestValidator(project_type, project_root) if settings['validate'] else nullcontext() as validator:
+                    generate_tests_concurrently(
+                        code_analysis, test_analysis, project_type, max_concurrency=settings['max_concurrency'],
+                        response_cache=response_cache, requests_per_minute=settings['requests_per_minute'] or None,
+                        tokens_per_minute=settings['tokens_per_minute'] or None, progress=job.report_functions,
+                        on_update=on_update if settings['stream'] else None, validator=validator,
+                        artifacts=artifacts
+                    )
+            if response_cache:
+                cache_caption = f"AI response cache: {response_cache.hits} hits, {response_cache.misses} misses"
+    except BaseException:
+        os.unlink(artifacts.path)
+        raise
+    
+    return {
+        'analysis': {
+            'code_analysis': code_analysis,
+            'test_analysis': test_analysis,
+            'project_type': project_type,
+            'cache_caption': cache_caption
+        },
+        'generated_tests': {'path': artifacts.path, 'artifacts': artifacts.artifacts}
+    }
+
 def display_results(code_analysis, test_analysis, project_type, show_coverage_quality, show_functional_coverage):
     st.header("Analysis Results")
     
@@ -59,11 +201,21 @@ def display_results(code_analysis, test_analysis, project_type, show_coverage_qu
                 st.subheader("Code Coverage")
                 try:
                     display_coverage(coverage)
-                    st.write(f"Total Lines: {coverage['total_lines']}")
-                    st.write(f"Covered Lines: {coverage['covered_lines']}")
+                    if 'measured_files' not in coverage:
+                        st.write(f"Total Lines: {coverage['total_lines']}")
+                        st.write(f"Covered Lines: {coverage['covered_lines']}")
                     st.write(f"Coverage Percentage: {coverage['coverage_percentage']:.2f}%")
                 except Exception as e:
                     st.error(f"Error displaying code coverage: {str(e)}")
+                
+                # Hotspots per directory and file; a single file has nothing to break down
+                tree = code_analysis.get('coverage_tree')
+                if tree and len(tree['ids']) > 2:
+                    st.subheader("Coverage by Directory")
+                    try:
+                        display_coverage_tree(tree)
+                    except Exception as e:
+                        st.error(f"Error displaying coverage by directory: {str(e)}")
             else:
                 st.warning("No code coverage data available.")
         else:
@@ -100,14 +252,157 @@ def display_results(code_analysis, test_analysis, project_type, show_coverage_qu
         else:
             st.warning("Functional coverage analysis not available.")
 
+def display_analysis(analysis, show_coverage_quality, show_functional_coverage):
+    """
+    Render stored analysis results, generated tests and suggestions.
+    """
+    project_type = analysis['project_type']
+    if analysis['cache_caption']:
+        st.caption(analysis['cache_caption'])
+    
+    # Display results
+    display_results(analysis['code_analysis'], analysis['test_analysis'], project_type, show_coverage_quality, show_functional_coverage)
+    display_generated_tests(st.session_state.generated_tests)
+    
+    # Display test quality suggestions
+    st.header("Suggestions for Improving Test Quality")
+    suggestions = get_test_quality_suggestions()
+    for i, suggestion in enumerate(suggestions, 1):
+        st.write(f"{i}. {suggestion}")
+
+def display_generated_tests(generated_tests):
+    """
+    List the generated test files, preview one and offer the whole archive for download.
+
+    The tests stay in the archive on disk: only the previewed file is read, and the
+    download is read from the archive when it is clicked.
+    """
+    st.header("Generated Test Cases")
+    path = generated_tests['path']
+    artifacts = generated_tests['artifacts']
+    if not artifacts:
+        st.warning("No tests were generated.")
+        return
+    
+    for test_type, label in (('unit', "unit"), ('integration', "functional")):
+        if not any(artifact.test_type == test_type for artifact in artifacts):
+            st.warning(f"No {label} tests were generated.")
+    
+    st.caption(f"{len(artifacts)} test files, laid out like the source tree")
+    query = st.text_input("Filter test files") if len(artifacts) > MAX_LISTED_TESTS else ""
+    listed = [artifact.name for artifact in artifacts if query in artifact.name][:MAX_LISTED_TESTS]
+    name = st.selectbox("Test file", listed)
+    if name:
+        st.code(read_artifact(path, name))
+    
+    def read_archive():
+        with open(path, 'rb') as archive:
+            return archive.read()
+    
+    st.download_button(
+        label="Download Tests (.zip)",
+        data=read_archive,
+        file_name="generated_tests.zip",
+        mime="application/zip"
+    )
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_job_progress(job_id, show_coverage_quality, show_functional_coverage):
+    """
+    Show the progress of a running analysis job, refreshed every JOB_POLL_SECONDS.
+
+    Only this fragment reruns while polling; once the job has finished the whole app
+    reruns so that main() can collect its results.
+    """
+    job = get_job_runner().get(job_id)
+    if job is None or job.is_finished:
+        st.rerun()
+    
+    snapshot = job.snapshot()
+    if snapshot['functions_total']:
+        detail = f"{snapshot['functions_done']} of {snapshot['functions_total']} functions"
+    elif snapshot['files_total']:
+        detail = f"{snapshot['files_done']} of {snapshot['files_total']} files"
+    elif snapshot['files_done']:
+        detail = f"{snapshot['files_done']} files"
+    else:
+        detail = ""
+    label = f"{snapshot['stage']}... {detail}".strip()
+    progress = job.progress()
+    st.progress(progress if progress is not None else 0.0, text=label)
+    
+    if job.cancel_requested:
+        st.caption("Cancelling...")
+    elif st.button("Cancel analysis"):
+        get_job_runner().cancel(job_id)
+        st.caption("Cancelling...")
+    
+    # Show the analysis while tests are still being generated
+    code_analysis = job.get_partial('code_analysis')
+    if code_analysis is not None:
+        display_results(code_analysis, job.get_partial('test_analysis'), None,
+                        show_coverage_quality, show_functional_coverage)
+        streamed = job.get_partial('generated_tests')
+        if streamed:
+            display_streamed_tests(code_analysis['coverage']['uncovered_functions'], streamed)
+
+def display_streamed_tests(functions, streamed):
+    """
+    Show the tests generated so far, one slot per function in the order of the uncovered functions.
+
+    streamed maps (function name, test type) to the test as received so far.
+    """
+    st.header("Generated Test Cases")
+    for function_name in functions:
+        tests = [streamed.get((function_name, test_type)) for test_type in ('unit', 'integration')]
+        if not any(tests):
+            continue
+        with st.container(border=True):
+            st.markdown(f"**{function_name}**")
+            for test in tests:
+                if test:
+                    st.code(test)
+
+def display_performance_panel():
+    """
+    Show the process-wide stage timings, LLM usage and cache hit rates, with exports.
+    """
+    st.header("Performance")
+    st.caption("Metrics cover every analysis run by this server process since it started or was last reset.")
+    display_performance(METRICS.snapshot())
+    st.download_button(
+        label="Download metrics (Prometheus)",
+        data=METRICS.to_prometheus(),
+        file_name="testcoveragemaster.prom",
+        mime="text/plain"
+    )
+    st.download_button(
+        label="Download metrics (JSON)",
+        data=METRICS.to_json(),
+        file_name="testcoveragemaster_metrics.json",
+        mime="application/json"
+    )
+    if st.button("Reset metrics"):
+        METRICS.reset()
+        st.rerun()
+
+def replace_generated_tests(generated_tests):
+    """
+    Store a new archive of generated tests in session state, deleting the one it replaces.
+    """
+    previous = st.session_state.generated_tests
+    if previous is not None and os.path.exists(previous['path']):
+        os.unlink(previous['path'])
+    st.session_state.generated_tests = generated_tests
+
 def main():
     st.set_page_config(page_title="Unit Test Analyzer", layout="wide")
 
-    # Initialize session state for storing generated tests
-    if 'unit_tests' not in st.session_state:
-        st.session_state.unit_tests = None
-    if 'functional_tests' not in st.session_state:
-        st.session_state.functional_tests = None
+    # Initialize session state for storing analysis results and generated tests, so that
+    # they survive the reruns triggered by every widget interaction
+    for key in ('analysis', 'generated_tests', 'job_id'):
+        if key not in st.session_state:
+            st.session_state[key] = None
 
     st.title("Comprehensive Unit Test Analyzer")
     st.caption(f"Version: {__version__}")
@@ -116,10 +411,13 @@ def main():
     input_type = st.sidebar.radio("Select input type", ["File Path", "File Content"])
 
     file_content = None
+    project_path = None
 
     if input_type == "File Path":
-        file_path = st.sidebar.text_input("Enter file path")
-        if file_path:
+        file_path = st.sidebar.text_input("Enter file, directory or archive (.zip/.tar.gz) path")
+        if file_path and (os.path.isdir(file_path) or is_archive(file_path)):
+            project_path = file_path
+        elif file_path:
             try:
                 with open(file_path, 'r') as file:
                     file_content = file.read()
@@ -132,75 +430,92 @@ def main():
 
     project_type = st.sidebar.selectbox("Select Project Type", ["JavaScript", "Angular", "React", "Python", "Java", ".NET"])
     use_ai = st.sidebar.checkbox("Use AI-powered test generation", value=True)
+    max_concurrency = st.sidebar.number_input("Concurrent AI requests", min_value=1, value=DEFAULT_MAX_CONCURRENCY, step=1)
+    requests_per_minute = st.sidebar.number_input("OpenAI requests per minute (0 for no limit)", min_value=0, value=0, step=1)
+    tokens_per_minute = st.sidebar.number_input("OpenAI tokens per minute (0 for no limit)", min_value=0, value=0, step=1000)
+    batch_size = st.sidebar.number_input("Functions per AI request (1 disables batching)", min_value=1, value=1, step=1)
+    stream = st.sidebar.checkbox("Stream generated tests as they arrive", value=True,
+                                 help="Applies when batching is disabled")
+    validate = st.sidebar.checkbox("Validate generated tests", value=False,
+                                   help="Compile generated tests and run the Python ones; failing tests are "
+                                        "regenerated once, then dropped. Applies when batching is disabled")
+    max_workers = st.sidebar.number_input("Analysis worker processes", min_value=1, value=os.cpu_count() or 1, step=1)
+    use_cache = st.sidebar.checkbox("Reuse cached analysis results and AI responses", value=True)
+    base_commit = None
+    coverage_report = ""
+    map_larger_than = 0
+    if project_path and os.path.isdir(project_path):
+        base_commit = st.sidebar.text_input("Git base commit for incremental analysis (optional)")
+    if project_path:
+        coverage_report = st.sidebar.text_input(
+            "Coverage report path (optional)",
+            help="lcov.info, Cobertura or JaCoCo XML, or a coverage.py .coverage file from a test run of this project"
+        )
+        map_larger_than = st.sidebar.number_input(
+            "Memory-map files larger than (MB, 0 to read every file)", min_value=0, value=0, step=1,
+            help="Larger files in a directory are scanned as bytes through a memory map instead of being read, and are "
+                 "not skipped for their size. Not used for incremental analysis"
+        )
     
     # Add checkboxes for toggling different sections
     show_coverage_quality = st.sidebar.checkbox("Show Code Coverage and Test Quality", value=False)
     show_functional_coverage = st.sidebar.checkbox("Show Functional Coverage", value=False)
+    show_performance = st.sidebar.checkbox("Show Performance panel", value=False)
     
     analyze_button = st.sidebar.button("Analyze Project")
 
-    if file_content and analyze_button:
-        with st.spinner("Analyzing project..."):
-            try:
-                # Process input
-                processed_files = process_upload(file_content)
-                
-                # Analyze code
-                code_analysis = analyze_code(processed_files, project_type)
-                
-                # Analyze existing tests
-                test_analysis = analyze_tests(processed_files, project_type)
-                
-                # Generate new tests
-                unit_tests, functional_tests = generate_tests(code_analysis, test_analysis, project_type)
-                
-                # Store generated tests in session state
-                st.session_state.unit_tests = unit_tests
-                st.session_state.functional_tests = functional_tests
-                
-                # Display results
-                display_results(code_analysis, test_analysis, project_type, show_coverage_quality, show_functional_coverage)
-                
-                # Display generated tests
-                st.header("Generated Test Cases")
-                if unit_tests:
-                    st.subheader("Unit Tests")
-                    st.code(unit_tests)
-                else:
-                    st.warning("No unit tests were generated.")
-                
-                if functional_tests:
-                    st.subheader("Functional Tests")
-                    st.code(functional_tests)
-                else:
-                    st.warning("No functional tests were generated.")
-                
-                # Add download buttons for unit tests and functional tests
-                if st.session_state.unit_tests:
-                    st.download_button(
-                        label="Download Unit Tests",
-                        data=st.session_state.unit_tests,
-                        file_name=f"generated_unit_tests.{get_file_extension(project_type)}",
-                        mime="text/plain"
-                    )
-                if st.session_state.functional_tests:
-                    st.download_button(
-                        label="Download Functional Tests",
-                        data=st.session_state.functional_tests,
-                        file_name=f"generated_functional_tests.{get_file_extension(project_type)}",
-                        mime="text/plain"
-                    )
-                
-                # Display test quality suggestions
-                st.header("Suggestions for Improving Test Quality")
-                suggestions = get_test_quality_suggestions()
-                for i, suggestion in enumerate(suggestions, 1):
-                    st.write(f"{i}. {suggestion}")
-                
-            except Exception as e:
-                st.error(f"An error occurred during the analysis: {str(e)}")
-    else:
-        st.info("Please enter a file path or paste file content and click 'Analyze Project' to begin analysis.")
+    runner = get_job_runner()
+    if (file_content or project_path) and analyze_button:
+        # Run the analysis in the background so that this session stays responsive; a
+        # new analysis replaces the one still running for this session
+        if st.session_state.job_id is not None:
+            runner.cancel(st.session_state.job_id)
+        settings = {
+            'base_commit': base_commit,
+            'use_cache': use_cache,
+            'max_workers': int(max_workers),
+            'batch_size': int(batch_size),
+            'max_concurrency': int(max_concurrency),
+            'stream': stream,
+            'validate': validate,
+            'coverage_report': coverage_report.strip() or None,
+            'mapped_file_size': int(map_larger_than) * 1024 * 1024 or None,
+            'requests_per_minute': requests_per_minute,
+            'tokens_per_minute': tokens_per_minute
+        }
+        job = runner.submit(analysis_job, file_content, project_path, project_type, settings,
+                            description=project_path or "Pasted content")
+        st.session_state.job_id = job.id
+    
+    job = runner.get(st.session_state.job_id) if st.session_state.job_id is not None else None
+    finished_job = None
+    if job is not None and job.is_finished:
+        st.session_state.job_id = None
+        if job.status == DONE:
+            # Store results and generated tests in session state
+            # Only the archive's path and listing are kept; the previous archive is removed
+            replace_generated_tests(job.result['generated_tests'])
+            st.session_state.analysis = job.result['analysis']
+        elif job.status == FAILED:
+            st.session_state.analysis = None
+            st.error(f"An error occurred during the analysis: {job.error}")
+        else:
+            st.warning("The analysis was cancelled.")
+        finished_job, job = job, None
+    elif job is None:
+        st.session_state.job_id = None
+    
+    # Results are rendered from session state, so toggling a view re-renders them without
+    # re-analyzing the project or calling the AI again
+    if job is not None:
+        display_job_progress(job.id, show_coverage_quality, show_functional_coverage)
+    elif st.session_state.analysis is not None:
+        display_analysis(st.session_state.analysis, show_coverage_quality, show_functional_coverage)
+    elif finished_job is None:
+        st.info("Please enter a file, directory or archive path or paste file content and click 'Analyze Project' to begin analysis.")
+
+    if show_performance:
+        display_performance_panel()
 
     st.sidebar.markdown("---")
     st.sidebar.info("This app analyzes JavaScript, Angular, React, Python, Java, and .NET projects for unit test coverage and quality, and generates new test cases.")
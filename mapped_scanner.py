@@ -0,0 +1,196 @@
+"""
+Bytes-level scanning of memory-mapped files.
+
+Large files are analyzed from an mmap of the file instead of a decoded str: lines are
+counted by scanning the buffer a window at a time, patterns run as compiled bytes regexes
+directly over it and only the matched names are decoded. No object is created per line,
+so a file of tens of MB costs little more than its page cache.
+
+For ASCII source the results equal those of the str scanners in scanner.py. Beyond
+ASCII, bytes patterns treat only ASCII letters as word characters and ASCII whitespace
+as blank, and names are decoded as UTF-8 with undecodable bytes replaced.
+"""
+import mmap
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+from language_registry import (
+    bounded_end, LanguagePlugin, DECLARATION_PATTERN, TEST_CALL_PATTERN, TEST_NAME_PATTERN, UI_ELEMENT_PATTERN,
+    UI_ELEMENT_END
+)
+from scanner import EVENT_HANDLER_LITERALS
+
+Buffer = Union[bytes, mmap.mmap]
+
+# Lines are counted in windows of about this many bytes, ending at a newline, so the
+# memory a line scan holds stays bounded however large the file is
+SCAN_WINDOW = 1 << 20
+
+# Bytes that str.strip() removes from an ASCII line (str.isspace() is true for \x1c-\x1f)
+ASCII_WHITESPACE = rb' \t\r\x0b\x0c\x1c-\x1f'
+
+@lru_cache(maxsize=None)
+def to_bytes_pattern(pattern: Pattern[str]) -> Pattern[bytes]:
+    """
+    Compile the bytes equivalent of an ASCII-only str pattern, once per pattern.
+    """
+    return re.compile(pattern.pattern.encode('ascii'), pattern.flags & ~re.UNICODE)
+
+DECLARATION_BYTES = to_bytes_pattern(DECLARATION_PATTERN)
+TEST_CALL_BYTES = to_bytes_pattern(TEST_CALL_PATTERN)
+TEST_NAME_BYTES = to_bytes_pattern(TEST_NAME_PATTERN)
+UI_ELEMENT_BYTES = to_bytes_pattern(UI_ELEMENT_PATTERN)
+UI_ELEMENT_END_BYTES = to_bytes_pattern(UI_ELEMENT_END)
+
+@contextmanager
+def open_mapped(path: str) -> Iterator[Buffer]:
+    """
+    Map a file read-only for the duration of the block; empty files yield b''.
+    """
+    with open(path, 'rb') as handle:
+        try:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+def _covered_line_pattern(comment_prefix: bytes) -> Pattern[bytes]:
+    # Zero-width match at the start of every line whose first non-blank byte does not start
+    # a comment; findall then returns the shared empty bytes object once per such line
+    return re.compile(
+        rb'^(?=[' + ASCII_WHITESPACE + rb']*(?!' + re.escape(comment_prefix) + rb')[^\n' + ASCII_WHITESPACE + rb'])',
+        re.MULTILINE
+    )
+
+COVERED_LINE_PATTERNS = {prefix: _covered_line_pattern(prefix) for prefix in (b'//', b'#')}
+
+def iter_windows(buffer: Buffer, window: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield consecutive slices of the buffer of about window bytes (SCAN_WINDOW by default),
+    each ending after a newline.
+
+    Only the last slice may end without one. Line-oriented scans over the slices see every
+    line whole, and at most one slice is held at a time.
+    """
+    window = window or SCAN_WINDOW
+    size = len(buffer)
+    start = 0
+    while start < size:
+        end = buffer.find(b'\n', min(start + window, size) - 1)
+        end = size if end == -1 else end + 1
+        yield buffer[start:end]
+        start = end
+
+def count_code_lines_buffer(buffer: Buffer, comment_prefix: str) -> Tuple[int, int]:
+    """
+    Return the total number of lines and the number of non-blank, non-comment lines.
+
+    Same counts as scanner.count_code_lines on the decoded content: every newline starts
+    a line, and an empty buffer is one empty line.
+    """
+    total_lines, covered_lines, _ = scan_lines_buffer(buffer, comment_prefix, ())
+    return total_lines, covered_lines
+
+def scan_lines_buffer(buffer: Buffer, comment_prefix: str, literals: Iterable[str]) -> Tuple[int, int, int]:
+    """
+    Count lines, non-blank non-comment lines and occurrences of the literals in one pass.
+
+    Literals must not contain a newline, so that none spans two windows.
+    """
+    prefix = comment_prefix.encode('ascii')
+    pattern = COVERED_LINE_PATTERNS.get(prefix) or _covered_line_pattern(prefix)
+    encoded = [literal.encode('utf-8') for literal in literals]
+    total_lines = 1
+    covered_lines = 0
+    occurrences = 0
+    for chunk in iter_windows(buffer):
+        total_lines += chunk.count(b'\n')
+        covered_lines += len(pattern.findall(chunk))
+        occurrences += sum(chunk.count(literal) for literal in encoded)
+    return total_lines, covered_lines, occurrences
+
+def count_literals_buffer(buffer: Buffer, literals: Iterable[str]) -> int:
+    """
+    Sum the occurrences of each literal, as scanner.count_literals does on the decoded content.
+
+    Literals must not contain a newline.
+    """
+    encoded = [literal.encode('utf-8') for literal in literals]
+    return sum(chunk.count(literal) for chunk in iter_windows(buffer) for literal in encoded)
+
+def count_markers_buffer(buffer: Buffer, markers: Dict[str, Tuple[str, ...]]) -> Dict[str, int]:
+    """
+    Buffer counterpart of scanner.count_markers, counting every distinct literal in one pass.
+    """
+    literals = list(dict.fromkeys(literal for values in markers.values() for literal in values))
+    encoded = [literal.encode('utf-8') for literal in literals]
+    counts = dict.fromkeys(literals, 0)
+    for chunk in iter_windows(buffer):
+        for literal, pattern in zip(literals, encoded):
+            counts[literal] += chunk.count(pattern)
+    return {key: sum(counts[literal] for literal in values) for key, values in markers.items()}
+
+def count_matches(pattern: Pattern[bytes], buffer: Buffer, bound: Optional[Pattern[bytes]] = None) -> int:
+    """
+    Count the matches of a pattern without building a list of them.
+
+    With a bound, the search stops at the end of its last match, as in
+    language_registry.findall_bounded.
+    """
+    end = len(buffer) if bound is None else bounded_end(bound, buffer)
+    return sum(1 for _ in pattern.finditer(buffer, 0, end))
+
+def find_names(pattern: Pattern[bytes], buffer: Buffer, group: int = 1) -> List[str]:
+    """
+    Return the given group of every match, decoded; only the matched names are copied.
+    """
+    return [match.group(group).decode('utf-8', errors='replace') for match in pattern.finditer(buffer)]
+
+def find_functions_buffer(plugin: LanguagePlugin, buffer: Buffer) -> List[str]:
+    """
+    Buffer counterpart of LanguagePlugin.find_functions.
+    """
+    names = []
+    for pattern in plugin.function_patterns:
+        names += find_names(to_bytes_pattern(pattern), buffer)
+    return names
+
+def find_tested_functions_buffer(plugin: LanguagePlugin, buffer: Buffer) -> List[str]:
+    """
+    Buffer counterpart of LanguagePlugin.find_tested_functions.
+    """
+    bound = plugin.tested_bound
+    end = len(buffer) if bound is None else bounded_end(to_bytes_pattern(bound), buffer)
+    pattern = to_bytes_pattern(plugin.tested_pattern)
+    return [match.group(1).decode('utf-8', errors='replace') for match in pattern.finditer(buffer, 0, end)]
+
+def count_ui_elements_buffer(buffer: Buffer) -> int:
+    """
+    Buffer counterpart of code_analyzer.count_ui_elements.
+    """
+    return count_matches(UI_ELEMENT_BYTES, buffer, UI_ELEMENT_END_BYTES)
+
+def scan_script_buffer(buffer: Buffer) -> Dict:
+    """
+    Buffer counterpart of scanner.scan_script.
+    """
+    total_lines, covered_lines, event_handlers = scan_lines_buffer(buffer, '//', EVENT_HANDLER_LITERALS)
+    return {
+        'total_lines': total_lines,
+        'covered_lines': covered_lines,
+        'declarations': find_names(DECLARATION_BYTES, buffer),
+        'test_calls': count_matches(TEST_CALL_BYTES, buffer),
+        'event_handlers': event_handlers
+    }
+
+def find_test_names(buffer: Buffer) -> List[str]:
+    """
+    Return the test identifiers (code_analyzer.TEST_NAME_PATTERN) found in the buffer.
+    """
+    return find_names(TEST_NAME_BYTES, buffer, 0)
@@ -0,0 +1,283 @@
+"""
+Process-wide performance metrics.
+
+Hot paths record into the shared METRICS registry:
+
+    with METRICS.stage('analyze_code') as stage:
+        stage.add_bytes(len(content))
+
+Each stage accumulates wall time, calls, bytes processed and a latency histogram; LLM
+requests add token counts and their own latency histogram, and caches add hits and
+misses. snapshot() returns everything as a dictionary, and to_json() / to_prometheus()
+render it for export (the Prometheus text format suits node_exporter's textfile
+collector). Worker processes keep their own registry, so work done in parallel_analyzer
+workers only shows up in the stages timed by the parent.
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; a final +Inf bucket is implied
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_PREFIX = 'testcoveragemaster'
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram, as exported by Prometheus.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Return (upper bound, observations at or below it) pairs, ending with +Inf.
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Return the upper bound of the bucket holding the q-th quantile.
+
+        Returns None if nothing was observed or the quantile lies beyond the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict(self.cumulative()),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95)
+        }
+
+class Stage:
+    """
+    Handle for one timed call of a stage; see MetricsRegistry.stage.
+    """
+    __slots__ = ('registry', 'name', 'bytes', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, nbytes: int = 0):
+        self.registry = registry
+        self.name = name
+        self.bytes = nbytes
+        self.start = 0.0
+
+    def add_bytes(self, nbytes: int) -> None:
+        self.bytes += nbytes
+
+    def track(self, files: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Yield files unchanged, adding the size of each file's content as it is consumed.
+
+        Memory-mapped records (see utils.iter_project_files) count their 'size'.
+        """
+        for file in files:
+            self.bytes += len(file['content']) if 'content' in file else file['size']
+            yield file
+
+    def __enter__(self) -> 'Stage':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.registry.record_stage(self.name, time.perf_counter() - self.start, self.bytes, exc_type is not None)
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of stage timings, LLM usage and cache hit counters.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._stages: Dict[str, Dict] = {}
+            self._llm = {'requests': 0, 'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+            self._llm_latency = Histogram(self.buckets)
+            self._caches: Dict[str, Dict[str, int]] = {}
+
+    def stage(self, name: str, nbytes: int = 0) -> Stage:
+        """
+        Return a context manager timing one call of the named stage.
+
+        Bytes processed can be passed up front or added while the stage runs; sizes of
+        str content are counted in characters, which equals bytes for ASCII source.
+        """
+        return Stage(self, name, nbytes)
+
+    def record_stage(self, name: str, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {
+                    'calls': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0, 'latency': Histogram(self.buckets)
+                }
+            stage['calls'] += 1
+            stage['errors'] += error
+            stage['seconds'] += seconds
+            stage['bytes'] += nbytes
+            stage['latency'].observe(seconds)
+
+    def record_llm(self, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                   error: bool = False) -> None:
+        """
+        Record one LLM request: its latency, token usage and whether it failed.
+        """
+        with self._lock:
+            self._llm['requests'] += 1
+            self._llm['errors'] += error
+            self._llm['prompt_tokens'] += prompt_tokens
+            self._llm['completion_tokens'] += completion_tokens
+            self._llm_latency.observe(seconds)
+
+    def record_response(self, seconds: float, response) -> None:
+        """
+        Record a successful chat completion, reading token usage from the response when present.
+        """
+        usage = getattr(response, 'usage', None)
+        self.record_llm(seconds, getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                cache = self._caches[name] = {'hits': 0, 'misses': 0}
+            cache['hits' if hit else 'misses'] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Return all metrics as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    'calls': stage['calls'],
+                    'errors': stage['errors'],
+                    'seconds': stage['seconds'],
+                    'bytes': stage['bytes'],
+                    'mb_per_second': stage['bytes'] / 1e6 / stage['seconds'] if stage['seconds'] else None,
+                    'latency': stage['latency'].to_dict()
+                }
+                for name, stage in self._stages.items()
+            }
+            llm = dict(self._llm, latency=self._llm_latency.to_dict())
+            caches = {
+                name: dict(cache, hit_rate=cache['hits'] / (cache['hits'] + cache['misses']))
+                for name, cache in self._caches.items() if cache['hits'] + cache['misses']
+            }
+            return {'started': self.started, 'uptime_seconds': time.time() - self.started,
+                    'stages': stages, 'llm': llm, 'caches': caches}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True) + "\n"
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]):
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{full_name}{format_labels(labels)} {value!r}")
+
+        def histogram(name: str, help_text: str, series: List[Tuple[Dict[str, str], Dict]]):
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, data in series:
+                for bound, count in data['buckets'].items():
+                    lines.append(f"{full_name}_bucket{format_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{full_name}_sum{format_labels(labels)} {data['sum']!r}")
+                lines.append(f"{full_name}_count{format_labels(labels)} {data['count']}")
+
+        stages = sorted(snapshot['stages'].items())
+        metric('stage_calls_total', 'counter', "Calls of each instrumented stage.",
+               [({'stage': name}, stage['calls']) for name, stage in stages])
+        metric('stage_errors_total', 'counter', "Calls of each stage that raised.",
+               [({'stage': name}, stage['errors']) for name, stage in stages])
+        metric('stage_seconds_total', 'counter', "Wall time spent in each stage.",
+               [({'stage': name}, stage['seconds']) for name, stage in stages])
+        metric('stage_bytes_total', 'counter', "Input processed by each stage.",
+               [({'stage': name}, stage['bytes']) for name, stage in stages])
+        histogram('stage_duration_seconds', "Duration of each stage call.",
+                  [({'stage': name}, stage['latency']) for name, stage in stages])
+
+        llm = snapshot['llm']
+        metric('llm_requests_total', 'counter', "LLM requests sent.", [({}, llm['requests'])])
+        metric('llm_errors_total', 'counter', "LLM requests that failed.", [({}, llm['errors'])])
+        metric('llm_tokens_total', 'counter', "LLM tokens used.",
+               [({'kind': 'prompt'}, llm['prompt_tokens']), ({'kind': 'completion'}, llm['completion_tokens'])])
+        histogram('llm_request_duration_seconds', "Latency of LLM requests.", [({}, llm['latency'])])
+
+        caches = sorted(snapshot['caches'].items())
+        metric('cache_requests_total', 'counter', "Cache lookups by result.",
+               [({'cache': name, 'result': result}, cache[key]) for name, cache in caches
+                for result, key in (('hit', 'hits'), ('miss', 'misses'))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Write the metrics to path atomically: Prometheus text for .prom files, JSON otherwise.
+        """
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as output:
+                output.write(content)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """
+    Render a Prometheus label set, escaping backslashes, quotes and newlines in values.
+    """
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+# The registry every instrumented module records into
+METRICS = MetricsRegistry()
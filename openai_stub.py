@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+class StubChatCompletionsServer:
+    """
+    Local HTTP server that mimics the OpenAI chat completions endpoint for tests.
+
+    Use as a context manager and point a client at base_url. Every request body is
+    recorded in requests, and max_in_flight tracks the highest number of concurrent
+    requests seen. Requests with "stream": true are answered with server-sent events,
+    the reply split into chunks of chunk_size characters sent chunk_delay seconds apart.
+    """
+
+    def __init__(self, reply: Optional[Callable[[Dict], str]] = None, delay: float = 0.0,
+                 chunk_size: int = 8, chunk_delay: float = 0.0):
+        self.reply = reply or (lambda body: f"generated test #{len(self.requests)}")
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests: List[Dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, handler: BaseHTTPRequestHandler, body: Dict) -> None:
+        """
+        Answer one chat completions request; subclasses can override this to inject errors.
+        """
+        if self.delay:
+            time.sleep(self.delay)
+        content = self.reply(body)
+        if body.get('stream'):
+            self.send_stream(handler, body, content)
+            return
+        self.send_json(handler, 200, {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 10, 'total_tokens': 20}
+        })
+
+    def send_stream(self, handler: BaseHTTPRequestHandler, body: Dict, content: str) -> None:
+        """
+        Send content as a stream of chat.completion.chunk events, ending with [DONE].
+        """
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+
+        def event(choices: List[Dict], **fields) -> None:
+            chunk = dict({
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': choices
+            }, **fields)
+            handler.wfile.write(b'data: ' + json.dumps(chunk).encode('utf-8') + b'\n\n')
+            handler.wfile.flush()
+
+        pieces = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        for index, piece in enumerate(pieces):
+            if index and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            delta = {'role': 'assistant', 'content': piece} if index == 0 else {'content': piece}
+            event([{'index': 0, 'delta': delta, 'finish_reason': None}])
+        event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if (body.get('stream_options') or {}).get('include_usage'):
+            event([], usage={'prompt_tokens': 10, 'completion_tokens': len(pieces), 'total_tokens': 10 + len(pieces)})
+        handler.wfile.write(b'data: [DONE]\n\n')
+        handler.wfile.flush()
+
+    @staticmethod
+    def send_json(handler: BaseHTTPRequestHandler, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                with stub._lock:
+                    stub.requests.append(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    stub.handle(self, body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
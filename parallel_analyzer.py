@@ -0,0 +1,136 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from analysis_cache import AnalysisCache
+from code_analyzer import analyze_file_partial, apply_coverage_report, partial_kind, reduce_partials
+from coverage_reports import CoverageReport
+from metrics import METRICS
+
+# Number of files sent to a worker process per work unit
+DEFAULT_CHUNK_SIZE = 64
+
+# Work units kept in flight per worker, bounding memory when files are streamed
+MAX_PENDING_PER_WORKER = 2
+
+def analyze_code_parallel(files: Iterable[Dict], project_type: str, max_workers: Optional[int] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, cache: Optional[AnalysisCache] = None,
+                          report: Optional[CoverageReport] = None) -> Dict:
+    """
+    Analyze code files across a pool of worker processes and return code coverage information.
+
+    Produces the same result as analyze_code. Files may be any iterable (such as
+    utils.iter_project_files) and are consumed in chunks, so only a bounded number of
+    chunks is held in memory at once. When an AnalysisCache is given, cached files are
+    resolved in this process and only the remaining files are sent to workers. A
+    CoverageReport is applied in this process as the partials come back.
+
+    Metrics are recorded for the run as a whole; per-file stages timed inside worker
+    processes stay in those processes.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with METRICS.stage('analyze_code') as stage:
+        names = deque()
+        chunks = _remember_names(_iter_chunks(stage.track(files), chunk_size), names)
+
+        if max_workers == 1:
+            partials = _map_in_process(chunks, project_type, cache)
+            return reduce_partials(_apply_report(partials, names, report), project_type)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            partials = _map_bounded(executor, chunks, project_type, max_workers * MAX_PENDING_PER_WORKER, cache)
+            return reduce_partials(_apply_report(partials, names, report), project_type)
+
+def analyze_chunk(chunk: List[Dict], project_type: str) -> List[Dict]:
+    """
+    Analyze one work unit of files and return their partial results in order.
+    """
+    return [analyze_file_partial(file, project_type) for file in chunk]
+
+def _iter_chunks(files: Iterable[Dict], chunk_size: int) -> Iterator[List[Dict]]:
+    """
+    Split an iterable of files into lists of at most chunk_size files.
+    """
+    iterator = iter(files)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _remember_names(chunks: Iterable[List[Dict]], names: deque) -> Iterator[List[Dict]]:
+    """
+    Pass chunks through, queueing the name of every file in them.
+    """
+    for chunk in chunks:
+        names.extend(file['name'] for file in chunk)
+        yield chunk
+
+def _apply_report(partials: Iterable[Dict], names: deque,
+                  report: Optional[CoverageReport]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Pair each partial with its file name and apply the report to it; partials come back in
+    the order their names were queued.
+    """
+    for partial in partials:
+        name = names.popleft()
+        yield name, apply_coverage_report(partial, name, report)
+
+def _lookup_chunk(chunk: List[Dict], project_type: str, cache: Optional[AnalysisCache]) -> List[Optional[Dict]]:
+    """
+    Return the cached partial for each file in a chunk, or None where it is not cached.
+
+    Memory-mapped records are never cached; workers map those files themselves.
+    """
+    if cache is None:
+        return [None] * len(chunk)
+    return [cache.get(partial_kind(file['name'], project_type), file['content'], project_type)
+            if 'content' in file else None for file in chunk]
+
+def _store_misses(chunk: List[Dict], partials: List[Optional[Dict]], computed: List[Dict], project_type: str,
+                  cache: Optional[AnalysisCache]) -> List[Dict]:
+    """
+    Fill the uncached slots of a chunk with freshly computed partials, caching them.
+    """
+    results = iter(computed)
+    for index, partial in enumerate(partials):
+        if partial is None:
+            file = chunk[index]
+            partials[index] = next(results)
+            if cache is not None and 'content' in file:
+                cache.put(partial_kind(file['name'], project_type), file['content'], project_type, partials[index])
+    return partials
+
+def _map_in_process(chunks: Iterable[List[Dict]], project_type: str,
+                    cache: Optional[AnalysisCache]) -> Iterator[Dict]:
+    """
+    Analyze chunks in this process, yielding partials in order.
+    """
+    for chunk in chunks:
+        partials = _lookup_chunk(chunk, project_type, cache)
+        misses = [file for file, partial in zip(chunk, partials) if partial is None]
+        yield from _store_misses(chunk, partials, analyze_chunk(misses, project_type), project_type, cache)
+
+def _map_bounded(executor: ProcessPoolExecutor, chunks: Iterable[List[Dict]], project_type: str,
+                 max_pending: int, cache: Optional[AnalysisCache]) -> Iterator[Dict]:
+    """
+    Submit uncached files chunk by chunk with at most max_pending chunks in flight,
+    yielding partials in the original file order.
+    """
+    pending: deque = deque()
+
+    def drain_one():
+        chunk, partials, future = pending.popleft()
+        computed = future.result() if future is not None else []
+        return _store_misses(chunk, partials, computed, project_type, cache)
+
+    for chunk in chunks:
+        partials = _lookup_chunk(chunk, project_type, cache)
+        misses = [file for file, partial in zip(chunk, partials) if partial is None]
+        future: Optional[Future] = executor.submit(analyze_chunk, misses, project_type) if misses else None
+        pending.append((chunk, partials, future))
+        if len(pending) >= max_pending:
+            yield from drain_one()
+    while pending:
+        yield from drain_one()
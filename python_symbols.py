@@ -0,0 +1,148 @@
+import ast
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from analysis_cache import AnalysisCache
+from metrics import METRICS
+
+# Parsed files kept in memory so that every analyzer of a run shares one parse per file
+SYMBOL_TABLE_MEMO_SIZE = 256
+
+# What ast.parse raises for content that is not Python 3 (null bytes raise ValueError before 3.12)
+PARSE_ERRORS = (SyntaxError, ValueError)
+
+# Nodes that can contain function definitions; expressions never do, so they are skipped
+STATEMENT_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+class PythonSymbol(NamedTuple):
+    """
+    A function or method defined in a Python file.
+
+    kind is one of 'function', 'async_function', 'method' and 'async_method'; qualname
+    follows __qualname__ (Outer.method, outer.<locals>.inner) and the line span covers the
+    def statement without its decorators.
+    """
+    name: str
+    qualname: str
+    kind: str
+    lineno: int
+    end_lineno: int
+    decorators: Tuple[str, ...]
+
+    @property
+    def is_async(self) -> bool:
+        return self.kind.startswith('async_')
+
+class PythonSymbolTable(NamedTuple):
+    """
+    The symbols of one Python file, in the breadth-first order of ast.walk.
+    """
+    symbols: Tuple[PythonSymbol, ...]
+
+    def function_names(self) -> List[str]:
+        """
+        Return the names of the (non-async) def statements, functions and methods alike.
+        """
+        return [symbol.name for symbol in self.symbols if not symbol.is_async]
+
+    def by_name(self) -> Dict[str, PythonSymbol]:
+        """
+        Map each name to the first symbol defining it.
+        """
+        symbols = {}
+        for symbol in self.symbols:
+            symbols.setdefault(symbol.name, symbol)
+        return symbols
+
+    def to_record(self) -> Tuple[Tuple, ...]:
+        """
+        Return the table as plain nested tuples, the compact form stored in the cache.
+        """
+        return tuple(tuple(symbol) for symbol in self.symbols)
+
+    @classmethod
+    def from_record(cls, record: Tuple[Tuple, ...]) -> 'PythonSymbolTable':
+        return cls(tuple(PythonSymbol(*fields) for fields in record))
+
+def build_symbol_table(content: str) -> PythonSymbolTable:
+    """
+    Parse a Python file once and collect its functions and methods.
+
+    Raises one of PARSE_ERRORS if the content does not parse.
+    """
+    with METRICS.stage('parse_python', len(content)):
+        tree = ast.parse(content)
+        symbols = []
+        todo = deque([(tree, '', False)])
+        while todo:
+            node, prefix, in_class = todo.popleft()
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                qualname = prefix + node.name
+                kind = 'method' if in_class else 'function'
+                if isinstance(node, ast.AsyncFunctionDef):
+                    kind = 'async_' + kind
+                symbols.append(PythonSymbol(
+                    node.name, qualname, kind, node.lineno, node.end_lineno or node.lineno,
+                    tuple(decorator_name(decorator) for decorator in node.decorator_list)
+                ))
+                prefix, in_class = qualname + '.<locals>.', False
+            elif isinstance(node, ast.ClassDef):
+                prefix, in_class = prefix + node.name + '.', True
+            todo.extend(
+                (child, prefix, in_class) for child in ast.iter_child_nodes(node) if isinstance(child, STATEMENT_NODES)
+            )
+        return PythonSymbolTable(tuple(symbols))
+
+_memo: 'OrderedDict[str, PythonSymbolTable]' = OrderedDict()
+_memo_lock = threading.Lock()
+
+def _remember(content: str, table: PythonSymbolTable) -> PythonSymbolTable:
+    with _memo_lock:
+        _memo[content] = table
+        _memo.move_to_end(content)
+        while len(_memo) > SYMBOL_TABLE_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return table
+
+def clear_memo() -> None:
+    """
+    Forget the symbol tables kept in memory.
+    """
+    with _memo_lock:
+        _memo.clear()
+
+def get_symbol_table(content: str, cache: Optional[AnalysisCache] = None) -> PythonSymbolTable:
+    """
+    Return the symbol table of a Python file, parsing it at most once per process.
+
+    Recently used tables are kept in memory, so the code and test analyzers share one
+    parse per file. When an AnalysisCache is given the compact record is also looked up
+    and stored there, so unchanged files are not parsed again on later runs.
+    """
+    with _memo_lock:
+        table = _memo.get(content)
+        if table is not None:
+            _memo.move_to_end(content)
+    METRICS.record_cache('python_symbols_memo', table is not None)
+    if table is not None:
+        return table
+    if cache is not None:
+        record = cache.get('python_symbols', content, 'Python')
+        if record is not None:
+            return _remember(content, PythonSymbolTable.from_record(record))
+    table = build_symbol_table(content)
+    if cache is not None:
+        cache.put('python_symbols', content, 'Python', table.to_record())
+    return _remember(content, table)
+
+def decorator_name(node: ast.expr) -> str:
+    """
+    Return the dotted name of a decorator, without the arguments of a decorator call.
+    """
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{decorator_name(node.value)}.{node.attr}"
+    return ast.unparse(node)
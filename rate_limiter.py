@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Seconds of quota a bucket may hand out at once; a short burst keeps requests evenly
+# spread, since providers enforce per-minute limits over shorter windows
+DEFAULT_BURST_SECONDS = 1.0
+
+# Defaults for the retry scheduler
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity tokens.
+
+    A request larger than the capacity is let through once the bucket is full and leaves
+    it in debt, so oversized requests are delayed rather than blocked forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate * DEFAULT_BURST_SECONDS)
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Return the seconds until amount tokens can be taken (0 if they are available now).
+        """
+        self.refill()
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        self.refill()
+        self.level -= amount
+
+class RateLimiter:
+    """
+    Client-side limiter for requests per minute and tokens per minute.
+
+    Either limit may be None to leave it unbounded. Callers acquire the estimated token
+    cost of a request before sending it; waiters are served first come, first served.
+    pause() stops all callers for a while, which is how a 429 from one request slows down
+    every request sharing the quota.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, capacity=tokens_per_minute / 60.0 * DEFAULT_BURST_SECONDS,
+                                  clock=clock) if tokens_per_minute else None
+        self._clock = clock
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every caller for at least the given number of seconds from now.
+        """
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def wait_time(self, tokens: float) -> float:
+        """
+        Return the seconds until a request costing tokens may be sent.
+        """
+        wait = self._paused_until - self._clock()
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return max(0.0, wait)
+
+    async def acquire(self, tokens: float = 0) -> None:
+        """
+        Wait until a request costing tokens fits within both limits, then account for it.
+        """
+        async with self._lock:
+            wait = self.wait_time(tokens)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.wait_time(tokens)
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(tokens)
+
+class RetryPolicy:
+    """
+    Exponential backoff for rate limited and transient API errors.
+
+    The delay before retry n (counting from 0) is base_delay * 2**n with up to jitter of
+    random extra, capped at max_delay, unless the response carries a Retry-After header,
+    which is honored as given.
+    """
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, jitter: float = 0.1):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        # Errors only come from an SDK that is already loaded; importing it here keeps
+        # this module cheap to import
+        import openai
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+        return False
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        Return the seconds to wait before retrying after the given failed attempt.
+        """
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return backoff * (1 + random.uniform(0, self.jitter))
+
+def retry_after_seconds(error: Optional[BaseException]) -> Optional[float]:
+    """
+    Read the delay requested by a Retry-After (or retry-after-ms) response header.
+    """
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return max(0.0, float(headers['retry-after-ms']) / 1000)
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+async def call_with_retries(make_request: Callable[[], Awaitable[T]], limiter: Optional[RateLimiter] = None,
+                            policy: Optional[RetryPolicy] = None, tokens: float = 0) -> T:
+    """
+    Send a request through the rate limiter, retrying retryable errors with backoff.
+
+    make_request is called for every attempt. A retryable failure pauses the limiter for
+    the backoff delay, so concurrent callers back off together instead of each tripping
+    the quota again; the last error is raised once the retries are used up.
+    """
+    policy = policy or RetryPolicy()
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        try:
+            return await make_request()
+        except Exception as e:
+            if attempt >= policy.max_retries or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            attempt += 1
+            if limiter is not None:
+                limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+from analysis_cache import DiskLRUCache, DEFAULT_CACHE_DIR
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class ResponseCache(DiskLRUCache):
+    """
+    Persistent cache of model responses for generated test cases.
+
+    Entries are keyed by a hash of the fully rendered chat messages plus the parameters
+    that affect the output (model, temperature, max_tokens), expire after ttl_seconds and
+    are evicted least recently used first once the cache exceeds max_bytes.
+    """
+
+    metrics_name = 'responses'
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS):
+        super().__init__(path or os.path.join(DEFAULT_CACHE_DIR, 'responses.sqlite'), max_bytes, ttl_seconds)
+
+    @staticmethod
+    def make_key(messages: List[Dict], model: str, temperature: float, max_tokens: int) -> str:
+        """
+        Build the cache key for a chat completion request.
+        """
+        request = json.dumps(
+            {'messages': messages, 'model': model, 'temperature': temperature, 'max_tokens': max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def get_response(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> Optional[str]:
+        """
+        Return the cached response content for a request, or None on a miss.
+        """
+        return self.get_key(self.make_key(messages, model, temperature, max_tokens))
+
+    def put_response(self, messages: List[Dict], model: str, temperature: float, max_tokens: int,
+                     content: str) -> None:
+        """
+        Store the response content for a request.
+        """
+        self.put_key(self.make_key(messages, model, temperature, max_tokens), content)
@@ -0,0 +1,309 @@
+"""
+Runtime line coverage for Python projects, measured by running their test suite.
+
+    report = collect_runtime_coverage("path/to/project", "pytest -q")
+    analyze_code(files, "Python", report=report)
+
+The command runs in a subprocess with this module as its entry point, which records the
+lines executed by code under the project directory and the functions that were entered.
+On Python 3.12 and later it listens to sys.monitoring LINE and PY_START events and
+disables each location after its first event, so code that has already been seen runs
+at full speed and the cost grows with the amount of code, not with how often it runs.
+On Python 3.11 it falls back to sys.settrace: frames of files outside the project are
+never traced, and a code object is no longer traced once all of its lines have run.
+
+The parent compiles each measured file to find the lines it can execute, so the result
+is an ordinary CoverageReport with executable lines and function hits.
+"""
+import argparse
+import functools
+import inspect
+import json
+import os
+import runpy
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+from types import CodeType, FrameType
+from typing import Callable, Dict, Iterator, List, Optional, Set
+from coverage_reports import line_bitmap, CoverageReport, FileCoverage
+
+# Registered in the sys.monitoring COVERAGE_ID slot on 3.12+
+MONITORING_TOOL_NAME = "testcoveragemaster"
+
+# Directories under the project that hold installed packages rather than its own code
+EXCLUDED_DIRECTORIES = ('site-packages', 'dist-packages', '.venv', 'venv', '.tox', '.nox', 'node_modules')
+
+class RuntimeCollectorError(RuntimeError):
+    """
+    Raised when the test command fails without running any project code.
+    """
+
+def collect_runtime_coverage(root: str, command: str, timeout: Optional[float] = None) -> CoverageReport:
+    """
+    Run a Python test command in root and return the line coverage it produced.
+
+    command is a Python command line with or without the interpreter, e.g. "pytest -q",
+    "-m unittest discover" or "tests/run_all.py --fast". Its exit status is ignored, as
+    failing tests still measure coverage; RuntimeCollectorError is raised if it fails
+    without running any project code, and subprocess.TimeoutExpired after timeout seconds.
+    """
+    root = os.path.abspath(root)
+    handle, output = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--root', root, '--output', output, '--']
+            + parse_test_command(command),
+            cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout
+        )
+        with open(output, encoding='utf-8') as data:
+            measured = json.load(data) if os.path.getsize(output) else None
+    finally:
+        os.unlink(output)
+    if not (measured and (measured['lines'] or completed.returncode == 0)):
+        stderr = completed.stderr.decode('utf-8', errors='replace').strip().splitlines()
+        raise RuntimeCollectorError(
+            f"Test command '{command}' exited with status {completed.returncode} without coverage data"
+            + (f": {stderr[-1]}" if stderr else "")
+        )
+
+    report = CoverageReport('runtime')
+    for path, lines in measured['lines'].items():
+        report.add(measured_file(path, root, lines, measured['functions'].get(path, [])))
+    return report
+
+def parse_test_command(command: str) -> List[str]:
+    """
+    Split a test command into ['-m', module, *args] or [script, *args].
+
+    A leading python/python3 is dropped, and a first word that is not a script names a
+    module, so "pytest -q" runs like "python -m pytest -q".
+    """
+    words = shlex.split(command)
+    if words and os.path.basename(words[0]).startswith('python'):
+        words = words[1:]
+    if not words or words == ['-m']:
+        raise ValueError(f"No test command to run in '{command}'")
+    if words[0] == '-m' or words[0].endswith('.py'):
+        return words
+    return ['-m'] + words
+
+def measured_file(path: str, root: str, lines: List[int], entered: List[str]) -> FileCoverage:
+    """
+    Build the coverage of one file from the lines and functions recorded while it ran.
+
+    The executable lines are those of the file's compiled code objects, and every function
+    defined in it is reported with 1 hit if it was entered and 0 otherwise. A file that no
+    longer compiles is reported without executable lines.
+    """
+    executable = None
+    functions = {}
+    try:
+        with open(path, 'rb') as source:
+            module = compile(source.read(), path, 'exec', dont_inherit=True)
+    except (OSError, SyntaxError, ValueError):
+        pass
+    else:
+        executable_lines = set()
+        for code in iter_code_objects(module):
+            executable_lines.update(code_lines(code))
+            if not code.co_name.startswith('<'):
+                functions.setdefault(code.co_name, 0)
+        executable = line_bitmap(executable_lines | set(lines))
+    for name in entered:
+        functions[name] = 1
+    return FileCoverage(os.path.relpath(path, root), executable, line_bitmap(lines), functions)
+
+def iter_code_objects(code: CodeType) -> Iterator[CodeType]:
+    """
+    Yield a code object and, depth first, every code object nested in it.
+    """
+    yield code
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            yield from iter_code_objects(constant)
+
+def code_lines(code: CodeType) -> Set[int]:
+    """
+    Return the source lines a code object's own instructions belong to.
+    """
+    return {line for _, _, line in code.co_lines() if line}
+
+def traced_lines(code: CodeType) -> Set[int]:
+    """
+    Return the lines of a code object that sys.settrace reports 'line' events for.
+
+    A function's first line only holds its setup instructions, which never report one
+    unless the whole function is on that line.
+    """
+    lines = code_lines(code)
+    if code.co_flags & inspect.CO_OPTIMIZED and len(lines) > 1:
+        lines.discard(code.co_firstlineno)
+    return lines
+
+def is_project_file(filename: str, root: str) -> bool:
+    """
+    Return whether a code object's file is project code under root.
+    """
+    if not filename.startswith(root):
+        return False
+    parts = filename[len(root):].split(os.sep)
+    return not any(part in EXCLUDED_DIRECTORIES for part in parts)
+
+class LineCollector:
+    """
+    Records the lines executed and the functions entered in project files.
+
+    start() uses sys.monitoring where available and sys.settrace otherwise.
+    """
+    def __init__(self, root: str):
+        self.root = os.path.join(os.path.abspath(root), '')
+        self.lines: Dict[str, Set[int]] = {}
+        self.functions: Dict[str, Set[str]] = {}
+        # The local sys.settrace function of each code object seen, None once it is no
+        # longer traced (sys.settrace only)
+        self.tracers: Dict[CodeType, Optional[Callable]] = {}
+        self.project_files: Dict[str, bool] = {}
+        self.tool_id: Optional[int] = None
+
+    def start(self) -> None:
+        if hasattr(sys, 'monitoring'):
+            self.start_monitoring()
+        else:
+            threading.settrace(self.trace_call)
+            sys.settrace(self.trace_call)
+
+    def stop(self) -> None:
+        if self.tool_id is not None:
+            monitoring = sys.monitoring
+            monitoring.set_events(self.tool_id, monitoring.events.NO_EVENTS)
+            monitoring.register_callback(self.tool_id, monitoring.events.LINE, None)
+            monitoring.register_callback(self.tool_id, monitoring.events.PY_START, None)
+            monitoring.free_tool_id(self.tool_id)
+            self.tool_id = None
+        else:
+            sys.settrace(None)
+            threading.settrace(None)
+
+    def is_project_file(self, filename: str) -> bool:
+        measured = self.project_files.get(filename)
+        if measured is None:
+            measured = self.project_files[filename] = is_project_file(filename, self.root)
+        return measured
+
+    def record_function(self, code: CodeType) -> None:
+        if not code.co_name.startswith('<'):
+            self.functions.setdefault(code.co_filename, set()).add(code.co_name)
+
+    def start_monitoring(self) -> None:
+        monitoring = sys.monitoring
+        tool_id = monitoring.COVERAGE_ID
+        if monitoring.get_tool(tool_id) is not None:
+            raise RuntimeCollectorError(f"sys.monitoring coverage slot is used by {monitoring.get_tool(tool_id)}")
+        monitoring.use_tool_id(tool_id, MONITORING_TOOL_NAME)
+        self.tool_id = tool_id
+        disable = monitoring.DISABLE
+
+        def line(code: CodeType, line_number: int) -> object:
+            if self.is_project_file(code.co_filename):
+                self.lines.setdefault(code.co_filename, set()).add(line_number)
+            return disable
+
+        def start(code: CodeType, instruction_offset: int) -> object:
+            if self.is_project_file(code.co_filename):
+                self.record_function(code)
+            return disable
+
+        monitoring.register_callback(tool_id, monitoring.events.LINE, line)
+        monitoring.register_callback(tool_id, monitoring.events.PY_START, start)
+        monitoring.set_events(tool_id, monitoring.events.LINE | monitoring.events.PY_START)
+
+    def trace_call(self, frame: FrameType, event: str, arg: object) -> Optional[Callable]:
+        """
+        Global sys.settrace function: return the line tracer of a new frame's code, if any.
+        """
+        try:
+            return self.tracers[frame.f_code]
+        except KeyError:
+            code = frame.f_code
+            tracer = None
+            if self.is_project_file(code.co_filename):
+                self.record_function(code)
+                tracer = self.line_tracer(code)
+            self.tracers[code] = tracer
+            return tracer
+
+    def line_tracer(self, code: CodeType) -> Optional[Callable]:
+        """
+        Build the local sys.settrace function for a code object's frames.
+
+        It records each line once, and stops tracing the frame and leaves new frames of
+        the code untraced once all of its lines have run.
+        """
+        pending = traced_lines(code)
+        executed = self.lines.setdefault(code.co_filename, set())
+        tracers = self.tracers
+
+        def trace_line(frame: FrameType, event: str, arg: object) -> Optional[Callable]:
+            if event == 'line':
+                line_number = frame.f_lineno
+                if line_number in pending:
+                    pending.discard(line_number)
+                    executed.add(line_number)
+                    if not pending:
+                        frame.f_trace_lines = False
+                        tracers[code] = None
+            return trace_line
+
+        return trace_line if pending else None
+
+    def results(self) -> Dict:
+        return {
+            'lines': {path: sorted(lines) for path, lines in self.lines.items()},
+            'functions': {path: sorted(names) for path, names in self.functions.items()}
+        }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a test command under a LineCollector and write what it recorded as JSON.
+
+    Used as the subprocess entry point of collect_runtime_coverage; returns the exit
+    status of the test command.
+    """
+    parser = argparse.ArgumentParser(description="Run a Python command and record the project lines it executes.")
+    parser.add_argument('--root', required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('command', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+
+    # Run the command as the interpreter would: its own directory, not this module's,
+    # comes first on sys.path so that project modules are not shadowed by this package
+    if command[0] == '-m':
+        sys.argv = command[1:]
+        sys.path[0] = os.getcwd()
+        run = functools.partial(runpy.run_module, command[1], run_name='__main__', alter_sys=True)
+    else:
+        script = os.path.abspath(command[0])
+        sys.argv = [script] + command[1:]
+        sys.path[0] = os.path.dirname(script)
+        run = functools.partial(runpy.run_path, script, run_name='__main__')
+
+    collector = LineCollector(args.root)
+    status = 0
+    collector.start()
+    try:
+        run()
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        collector.stop()
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(collector.results(), output)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
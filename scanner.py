@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, Tuple
+from language_registry import LANGUAGES, DEFAULT_QUALITY_MARKERS, DECLARATION_PATTERN, TEST_CALL_PATTERN
+
+# Event handler names referenced from JavaScript/TypeScript. None of them overlaps another,
+# so summing their str.count values matches a regex alternation over all of them.
+EVENT_HANDLER_LITERALS = ('onClick', 'onSubmit', 'onChange', 'addEventListener')
+
+def count_code_lines(content: str, comment_prefix: str) -> Tuple[int, int]:
+    """
+    Return the total number of lines and the number of non-blank, non-comment lines.
+    """
+    lines = content.split('\n')
+    covered_lines = 0
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith(comment_prefix):
+            covered_lines += 1
+    return len(lines), covered_lines
+
+def count_literals(content: str, literals: Iterable[str]) -> int:
+    """
+    Sum the non-overlapping occurrences of each literal, as str.count reports them.
+    """
+    return sum(content.count(literal) for literal in literals)
+
+def count_markers(content: str, markers: Dict[str, Tuple[str, ...]]) -> Dict[str, int]:
+    """
+    Count a table of literal markers, scanning for each distinct literal only once.
+    """
+    counts = {}
+    totals = {}
+    for key, literals in markers.items():
+        total = 0
+        for literal in literals:
+            if literal not in counts:
+                counts[literal] = content.count(literal)
+            total += counts[literal]
+        totals[key] = total
+    return totals
+
+def quality_markers(project_type: str) -> Dict[str, Tuple[str, ...]]:
+    """
+    Return the test quality marker table for a project type; unregistered types use the Jest markers.
+    """
+    plugin = LANGUAGES.get(project_type)
+    return plugin.quality_markers if plugin else DEFAULT_QUALITY_MARKERS
+
+def scan_script(content: str) -> Dict:
+    """
+    Collect the counters and symbols shared by the JavaScript, Angular and React analyzers.
+
+    Each pattern runs once per file: the line counts, the function/const declarations (also
+    the denominator of unit coverage), the describe/it/test calls and the event handlers.
+    """
+    total_lines, covered_lines = count_code_lines(content, '//')
+    return {
+        'total_lines': total_lines,
+        'covered_lines': covered_lines,
+        'declarations': DECLARATION_PATTERN.findall(content),
+        'test_calls': len(TEST_CALL_PATTERN.findall(content)),
+        'event_handlers': count_literals(content, EVENT_HANDLER_LITERALS)
+    }
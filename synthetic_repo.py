@@ -0,0 +1,207 @@
+"""
+Deterministic synthetic repositories for benchmarks.
+
+    files = list(iter_synthetic_repo("Python", 1000, seed=0))
+
+Files use the {'name', 'content'} records of utils.iter_project_files, laid out as
+pkg_<n>/module_<i> sources with test files next to some of them. Every test file tests
+part of its module's functions under the name code_analyzer.expected_test_name looks
+for, so coverage results are neither empty nor complete.
+"""
+import os
+import random
+from typing import Dict, Iterator, List, Tuple
+from code_analyzer import expected_test_name
+
+# Extension of source files and suffix of test files for each project type
+SOURCE_EXTENSIONS = {
+    "JavaScript": '.js',
+    "React": '.jsx',
+    "Angular": '.ts',
+    "Python": '.py',
+    "Java": '.java',
+    ".NET": '.cs',
+}
+TEST_SUFFIXES = {
+    "JavaScript": '.test.js',
+    "React": '.test.js',
+    "Angular": '.spec.ts',
+    "Python": '_test.py',
+    "Java": 'Test.java',
+    ".NET": 'Test.cs',
+}
+
+DEFAULT_FUNCTIONS_PER_FILE = (2, 12)
+DEFAULT_TEST_FILE_RATIO = 0.25
+DEFAULT_TESTED_RATIO = 0.5
+
+# Source modules per package directory
+MODULES_PER_PACKAGE = 100
+
+def iter_synthetic_repo(project_type: str, num_files: int,
+                        functions_per_file: Tuple[int, int] = DEFAULT_FUNCTIONS_PER_FILE,
+                        test_file_ratio: float = DEFAULT_TEST_FILE_RATIO,
+                        tested_ratio: float = DEFAULT_TESTED_RATIO, seed: int = 0) -> Iterator[Dict]:
+    """
+    Lazily yield num_files synthetic files for a project type.
+
+    Each source module defines a random number of functions within functions_per_file,
+    with bodies of varying length. test_file_ratio of the files (at most half) are test
+    files, spread evenly over the modules, and each tests about tested_ratio of its
+    module's functions. The same arguments always produce the same files.
+    """
+    if project_type not in SOURCE_EXTENSIONS:
+        raise ValueError(f"Unsupported project type: {project_type}")
+    if not 0 <= test_file_ratio <= 0.5:
+        raise ValueError("test_file_ratio must be between 0 and 0.5")
+
+    rng = random.Random(seed)
+    num_tests = round(num_files * test_file_ratio)
+    num_sources = num_files - num_tests
+    for index in range(num_sources):
+        functions = [f"func_{index}_{j}" for j in range(rng.randint(*functions_per_file))]
+        directory = f"pkg_{index // MODULES_PER_PACKAGE}"
+        yield {
+            'name': f"{directory}/{module_name(index, project_type)}{SOURCE_EXTENSIONS[project_type]}",
+            'content': render_source(index, functions, project_type, rng)
+        }
+        # Spread the test files evenly: module index gets one when the running share of
+        # test files crosses a whole number
+        if (index + 1) * num_tests // num_sources > index * num_tests // num_sources:
+            tested = [name for name in functions if rng.random() < tested_ratio]
+            yield {
+                'name': f"{directory}/{module_name(index, project_type)}{TEST_SUFFIXES[project_type]}",
+                'content': render_test(index, tested, project_type)
+            }
+
+def module_name(index: int, project_type: str) -> str:
+    if project_type in ("Java", ".NET"):
+        return f"Module{index}"
+    return f"module_{index}"
+
+def write_synthetic_repo(files: Iterator[Dict], root: str) -> int:
+    """
+    Write synthetic files below root and return the number of bytes written.
+    """
+    written = 0
+    for file in files:
+        path = os.path.join(root, *file['name'].split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            written += handle.write(file['content'])
+    return written
+
+def render_source(index: int, functions: List[str], project_type: str, rng: random.Random) -> str:
+    """
+    Return the source of a module defining the given functions.
+    """
+    bodies = [(name, rng.randint(1, 8)) for name in functions]
+    if project_type == "Python":
+        parts = [f'"""Synthetic module {index}."""\nimport os\n']
+        for offset, (name, statements) in enumerate(bodies):
+            lines = [f"def {name}(value, flag=False):", f'    """Return a value derived from {offset}."""']
+            lines += [f"    # step {step}\n    value = value + {step}" for step in range(statements)]
+            lines += ["    if flag:", "        value = value * 2", "    return value"]
+            parts.append("\n".join(lines) + "\n")
+        return "\n\n".join(parts)
+
+    if project_type in ("JavaScript", "React"):
+        parts = [f"// Synthetic module {index}\nimport {{ helper }} from './helper';\n"]
+        for name, statements in bodies:
+            lines = [f"function {name}(value, flag) {{"]
+            lines += [f"  // step {step}\n  value = value + {step};" for step in range(statements)]
+            lines += ["  if (flag) {", "    value = helper(value);", "  }", "  return value;", "}"]
+            parts.append("\n".join(lines) + "\n")
+        if project_type == "React":
+            handler = functions[0] if functions else 'helper'
+            parts.append(f"const Module{index} = () => {{\n  return <button onClick={{() => {handler}(1)}}>Go</button>;\n}};\n")
+        parts.append(f"export {{ {', '.join(functions)} }};\n")
+        return "\n".join(parts)
+
+    if project_type == "Angular":
+        lines = [
+            "import { Component } from '@angular/core';\n",
+            f"@Component({{ selector: 'app-module-{index}', template: '<button (click)=\"run()\">Run</button>' }})",
+            f"export class Module{index}Component {{",
+            "  title: string;",
+        ]
+        for name, statements in bodies:
+            lines.append(f"  {name}(value: number): number {{")
+            lines += [f"    // step {step}\n    value = value + {step};" for step in range(statements)]
+            lines += ["    return value;", "  }"]
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    # Java and C# share the layout; only the package line differs
+    header = f"package pkg{index // MODULES_PER_PACKAGE};\n" if project_type == "Java" else "namespace Synthetic\n{"
+    lines = [header, f"public class Module{index} {{"]
+    for name, statements in bodies:
+        lines.append(f"    public int {name}(int value) {{")
+        lines += [f"        // step {step}\n        value = value + {step};" for step in range(statements)]
+        lines += ["        return value;", "    }"]
+    lines.append("}")
+    if project_type == ".NET":
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def render_test(index: int, functions: List[str], project_type: str) -> str:
+    """
+    Return a test file with one test per function, named as the code analyzer expects.
+    """
+    names = [(name, expected_test_name(name, project_type)) for name in functions]
+    if project_type == "Python":
+        lines = [
+            "import unittest",
+            "from unittest import mock",
+            f"from pkg_{index // MODULES_PER_PACKAGE}.module_{index} import *\n",
+            f"class TestModule{index}(unittest.TestCase):"
+        ]
+        for name, test_name in names:
+            lines += [
+                "    @mock.patch('os.getcwd')",
+                f"    def {test_name}(self, getcwd):",
+                f"        self.assertEqual({name}(1), {name}(1))",
+                f"        assert {name}(0, flag=True) >= 0\n"
+            ]
+        if not names:
+            lines.append("    pass")
+        return "\n".join(lines) + "\n"
+
+    if project_type in ("JavaScript", "React", "Angular"):
+        if project_type == "Angular":
+            lines = [f"describe('Module{index}Component', () => {{", "  const spy = jasmine.createSpy('helper');"]
+            call = "it"
+        else:
+            lines = ["jest.mock('./helper');", f"describe('module_{index}', () => {{"]
+            call = "test"
+        for name, test_name in names:
+            lines += [
+                f"  {call}('{test_name}', () => {{",
+                f"    expect({name}(1)).toBeGreaterThan(0);",
+                "  });"
+            ]
+        lines.append("});")
+        return "\n".join(lines) + "\n"
+
+    if project_type == "Java":
+        lines = ["import org.junit.Test;", "import static org.junit.Assert.*;\n", f"public class Module{index}Test {{"]
+        for name, test_name in names:
+            lines += [
+                "    @Test",
+                f"    public void {test_name}() {{",
+                f"        assertEquals(new Module{index}().{name}(1), new Module{index}().{name}(1));",
+                "    }"
+            ]
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    lines = ["using NUnit.Framework;\n", "namespace Synthetic\n{", "[TestFixture]", f"public class Module{index}Test {{"]
+    for name, test_name in names:
+        lines += [
+            "    [Test]",
+            f"    public void {test_name}() {{",
+            f"        Assert.AreEqual(new Module{index}().{name}(1), new Module{index}().{name}(1));",
+            "    }"
+        ]
+    lines += ["}", "}"]
+    return "\n".join(lines) + "\n"
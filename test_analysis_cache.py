@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from analysis_cache import AnalysisCache, fingerprint_files
+from code_analyzer import analyze_code
+from parallel_analyzer import analyze_code_parallel
+from test_analyzer import analyze_tests
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'analysis.sqlite')
+        self.files = [
+            {'name': 'app/core.py', 'content': "def alpha():\n    return 1\n\ndef beta():\n    return 2\n"},
+            {'name': 'app/core_test.py', 'content': "def test_alpha():\n    assert alpha() == 1\n"},
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put_roundtrip(self):
+        with AnalysisCache(self.path) as cache:
+            self.assertIsNone(cache.get('functions', 'x = 1', 'Python'))
+            cache.put('functions', 'x = 1', 'Python', ('a', 'b'))
+            self.assertEqual(cache.get('functions', 'x = 1', 'Python'), ('a', 'b'))
+            self.assertIsNone(cache.get('functions', 'x = 1', 'Java'))
+            self.assertEqual(cache.stats()['hits'], 1)
+        with AnalysisCache(self.path) as cache:
+            self.assertEqual(cache.get('functions', 'x = 1', 'Python'), ('a', 'b'))
+
+    def test_lru_eviction(self):
+        with AnalysisCache(self.path, max_bytes=2000) as cache:
+            for i in range(5):
+                cache.put('blob', f"file {i}", 'Python', 'x' * 300)
+            cache.get('blob', 'file 0', 'Python')
+            for i in range(5, 7):
+                cache.put('blob', f"file {i}", 'Python', 'x' * 300)
+            self.assertLessEqual(cache.stats()['bytes'], 2000)
+            self.assertIsNotNone(cache.get('blob', 'file 0', 'Python'))
+            self.assertIsNone(cache.get('blob', 'file 1', 'Python'))
+
+    def test_cached_analysis_matches_and_skips_unchanged_files(self):
+        expected_code = analyze_code(self.files, 'Python')
+        expected_tests = analyze_tests(self.files, 'Python')
+        with AnalysisCache(self.path) as cache:
+            self.assertEqual(analyze_code(self.files, 'Python', cache=cache), expected_code)
+            self.assertEqual(analyze_tests(self.files, 'Python', cache=cache), expected_tests)
+
+        with AnalysisCache(self.path) as cache:
+            with patch('code_analyzer.analyze_python') as mock_analyze:
+                self.assertEqual(analyze_code(self.files, 'Python', cache=cache), expected_code)
+                self.assertEqual(analyze_code_parallel(self.files, 'Python', max_workers=1, cache=cache), expected_code)
+                mock_analyze.assert_not_called()
+            self.assertEqual(analyze_tests(self.files, 'Python', cache=cache), expected_tests)
+            self.assertEqual(cache.misses, 0)
+
+    def test_fingerprint_files(self):
+        fingerprint = fingerprint_files(self.files)
+        self.assertEqual(fingerprint_files([dict(file) for file in self.files]), fingerprint)
+        changed = [dict(self.files[0], content=self.files[0]['content'] + "\n")] + self.files[1:]
+        self.assertNotEqual(fingerprint_files(changed), fingerprint)
+        renamed = [dict(self.files[0], name='app/other.py')] + self.files[1:]
+        self.assertNotEqual(fingerprint_files(renamed), fingerprint)
+
+    def test_fingerprint_mapped_files_by_size_and_mtime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'big.py')
+            with open(path, 'w') as handle:
+                handle.write("x = 1\n")
+            record = {'name': 'big.py', 'path': path, 'size': 6}
+            fingerprint = fingerprint_files([record])
+            self.assertEqual(fingerprint_files([dict(record)]), fingerprint)
+            os.utime(path, ns=(0, 0))
+            self.assertNotEqual(fingerprint_files([record]), fingerprint)
+
+if __name__ == '__main__':
+    unittest.main()
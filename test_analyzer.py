@@ -1,157 +1,186 @@
-from typing import List, Dict
-import re
-import ast
+from typing import List, Dict, Iterable, Optional, Tuple
+from code_analyzer import is_source_file
+from analysis_cache import AnalysisCache
+from language_registry import get_language_plugin, LANGUAGES
+from mapped_scanner import count_markers_buffer, find_functions_buffer, find_tested_functions_buffer, open_mapped
+from metrics import METRICS
+from python_symbols import PARSE_ERRORS, build_symbol_table, get_symbol_table
+from scanner import count_markers, quality_markers
+from utils import decode_content
 
-def analyze_tests(files: List[Dict], project_type: str) -> Dict:
+TEST_FILE_SUFFIXES = ('.test.js', '.spec.ts', '_test.py', 'Test.java', 'Test.cs')
+
+def analyze_tests(files: Iterable[Dict], project_type: str, cache: Optional[AnalysisCache] = None) -> Dict:
     """
     Analyze the test files and return test quality and functional coverage information.
+
+    Files are read in a single pass, keeping only what each contributes (see
+    analyze_test_file_partial), so a ProjectFiles is walked once. When an AnalysisCache
+    is given, per-file extraction results are reused for files whose content has not
+    changed. Memory-mapped records (see utils.iter_project_files) are scanned as bytes
+    and not cached.
+    """
+    with METRICS.stage('analyze_tests') as stage:
+        return reduce_test_partials(analyze_test_file_partial(file, project_type, cache) for file in stage.track(files))
+
+def analyze_test_quality(test_files: Iterable[Dict], project_type: str, cache: Optional[AnalysisCache] = None) -> Dict:
     """
-    test_files = [f for f in files if f['name'].endswith('.test.js') or f['name'].endswith('.spec.ts') or f['name'].endswith('_test.py') or f['name'].endswith('Test.java') or f['name'].endswith('Test.cs')]
-    
-    quality = analyze_test_quality(test_files, project_type)
-    functional_coverage = analyze_functional_coverage(files, test_files, project_type)
+    Analyze the quality of test files.
+    """
+    quality = new_quality()
+    markers = quality_markers(project_type)
+    for file in test_files:
+        if 'content' not in file:
+            file_quality = scan_mapped_test_file(file['path'], project_type)[0]
+        else:
+            file_quality = count_test_quality(file['content'], project_type, markers, cache)
+        for key in quality:
+            quality[key] += file_quality[key]
     
-    return {
-        'quality': quality,
-        'functional_coverage': functional_coverage
-    }
+    return quality
 
-def analyze_test_quality(test_files: List[Dict], project_type: str) -> Dict:
+def count_test_quality(content: str, project_type: str, markers: Dict[str, Tuple[str, ...]],
+                       cache: Optional[AnalysisCache] = None) -> Dict:
     """
-    Analyze the quality of test files.
+    Count the quality markers of one test file, through the cache if one is given.
+    """
+    if cache is not None:
+        return cache.get_or_compute('test_quality', content, project_type, lambda: count_markers(content, markers))
+    return count_markers(content, markers)
+
+def new_quality() -> Dict:
+    """
+    Create empty test quality counts.
     """
-    quality = {
+    return {
         'total_tests': 0,
         'assertions': 0,
         'mocks': 0,
         'test_depth': 0
     }
-    
-    for file in test_files:
-        content = file['content']
-        if project_type == 'Angular':
-            quality['total_tests'] += content.count('it(')
-            quality['assertions'] += content.count('expect(')
-            quality['mocks'] += content.count('jasmine.createSpy') + content.count('jasmine.createSpyObj')
-            quality['test_depth'] += content.count('describe(')
-        elif project_type == 'Python':
-            quality['total_tests'] += content.count('def test_')
-            quality['assertions'] += content.count('assert')
-            quality['mocks'] += content.count('mock.patch')
-            quality['test_depth'] += content.count('class Test')
-        elif project_type == 'Java':
-            quality['total_tests'] += content.count('@Test')
-            quality['assertions'] += content.count('assert')
-            quality['mocks'] += content.count('mock(') + content.count('when(')
-            quality['test_depth'] += content.count('class')
-        elif project_type == '.NET':
-            quality['total_tests'] += content.count('[Test]') + content.count('[TestMethod]')
-            quality['assertions'] += content.count('Assert.')
-            quality['mocks'] += content.count('Mock<') + content.count('.Setup(')
-            quality['test_depth'] += content.count('[TestClass]') + content.count('[TestFixture]')
-        else:
-            quality['total_tests'] += content.count('test(')
-            quality['assertions'] += content.count('expect(')
-            quality['mocks'] += content.count('jest.mock(')
-            quality['test_depth'] += content.count('describe(')
-    
-    return quality
 
-def analyze_functional_coverage(files: List[Dict], test_files: List[Dict], project_type: str) -> Dict:
+def summarize_functional_coverage(all_functions: set, tested_functions: set) -> Dict:
     """
-    Analyze the functional coverage of tests.
+    Build the functional coverage dictionary from the sets of defined and tested functions.
     """
     coverage = {
-        'total_functions': 0,
-        'tested_functions': 0,
+        'total_functions': len(all_functions),
+        'tested_functions': len(tested_functions),
         'coverage_percentage': 0
     }
     
-    all_functions = set()
-    tested_functions = set()
-    
-    for file in files:
-        if project_type == "JavaScript":
-            file_functions = extract_js_functions(file['content'])
-        elif project_type == "Angular":
-            file_functions = extract_angular_functions(file['content'])
-        elif project_type == "React":
-            file_functions = extract_react_functions(file['content'])
-        elif project_type == "Python":
-            file_functions = extract_python_functions(file['content'])
-        elif project_type == "Java":
-            file_functions = extract_java_functions(file['content'])
-        elif project_type == ".NET":
-            file_functions = extract_dotnet_functions(file['content'])
-        
-        all_functions.update(file_functions)
-    
-    for test_file in test_files:
-        tested_functions.update(extract_tested_functions(test_file['content'], project_type))
-    
-    coverage['total_functions'] = len(all_functions)
-    coverage['tested_functions'] = len(tested_functions)
-    
     if coverage['total_functions'] > 0:
         coverage['coverage_percentage'] = (coverage['tested_functions'] / coverage['total_functions']) * 100
     
     return coverage
 
-def extract_js_functions(content: str) -> List[str]:
+def is_test_file_name(file_name: str) -> bool:
     """
-    Extract function names from JavaScript code.
+    Check if a file name follows one of the supported test file naming conventions.
     """
-    return re.findall(r'function\s+(\w+)', content)
+    return file_name.endswith(TEST_FILE_SUFFIXES)
+
+def analyze_test_file_partial(file: Dict, project_type: str, cache: Optional[AnalysisCache] = None) -> Dict:
+    """
+    Analyze a single file in isolation and return its partial test analysis results.
+
+    Source files contribute the functions they define and test files contribute their
+    quality counts and the functions they test; reduce_test_partials combines them into
+    the analyze_tests result.
+    """
+    partial = {}
+    if is_source_file(file['name'], project_type):
+        if 'content' not in file:
+            partial['functions'] = extract_mapped_functions(file['path'], project_type)
+        elif cache is not None:
+            partial['functions'] = cache.get_or_compute(
+                'functions', file['content'], project_type,
+                lambda: extract_functions(file['content'], project_type, cache)
+            )
+        else:
+            partial['functions'] = extract_functions(file['content'], project_type)
+    if is_test_file_name(file['name']):
+        content = file.get('content')
+        if content is None:
+            partial['quality'], partial['tested_functions'] = scan_mapped_test_file(file['path'], project_type)
+        elif cache is not None:
+            partial['quality'] = count_test_quality(content, project_type, quality_markers(project_type), cache)
+            partial['tested_functions'] = cache.get_or_compute(
+                'tested_functions', content, project_type,
+                lambda: extract_tested_functions(content, project_type)
+            )
+        else:
+            partial['quality'] = count_markers(content, quality_markers(project_type))
+            partial['tested_functions'] = extract_tested_functions(content, project_type)
+    return partial
 
-def extract_angular_functions(content: str) -> List[str]:
+def reduce_test_partials(partials: Iterable[Dict]) -> Dict:
     """
-    Extract function and property names from Angular code.
+    Merge per-file partial test analysis results into the analyze_tests result.
     """
-    functions = re.findall(r'(public|private)?\s*(\w+)\s*\([^)]*\)\s*{', content)
-    functions = [f[1] for f in functions]  # Extract function names
+    quality = new_quality()
+    all_functions = set()
+    tested_functions = set()
     
-    properties = re.findall(r'(\w+)\s*:\s*(\w+)\s*;', content)
-    properties = [p[0] for p in properties]  # Extract property names
+    for partial in partials:
+        all_functions.update(partial.get('functions', ()))
+        tested_functions.update(partial.get('tested_functions', ()))
+        for key, value in partial.get('quality', {}).items():
+            quality[key] += value
     
-    return functions + properties
+    return {
+        'quality': quality,
+        'functional_coverage': summarize_functional_coverage(all_functions, tested_functions)
+    }
 
-def extract_react_functions(content: str) -> List[str]:
+def extract_functions(content: str, project_type: str, cache: Optional[AnalysisCache] = None) -> List[str]:
     """
-    Extract function names from React code.
-    """
-    # This should be implemented with a JSX parser
-    return extract_js_functions(content)  # Placeholder implementation
+    Extract function names from a source file with the patterns registered for the project type.
 
-def extract_python_functions(content: str) -> List[str]:
+    Python functions come from the symbol table instead; the cache, if given, is used for it.
     """
-    Extract function names from Python code.
+    plugin = get_language_plugin(project_type)
+    if not plugin.function_patterns:
+        return extract_python_functions(content, cache)
+    return plugin.find_functions(content)
+
+def extract_mapped_functions(path: str, project_type: str) -> List[str]:
     """
-    tree = ast.parse(content)
-    return [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    Extract function names from a memory-mapped source file, as extract_functions does.
+
+    Only the names are decoded, except for Python, which is parsed from the decoded source.
+    """
+    plugin = get_language_plugin(project_type)
+    with open_mapped(path) as buffer:
+        if not plugin.function_patterns:
+            try:
+                return build_symbol_table(decode_content(buffer[:])).function_names()
+            except PARSE_ERRORS:
+                return []
+        return find_functions_buffer(plugin, buffer)
 
-def extract_java_functions(content: str) -> List[str]:
+def scan_mapped_test_file(path: str, project_type: str) -> Tuple[Dict, List[str]]:
     """
-    Extract method names from Java code.
+    Return the quality counts and tested functions of a memory-mapped test file, scanning its bytes.
     """
-    return re.findall(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{', content)
+    plugin = LANGUAGES.get(project_type) or LANGUAGES["JavaScript"]
+    with open_mapped(path) as buffer:
+        return count_markers_buffer(buffer, quality_markers(project_type)), find_tested_functions_buffer(plugin, buffer)
 
-def extract_dotnet_functions(content: str) -> List[str]:
+def extract_python_functions(content: str, cache: Optional[AnalysisCache] = None) -> List[str]:
     """
-    Extract method names from .NET (C#) code.
+    Extract function names from Python code, sharing the parse with the code analyzer.
+
+    Files that do not parse define no functions; analyze_code lists them as unparsed.
     """
-    return re.findall(r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{', content)
+    try:
+        return get_symbol_table(content, cache).function_names()
+    except PARSE_ERRORS:
+        return []
 
 def extract_tested_functions(content: str, project_type: str) -> List[str]:
     """
-    Extract names of functions being tested.
-    """
-    if project_type == 'Angular':
-        return re.findall(r'it\([\'"](.+?)[\'"]', content)
-    elif project_type == 'Python':
-        return re.findall(r'def\s+test_(\w+)', content)
-    elif project_type == 'Java':
-        return re.findall(r'@Test.*?void\s+(\w+)', content, re.DOTALL)
-    elif project_type == '.NET':
-        return re.findall(r'\[Test(?:Method)?\].*?void\s+(\w+)', content, re.DOTALL)
-    else:
-        return re.findall(r'test\([\'"](.+?)[\'"]', content)
+    Extract names of functions being tested; unregistered project types use the Jest pattern.
+    """
+    plugin = LANGUAGES.get(project_type) or LANGUAGES["JavaScript"]
+    return plugin.find_tested_functions(content)
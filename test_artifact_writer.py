@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+from openai import AsyncOpenAI, OpenAI
+from openai_stub import StubChatCompletionsServer
+from artifact_writer import TestArtifactWriter, artifact_name, read_artifact
+from code_analyzer import analyze_code
+from test_generator import generate_tests_batched, generate_tests_concurrently
+
+class TestArtifactWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'tests.zip')
+
+    def test_artifact_names_mirror_the_source_tree(self):
+        self.assertEqual(artifact_name('total', 'Python', 'unit', 'src/billing/invoice.py'),
+                         'unit/src/billing/invoice/test_total.py')
+        self.assertEqual(artifact_name('Cart.add', 'Python', 'integration', 'cart.py'),
+                         'integration/cart/test_Cart_add.py')
+        self.assertEqual(artifact_name('render', 'React', 'unit', 'src\\App.jsx'), 'unit/src/App/render.test.js')
+        self.assertEqual(artifact_name('total', 'Java', 'integration', 'src/main/Invoice.java'),
+                         'integration/src/main/Invoice/TotalIT.java')
+        self.assertEqual(artifact_name('total', '.NET', 'unit'), 'unit/TotalTests.cs')
+        # Paths cannot leave the test type's directory
+        self.assertEqual(artifact_name('f', 'Python', 'unit', '../../etc/x.py'), 'unit/etc/x/test_f.py')
+        self.assertEqual(artifact_name('f', 'Python', 'unit', 'C:\\work\\x.py'), 'unit/work/x/test_f.py')
+
+    def test_tests_are_streamed_into_a_zip(self):
+        with TestArtifactWriter('Python', self.path) as artifacts:
+            first = artifacts.write('add', 'unit', "def test_add(): pass\n", 'calc.py')
+            second = artifacts.write('add', 'unit', "def test_add_again(): pass\n", 'calc.py')
+        self.assertEqual([first.name, second.name], ['unit/calc/test_add.py', 'unit/calc/test_add_2.py'])
+        self.assertEqual(artifacts.artifacts, [first, second])
+        with zipfile.ZipFile(self.path) as archive:
+            self.assertEqual(archive.namelist(), [first.name, second.name])
+        self.assertEqual(read_artifact(self.path, second.name), "def test_add_again(): pass\n")
+        with self.assertRaises(ValueError):
+            artifacts.write('add', 'unit', "", 'calc.py')
+
+    def test_generated_tests_are_written_per_function(self):
+        files = [
+            {'name': 'pkg/calc.py', 'content': "def add(a, b):\n    return a + b\n"},
+            {'name': 'pkg/text.py', 'content': "def shout(s):\n    return s.upper()\n"}
+        ]
+        code_analysis = analyze_code(files, 'Python')
+        self.assertEqual(code_analysis['coverage']['uncovered_functions'], ['add', 'shout'])
+        self.assertEqual(code_analysis['coverage']['uncovered_function_files'], ['pkg/calc.py', 'pkg/text.py'])
+
+        with StubChatCompletionsServer(reply=lambda body: "def test_it():\n    pass\n") as server:
+            client = AsyncOpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+            with TestArtifactWriter('Python', self.path) as artifacts:
+                returned = generate_tests_concurrently(code_analysis, {}, 'Python', async_client=client,
+                                                       artifacts=artifacts)
+        self.assertEqual(returned, ("", ""))
+        with zipfile.ZipFile(self.path) as archive:
+            self.assertEqual(sorted(archive.namelist()), [
+                'integration/pkg/calc/test_add.py', 'integration/pkg/text/test_shout.py',
+                'unit/pkg/calc/test_add.py', 'unit/pkg/text/test_shout.py'
+            ])
+            self.assertEqual(archive.read('unit/pkg/calc/test_add.py').decode(),
+                             "# Unit Test for add using unittest\ndef test_it():\n    pass")
+
+    def test_batched_generation_writes_fallbacks(self):
+        code_analysis = {'coverage': {'uncovered_functions': ['add'], 'uncovered_function_files': ['calc.py']}}
+        with StubChatCompletionsServer(reply=lambda body: "no delimited tests") as server:
+            stub_client = OpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+            with patch('test_generator.client', stub_client), TestArtifactWriter('Python', self.path) as artifacts:
+                returned = generate_tests_batched(code_analysis, {}, 'Python', artifacts=artifacts)
+        self.assertEqual(returned, ("", ""))
+        self.assertEqual([artifact.name for artifact in artifacts.artifacts],
+                         ['unit/calc/test_add.py', 'integration/calc/test_add.py'])
+        self.assertIn('class TestAdd', read_artifact(self.path, 'unit/calc/test_add.py'))
+
+if __name__ == '__main__':
+    unittest.main()
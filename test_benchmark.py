@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+from benchmark import BENCHMARKS, MAX_PATHOLOGICAL_GROWTH, PATHOLOGICAL_INPUTS, compare_reports, main, run_pathological, run_suite
+from code_analyzer import analyze_code
+from utils import ProjectFiles
+
+class TestBenchmark(unittest.TestCase):
+    def test_suite_reports_throughput_and_memory(self):
+        report = run_suite(["Python"], [20], repeat=1, generate_functions=3, isolate=False)
+        self.assertEqual([result['benchmark'] for result in report['results']], list(BENCHMARKS))
+        for result in report['results']:
+            self.assertEqual(result['files'], 20)
+            self.assertGreater(result['files_per_second'], 0)
+            self.assertGreater(result['mb_per_second'], 0)
+            self.assertGreater(result['peak_rss_bytes'], 0)
+        generation = report['results'][2]
+        self.assertEqual(generation['functions'], 3)
+        self.assertGreater(generation['functions_per_second'], 0)
+
+    def test_repository_is_streamed_from_disk(self):
+        inputs = []
+
+        def analyze(files, project_type):
+            inputs.append((files, sum(1 for _ in files)))
+            return analyze_code(files, project_type)
+
+        with patch('benchmark.analyze_code', side_effect=analyze):
+            report = run_suite(["Java"], [12], ['analyze_code'], repeat=2, isolate=False)
+        self.assertEqual(len(inputs), 2)
+        self.assertTrue(all(isinstance(files, ProjectFiles) and count == 12 for files, count in inputs))
+        self.assertGreater(report['results'][0]['input_bytes'], 0)
+
+    def test_isolated_run(self):
+        report = run_suite([".NET"], [10], ['analyze_code'], repeat=1)
+        self.assertEqual(report['results'][0]['project_type'], ".NET")
+        self.assertGreater(report['results'][0]['peak_rss_bytes'], 0)
+
+    def test_compare_reports(self):
+        result = {'benchmark': 'analyze_code', 'project_type': 'Python', 'files': 10,
+                  'seconds': 1.0, 'peak_rss_bytes': 100}
+        baseline = {'results': [result]}
+        slower = dict(result, seconds=1.3)
+        bigger = dict(result, peak_rss_bytes=130)
+        self.assertEqual(compare_reports({'results': [dict(result, seconds=1.2)]}, baseline, 0.25), [])
+        self.assertEqual(len(compare_reports({'results': [slower]}, baseline, 0.25)), 1)
+        self.assertEqual(len(compare_reports({'results': [bigger]}, baseline, 0.25)), 1)
+        self.assertEqual(compare_reports({'results': [dict(slower, files=20)]}, baseline, 0.25), [])
+
+    def test_baseline_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            args = ['--sizes', '10', '--benchmarks', 'analyze_tests', '--repeat', '1', '--in-process']
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main(args + ['--save-baseline', path]), 0)
+            self.assertIn('analyze_tests', output.getvalue())
+            with open(path) as handle:
+                baseline = json.load(handle)
+            self.assertIn('environment', baseline)
+
+            # A baseline recorded as impossibly fast makes the same run a regression
+            baseline['results'][0]['seconds'] = 1e-9
+            with open(path, 'w') as handle:
+                json.dump(baseline, handle)
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()) as errors:
+                self.assertEqual(main(args + ['--baseline', path]), 1)
+            self.assertIn('regression: analyze_tests Python (10 files)', errors.getvalue())
+
+    def test_pathological_inputs_scan_in_linear_time(self):
+        results = run_pathological(sizes=(4000, 32000), min_seconds=0.001)
+        self.assertEqual({result['input'] for result in results}, set(PATHOLOGICAL_INPUTS))
+        for result in results:
+            with self.subTest(input=result['input'], scan=result['scan']):
+                self.assertLess(result['growth'], MAX_PATHOLOGICAL_GROWTH)
+
+if __name__ == '__main__':
+    unittest.main()
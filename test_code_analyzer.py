@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+from code_analyzer import analyze_code, analyze_python, calculate_functional_coverage, count_event_handlers, index_test_names
+from test_analyzer import analyze_tests
+
+class TestTestNameIndex(unittest.TestCase):
+    def test_index_includes_boundary_prefixes(self):
+        names = index_test_names("def test_parse_header_empty(): pass\nvoid testGetValueTwice() {}")
+        self.assertIn('test_parse_header', names)
+        self.assertIn('test_parse', names)
+        self.assertIn('testGet', names)
+        self.assertIn('testGetValue', names)
+        self.assertNotIn('test_parse_head', names)
+
+    def test_single_file_matches_within_content(self):
+        result = analyze_python("def alpha():\n    pass\n\ndef beta():\n    pass\n\ndef test_alpha():\n    pass\n")
+        self.assertEqual(result['uncovered_functions'], ['beta', 'test_alpha'])
+
+    def test_tests_in_other_files_cover_functions(self):
+        files = [
+            {'name': 'app/parser.py', 'content': "def parse():\n    pass\n\ndef parser_state():\n    pass\n"},
+            {'name': 'tests/parser_test.py', 'content': "def test_parse_empty():\n    pass\n"},
+        ]
+        uncovered = analyze_code(files, 'Python')['coverage']['uncovered_functions']
+        self.assertEqual(uncovered, ['parser_state', 'test_parse_empty'])
+
+    def test_unparsable_python_files_are_skipped(self):
+        files = [
+            {'name': 'app/parser.py', 'content': "def parse():\n    pass\n"},
+            {'name': 'legacy/report.py', 'content': 'def report():\n    print "x"\n'},
+            {'name': 'fixtures/nul.py', 'content': "def nul():\n    pass\n\0"},
+            {'name': 'app/parser_test.py', 'content': "def test_parse():\n    parse()\n"},
+        ]
+        coverage = analyze_code(files, 'Python')['coverage']
+        self.assertEqual(coverage['unparsed_files'], ['legacy/report.py', 'fixtures/nul.py'])
+        self.assertEqual(coverage['uncovered_functions'], ['test_parse'])
+        self.assertEqual(analyze_tests(files, 'Python')['functional_coverage']['total_functions'], 2)
+
+    def test_java_and_dotnet_naming(self):
+        java_files = [
+            {'name': 'Calc.java', 'content': "public int add(int a) { return a; }\npublic int sub(int a) { return a; }"},
+            {'name': 'CalcTest.java', 'content': "@Test\nvoid testAddPositive() { }"},
+        ]
+        java_uncovered = analyze_code(java_files, 'Java')['coverage']['uncovered_functions']
+        self.assertNotIn('add', java_uncovered)
+        self.assertIn('sub', java_uncovered)
+
+        dotnet_files = [
+            {'name': 'Calc.cs', 'content': "public int Add(int a) { return a; }"},
+            {'name': 'CalcTest.cs', 'content': "[Test]\npublic void TestAdd() { }"},
+        ]
+        dotnet_uncovered = analyze_code(dotnet_files, '.NET')['coverage']['uncovered_functions']
+        self.assertNotIn('Add', dotnet_uncovered)
+
+class TestFunctionalCoverageStage(unittest.TestCase):
+    def setUp(self):
+        self.files = [
+            {'name': 'src/form.html', 'content': "<form><input><button>Save</button></form>"},
+            {'name': 'src/list.html', 'content': "<ul><li>one</li></ul>"},
+        ] + [
+            {'name': f"src/widget{i}.js", 'content': f"function render{i}() {{ el.addEventListener('click', onClick); }}"}
+            for i in range(6)
+        ]
+
+    def test_each_file_is_counted_once(self):
+        with patch('code_analyzer.count_event_handlers', wraps=count_event_handlers) as counter:
+            coverage = analyze_code(self.files, 'JavaScript')['coverage']
+        self.assertEqual(counter.call_count, 6)
+        # 12 handlers for 5 UI elements, capped at 100%, reported by every JS file
+        self.assertEqual(coverage['functional_coverage'], 100)
+
+    def test_matches_project_wide_calculation(self):
+        js_files = self.files[2:4]
+        html_files = self.files[:2]
+        expected = calculate_functional_coverage(js_files, html_files)
+        self.assertAlmostEqual(expected, 4 / 5 * 100)
+        coverage = analyze_code(html_files + js_files, 'React')['coverage']
+        self.assertAlmostEqual(coverage['functional_coverage'], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+import unittest
+from code_analyzer import analyze_code
+from coverage_reports import detect_format, iter_report, line_bitmap, load_coverage_report, CoverageReport, FileCoverage
+from parallel_analyzer import analyze_code_parallel
+
+LCOV = """TN:
+SF:/home/ci/project/src/calc.py
+FN:1,add
+FN:4,6,sub
+FNDA:3,add
+FNDA:0,sub
+DA:1,1
+DA:2,3
+DA:4,1
+DA:5,0
+DA:6,0,abcdef
+LF:5
+LH:3
+end_of_record
+SF:/home/ci/project/src/util.py
+FNL:0,1,3
+FNA:0,2,helper
+DA:1,1
+DA:2,2
+end_of_record
+"""
+
+COBERTURA = """<?xml version="1.0" ?>
+<!DOCTYPE coverage SYSTEM "http://cobertura.sourceforge.net/xml/coverage-04.dtd">
+<coverage line-rate="0.5" version="1.9">
+  <sources><source>/home/ci/project</source></sources>
+  <packages>
+    <package name="src">
+      <classes>
+        <class name="Calc" filename="src/calc.py" line-rate="0.6">
+          <methods>
+            <method name="add" signature="()V"><lines><line number="2" hits="3"/></lines></method>
+            <method name="sub" signature="()V"><lines><line number="5" hits="0"/></lines></method>
+          </methods>
+          <lines>
+            <line number="1" hits="1"/>
+            <line number="2" hits="3"/>
+            <line number="4" hits="1"/>
+            <line number="5" hits="0" branch="true" condition-coverage="0% (0/2)"/>
+          </lines>
+        </class>
+        <class name="Calc$Inner" filename="src/calc.py" line-rate="0">
+          <methods/>
+          <lines><line number="6" hits="0"/></lines>
+        </class>
+      </classes>
+    </package>
+  </packages>
+</coverage>
+"""
+
+JACOCO = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<!DOCTYPE report PUBLIC "-//JACOCO//DTD Report 1.1//EN" "report.dtd">
+<report name="project">
+  <sessioninfo id="ci" start="1" dump="2"/>
+  <package name="com/example">
+    <class name="com/example/Calc" sourcefilename="Calc.java">
+      <method name="add" desc="(II)I" line="3">
+        <counter type="INSTRUCTION" missed="0" covered="4"/>
+        <counter type="METHOD" missed="0" covered="1"/>
+      </method>
+      <method name="sub" desc="(II)I" line="6">
+        <counter type="INSTRUCTION" missed="4" covered="0"/>
+        <counter type="METHOD" missed="1" covered="0"/>
+      </method>
+      <counter type="METHOD" missed="1" covered="1"/>
+    </class>
+    <sourcefile name="Calc.java">
+      <line nr="3" mi="0" ci="4" mb="0" cb="0"/>
+      <line nr="6" mi="4" ci="0" mb="0" cb="0"/>
+      <line nr="7" mi="1" ci="0" mb="0" cb="0"/>
+      <counter type="LINE" missed="2" covered="1"/>
+    </sourcefile>
+    <counter type="LINE" missed="2" covered="1"/>
+  </package>
+  <counter type="LINE" missed="2" covered="1"/>
+</report>
+"""
+
+def numbits(lines):
+    return line_bitmap(lines).to_bytes(max(lines) // 8 + 1, 'little')
+
+def write_coverage_db(path, line_data=None, arc_data=None):
+    """
+    Write a database with the tables coverage.py (schema version 7) stores measurements in.
+    """
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE coverage_schema (version integer);
+        INSERT INTO coverage_schema VALUES (7);
+        CREATE TABLE meta (key text, value text, unique (key));
+        CREATE TABLE file (id integer primary key, path text, unique (path));
+        CREATE TABLE context (id integer primary key, context text, unique (context));
+        CREATE TABLE line_bits (file_id integer, context_id integer, numbits blob, unique (file_id, context_id));
+        CREATE TABLE arc (file_id integer, context_id integer, fromno integer, tono integer,
+                          unique (file_id, context_id, fromno, tono));
+        INSERT INTO context VALUES (1, ''), (2, 'test_sub');
+    """)
+    for file_id, (source, contexts) in enumerate((line_data or arc_data).items(), 1):
+        connection.execute("INSERT INTO file VALUES (?, ?)", (file_id, source))
+        for context_id, data in contexts.items():
+            if line_data:
+                connection.execute("INSERT INTO line_bits VALUES (?, ?, ?)", (file_id, context_id, numbits(data)))
+            else:
+                connection.executemany("INSERT INTO arc VALUES (?, ?, ?, ?)",
+                                       [(file_id, context_id, start, end) for start, end in data])
+    connection.commit()
+    connection.close()
+
+class TestCoverageReports(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def test_lcov(self):
+        path = self.write('lcov.info', LCOV)
+        self.assertEqual(detect_format(path), 'lcov')
+        report = load_coverage_report(path)
+        calc = report.lookup('src/calc.py')
+        self.assertEqual((calc.executable_lines, calc.executed_lines), (5, 3))
+        self.assertEqual(calc.functions, {'add': 3, 'sub': 0})
+        self.assertEqual(report.lookup('util.py').functions, {'helper': 2})
+
+    def test_cobertura_merges_classes_of_one_file(self):
+        path = self.write('coverage.xml', COBERTURA)
+        self.assertEqual(detect_format(path), 'cobertura')
+        report = load_coverage_report(path)
+        self.assertEqual(len(report), 1)
+        calc = report.lookup('src/calc.py')
+        self.assertEqual((calc.executable_lines, calc.executed_lines), (5, 3))
+        self.assertEqual(calc.functions, {'add': 3, 'sub': 0})
+
+    def test_jacoco(self):
+        path = self.write('jacoco.xml', JACOCO)
+        self.assertEqual(detect_format(path), 'jacoco')
+        calc = load_coverage_report(path).lookup('src/main/java/com/example/Calc.java')
+        self.assertEqual(calc.path, 'com/example/Calc.java')
+        self.assertEqual((calc.executable_lines, calc.executed_lines), (3, 1))
+        self.assertEqual(calc.functions, {'add': 1, 'sub': 0})
+
+    def test_coverage_py_lines_are_merged_across_contexts(self):
+        path = os.path.join(self.root, '.coverage')
+        write_coverage_db(path, line_data={'/ci/src/calc.py': {1: [1, 2, 4], 2: [4, 5]}, '/ci/src/util.py': {1: [9]}})
+        self.assertEqual(detect_format(path), 'coverage.py')
+        report = load_coverage_report(path)
+        calc = report.lookup('src/calc.py')
+        self.assertIsNone(calc.executable_lines)
+        self.assertEqual(calc.executed, line_bitmap([1, 2, 4, 5]))
+        self.assertEqual(report.lookup('src/util.py').executed_lines, 1)
+
+    def test_coverage_py_branch_data(self):
+        path = os.path.join(self.root, '.coverage')
+        write_coverage_db(path, arc_data={'/ci/calc.py': {1: [(-1, 1), (1, 2), (2, -1)], 2: [(1, 4)]}})
+        self.assertEqual(load_coverage_report(path).lookup('calc.py').executed, line_bitmap([1, 2, 4]))
+
+    def test_unrecognized_reports(self):
+        with self.assertRaisesRegex(ValueError, "Unrecognized coverage report format"):
+            detect_format(self.write('notes.txt', "nothing to see\n"))
+        with self.assertRaisesRegex(ValueError, "Unrecognized coverage report format"):
+            detect_format(self.write('pom.xml', "<project></project>\n"))
+        with self.assertRaisesRegex(ValueError, "Unsupported coverage report format: clover"):
+            load_coverage_report(self.write('lcov.info', LCOV), 'clover')
+
+    def test_lookup_prefers_the_longest_matching_suffix(self):
+        report = CoverageReport('lcov')
+        report.add(FileCoverage('C:\\ci\\app\\models\\user.py', 1, 1, {}))
+        report.add(FileCoverage('./admin/models/user.py', 3, 1, {}))
+        self.assertEqual(report.lookup('app/models/user.py').executable, 1)
+        self.assertEqual(report.lookup('admin/models/user.py').executable, 3)
+        self.assertIsNone(report.lookup('app/models/group.py'))
+
+    def test_xml_reports_stream_in_constant_memory(self):
+        def cobertura(classes):
+            body = "".join(
+                f'<class name="C{i}" filename="src/m{i}.py"><methods/><lines>'
+                + "".join(f'<line number="{n}" hits="{n % 2}"/>' for n in range(1, 51)) + "</lines></class>"
+                for i in range(classes)
+            )
+            return f'<?xml version="1.0" ?><coverage><packages><package name="src"><classes>{body}</classes></package></packages></coverage>'
+
+        def peak(path):
+            tracemalloc.start()
+            try:
+                for _ in iter_report(path, 'cobertura'):
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small = peak(self.write('small.xml', cobertura(200)))
+        large = peak(self.write('large.xml', cobertura(4000)))
+        self.assertLess(large, small * 2)
+
+class TestReportAnalysis(unittest.TestCase):
+    FILES = [
+        {'name': 'src/calc.py', 'content': "def add(a, b):\n    return a + b\n\ndef sub(a, b):\n    return a - b\n\n"},
+        {'name': 'src/unmeasured.py', 'content': "def test_me():\n    pass\n"},
+    ]
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.info')
+        with os.fdopen(handle, 'w') as report:
+            report.write(LCOV)
+        self.addCleanup(os.unlink, self.path)
+
+    def test_report_replaces_line_density(self):
+        coverage = analyze_code(self.FILES, "Python", report=load_coverage_report(self.path))['coverage']
+        # calc.py: 3 of 5 executable lines; unmeasured.py: 0 of its 2 code lines
+        self.assertEqual((coverage['total_lines'], coverage['covered_lines']), (7, 3))
+        self.assertAlmostEqual(coverage['coverage_percentage'], 3 / 7 * 100)
+        self.assertEqual(coverage['measured_files'], 1)
+        self.assertEqual(coverage['uncovered_functions'], ['sub', 'test_me'])
+        self.assertNotIn('measured_files', analyze_code(self.FILES, "Python")['coverage'])
+
+    def test_parallel_analysis_applies_the_report(self):
+        report = load_coverage_report(self.path)
+        self.assertEqual(analyze_code_parallel(self.FILES * 3, "Python", max_workers=2, chunk_size=2, report=report),
+                         analyze_code(self.FILES * 3, "Python", report=report))
+
+if __name__ == '__main__':
+    unittest.main()
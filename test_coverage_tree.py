@@ -0,0 +1,64 @@
+import unittest
+from collections import defaultdict
+from coverage_tree import build_coverage_tree
+from code_analyzer import analyze_code
+
+# Counts rolled up from children to parents
+KEYS = ('total_lines', 'covered_lines', 'uncovered_functions', 'files')
+
+class TestCoverageTree(unittest.TestCase):
+    def assertConsistent(self, tree):
+        # Every parent's counts are the sums of its children's
+        index = {node_id: i for i, node_id in enumerate(tree['ids'])}
+        sums = defaultdict(lambda: [0, 0, 0, 0])
+        for i, parent in enumerate(tree['parents']):
+            if parent:
+                for j, key in enumerate(KEYS):
+                    sums[parent][j] += tree[key][i]
+        for parent, counts in sums.items():
+            i = index[parent]
+            self.assertEqual(counts, [tree[key][i] for key in KEYS])
+
+    def test_rollups(self):
+        tree = build_coverage_tree([
+            ("src/app.py", 120, 90, 2), ("src/util/io.py", 40, 10, 3), ("src\\util\\net.py", 40, 0, 1),
+            ("setup.py", 10, 10, 0)
+        ])
+        keys = ('labels', 'parents', 'total_lines', 'covered_lines', 'uncovered_functions', 'files')
+        nodes = {node_id: tuple(tree[key][i] for key in keys) for i, node_id in enumerate(tree['ids'])}
+        self.assertEqual(nodes['.'], ('All files', '', 210, 110, 6, 4))
+        self.assertEqual(nodes['src'], ('src', '.', 200, 100, 6, 3))
+        self.assertEqual(nodes['src/util'], ('util', 'src', 80, 10, 4, 2))
+        self.assertEqual(nodes['src/util/net.py'], ('net.py', 'src/util', 40, 0, 1, 1))
+        self.assertEqual(len(nodes), 7)
+        self.assertConsistent(tree)
+
+    def test_small_files_are_bucketed(self):
+        rows = [("big.py", 1000, 500, 1)] + [(f"pkg/f{i}.py", 1, 0, 0) for i in range(50)]
+        tree = build_coverage_tree(rows, max_nodes=10)
+        self.assertEqual(tree['ids'], ['.', 'big.py', 'pkg', 'pkg/*'])
+        self.assertEqual(tree['labels'][3], '50 smaller files')
+        self.assertEqual(tree['total_lines'][3], 50)
+        self.assertConsistent(tree)
+
+    def test_node_budget_holds_for_large_repositories(self):
+        rows = [(f"d{i % 40}/s{i % 13}/m{i % 7}/f{i}.py", 50 + i % 300, i % 50, i % 3) for i in range(20000)]
+        for max_nodes in (50, 500, 2000):
+            tree = build_coverage_tree(rows, max_nodes=max_nodes)
+            self.assertLessEqual(len(tree['ids']), max_nodes)
+            self.assertEqual(tree['files'][0], 20000)
+            self.assertEqual(tree['total_lines'][0], sum(row[1] for row in rows))
+            self.assertEqual(len(set(tree['ids'])), len(tree['ids']))
+            self.assertConsistent(tree)
+
+    def test_analysis_includes_the_tree(self):
+        files = [
+            {'name': 'pkg/a.py', 'content': "def a():\n    return 1\n"},
+            {'name': 'pkg/sub/b.py', 'content': "def b():\n    return 2\n\ndef c():\n    return 3\n"}
+        ]
+        tree = analyze_code(files, 'Python')['coverage_tree']
+        self.assertEqual(tree['ids'], ['.', 'pkg', 'pkg/sub', 'pkg/a.py', 'pkg/sub/b.py'])
+        self.assertEqual(tree['uncovered_functions'], [3, 3, 2, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,55 +1,157 @@
+import asyncio
 import os
-from typing import Dict, Tuple
-import openai
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from response_cache import ResponseCache
+from rate_limiter import RateLimiter, RetryPolicy, call_with_retries
+from code_analyzer import is_source_file
+from language_registry import DEFINITION_PATTERN
+from python_symbols import PARSE_ERRORS, get_symbol_table
+from metrics import METRICS
+from utils import read_file_content
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from artifact_writer import TestArtifactWriter
+    from test_validator import TestValidator, ValidationResult
+
+# Created on first use by get_client, so importing this module stays cheap
+client: Optional['OpenAI'] = None
+
+MODEL = "gpt-3.5-turbo"
+MAX_TOKENS = 1000
+TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are an expert test engineer."
+
+# Defaults for the concurrent generation engine
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_REQUEST_TIMEOUT = 60.0
+
+# Requests per test, the first included, when generated tests are validated
+DEFAULT_VALIDATION_ATTEMPTS = 2
+
+# Defaults for batched generation: prompt tokens per request, functions per request and
+# the response budget, which must fit a unit and an integration test per function
+DEFAULT_BATCH_TOKEN_BUDGET = 3000
+DEFAULT_MAX_FUNCTIONS_PER_BATCH = 5
+BATCH_MAX_TOKENS = 4000
+MAX_SNIPPET_LINES = 40
+
+# Delimiters the model is asked to wrap each generated test in
+BATCH_BEGIN = "### BEGIN {test_type} {function_name}"
+BATCH_END = "### END {test_type} {function_name}"
+BATCH_BLOCK_PATTERN = re.compile(
+    r'^[ \t]*### BEGIN (UNIT|INTEGRATION) ([\w$.]+)[ \t]*\n(.*?)^[ \t]*### END \1 \2[ \t]*$', re.MULTILINE | re.DOTALL
+)
+
+# Markdown code fences the model may wrap code in
+CODE_FENCE_PATTERN = re.compile(r'^\s*```[\w+#-]*[ \t]*\n|\n\s*```\s*$')
+
+# Called with (function name, test type, test so far) as a streamed test grows
+TestUpdateCallback = Callable[[str, str, str], None]
+
+class StreamedCompletion(NamedTuple):
+    """
+    The text and token usage of a streamed chat completion, once the stream has ended.
+    """
+    content: str
+    usage: Any
 
-def generate_tests(code_analysis: Dict, test_analysis: Dict, project_type: str) -> Tuple[str, str]:
+def generate_tests(code_analysis: Dict, test_analysis: Dict, project_type: str,
+                   response_cache: Optional[ResponseCache] = None,
+                   artifacts: Optional['TestArtifactWriter'] = None) -> Tuple[str, str]:
     """
     Generate both unit and integration test cases for uncovered functions using AI.
+
+    With artifacts, each test is written to it as soon as it is generated instead of
+    being returned, so the returned strings are empty (see artifact_writer).
     """
     uncovered_functions = code_analysis['coverage']['uncovered_functions']
+    source_files = uncovered_function_files(code_analysis)
     
     unit_tests = []
     integration_tests = []
     
-    for func in uncovered_functions:
-        if project_type in ['Angular', 'React', 'JavaScript']:
-            language = 'JavaScript' if project_type in ['JavaScript', 'React'] else 'TypeScript'
-        elif project_type == 'Python':
-            language = 'Python'
-        elif project_type == 'Java':
-            language = 'Java'
-        elif project_type == '.NET':
-            language = 'C#'
-        else:
-            language = 'JavaScript'
-        
-        unit_test = generate_ai_test_case(func, project_type, language, 'unit')
-        integration_test = generate_ai_test_case(func, project_type, language, 'integration')
-        
-        unit_tests.append(unit_test)
-        integration_tests.append(integration_test)
+    with METRICS.stage('generate_tests'):
+        for func, source_file in zip(uncovered_functions, source_files):
+            language = get_language(project_type)
+            
+            unit_test = generate_ai_test_case(func, project_type, language, 'unit', response_cache)
+            unit_tests.append(keep_test(unit_test, func, 'unit', source_file, artifacts))
+            integration_test = generate_ai_test_case(func, project_type, language, 'integration', response_cache)
+            integration_tests.append(keep_test(integration_test, func, 'integration', source_file, artifacts))
     
-    return "\n\n".join(unit_tests), "\n\n".join(integration_tests)
+    return join_tests(unit_tests), join_tests(integration_tests)
 
-def generate_ai_test_case(function_name: str, project_type: str, language: str, test_type: str) -> str:
+def uncovered_function_files(code_analysis: Dict) -> List[Optional[str]]:
     """
-    Generate a test case for a given function using OpenAI's GPT-3.5-turbo.
+    Return the source file of each uncovered function, None where the analysis does not say.
+    """
+    coverage = code_analysis['coverage']
+    return coverage.get('uncovered_function_files') or [None] * len(coverage['uncovered_functions'])
+
+def keep_test(test: str, function_name: str, test_type: str, source_file: Optional[str],
+              artifacts: Optional['TestArtifactWriter']) -> str:
+    """
+    Write a finished test to artifacts and return an empty string, or return the test itself without them.
+    """
+    if artifacts is None:
+        return test
+    if test:
+        artifacts.write(function_name, test_type, test, source_file)
+    return ""
+
+def join_tests(tests: List[str]) -> str:
+    """
+    Join generated tests into one file's contents, skipping empty ones.
+    """
+    return "\n\n".join(test for test in tests if test)
+
+def get_client() -> 'OpenAI':
+    """
+    Return the shared synchronous OpenAI client, creating it on first use.
+    """
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+def get_language(project_type: str) -> str:
+    """
+    Return the programming language tests are written in for the project type.
     """
     if project_type in ['Angular', 'React', 'JavaScript']:
-        framework = "Jest" if test_type == 'unit' else "Cypress"
+        return 'JavaScript' if project_type in ['JavaScript', 'React'] else 'TypeScript'
     elif project_type == 'Python':
-        framework = "unittest" if test_type == 'unit' else "pytest"
+        return 'Python'
     elif project_type == 'Java':
-        framework = "JUnit"
+        return 'Java'
     elif project_type == '.NET':
-        framework = "NUnit"
-    else:
-        framework = "Jest"
+        return 'C#'
+    return 'JavaScript'
+
+def get_framework(project_type: str, test_type: str) -> str:
+    """
+    Return the test framework used for the project type and test type.
+    """
+    if project_type in ['Angular', 'React', 'JavaScript']:
+        return "Jest" if test_type == 'unit' else "Cypress"
+    elif project_type == 'Python':
+        return "unittest" if test_type == 'unit' else "pytest"
+    elif project_type == 'Java':
+        return "JUnit"
+    elif project_type == '.NET':
+        return "NUnit"
+    return "Jest"
 
-    prompt = f"""
+def build_prompt(function_name: str, project_type: str, language: str, test_type: str) -> str:
+    """
+    Render the prompt asking the model for a test case for one function.
+    """
+    framework = get_framework(project_type, test_type)
+    return f"""
     Generate a {test_type} test case using {framework} for the following {project_type} function in {language}:
 
     Function name: {function_name}
@@ -68,25 +170,527 @@ def generate_ai_test_case(function_name: str, project_type: str, language: str,
     Please provide only the code for the test case, without any explanations.
     """
 
+def build_repair_prompt(function_name: str, project_type: str, language: str, test_type: str, test: str,
+                        result: 'ValidationResult') -> str:
+    """
+    Render the prompt asking the model to fix a generated test that failed validation.
+    """
+    return build_prompt(function_name, project_type, language, test_type) + f"""
+    A previous attempt at this test failed validation ({result.status.replace('_', ' ')}):
+
+    {test}
+
+    The compiler or test output was:
+
+    {result.message or "(no output)"}
+
+    Write a corrected test case that compiles and passes.
+    """
+
+def build_messages(prompt: str) -> List[Dict]:
+    """
+    Wrap a prompt in the chat messages sent to the model.
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def format_generated_test(generated_test: str, function_name: str, project_type: str, test_type: str) -> str:
+    """
+    Prefix a generated test with a header comment naming the function and framework.
+
+    Markdown code fences around the code are dropped, so the result is source code in
+    the test's language.
+    """
+    framework = get_framework(project_type, test_type)
+    comment = '#' if get_language(project_type) == 'Python' else '//'
+    code = CODE_FENCE_PATTERN.sub('', generated_test.strip())
+    return f"{comment} {test_type.capitalize()} Test for {function_name} using {framework}\n{code.strip()}"
+
+def generate_ai_test_case(function_name: str, project_type: str, language: str, test_type: str,
+                          response_cache: Optional[ResponseCache] = None) -> str:
+    """
+    Generate a test case for a given function using OpenAI's GPT-3.5-turbo.
+
+    When a ResponseCache is given, a previous response to the identical request is
+    reused instead of calling the API.
+    """
+    messages = build_messages(build_prompt(function_name, project_type, language, test_type))
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert test engineer."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            n=1,
-            stop=None,
-            temperature=0.7,
-        )
-
-        generated_test = response.choices[0].message.content.strip()
-        return f"// {test_type.capitalize()} Test for {function_name} using {framework}\n{generated_test}"
+        generated_test = response_cache.get_response(messages, MODEL, TEMPERATURE, MAX_TOKENS) if response_cache else None
+        if generated_test is None:
+            start = time.perf_counter()
+            try:
+                response = get_client().chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    max_tokens=MAX_TOKENS,
+                    n=1,
+                    stop=None,
+                    temperature=TEMPERATURE,
+                )
+            except Exception:
+                METRICS.record_llm(time.perf_counter() - start, error=True)
+                raise
+            METRICS.record_response(time.perf_counter() - start, response)
+            generated_test = response.choices[0].message.content
+            if response_cache:
+                response_cache.put_response(messages, MODEL, TEMPERATURE, MAX_TOKENS, generated_test)
+
+        return format_generated_test(generated_test, function_name, project_type, test_type)
     except Exception as e:
         print(f"Error generating AI test case: {str(e)}")
         return generate_fallback_test_case(function_name, project_type, test_type)
 
+def generate_tests_concurrently(code_analysis: Dict, test_analysis: Dict, project_type: str,
+                                max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                                async_client: Optional['AsyncOpenAI'] = None,
+                                response_cache: Optional[ResponseCache] = None,
+                                requests_per_minute: Optional[float] = None,
+                                tokens_per_minute: Optional[float] = None,
+                                retry_policy: Optional[RetryPolicy] = None,
+                                progress: Optional[Callable[[int, int], None]] = None,
+                                on_update: Optional[TestUpdateCallback] = None,
+                                validator: Optional['TestValidator'] = None,
+                                max_validation_attempts: int = DEFAULT_VALIDATION_ATTEMPTS,
+                                artifacts: Optional['TestArtifactWriter'] = None) -> Tuple[str, str]:
+    """
+    Generate unit and integration tests with concurrent requests, from synchronous code.
+
+    Same output as generate_tests; see generate_tests_async.
+    """
+    with METRICS.stage('generate_tests_concurrently'):
+        return asyncio.run(generate_tests_async(
+            code_analysis, test_analysis, project_type, max_concurrency, timeout, async_client, response_cache,
+            requests_per_minute, tokens_per_minute, retry_policy, progress, on_update, validator,
+            max_validation_attempts, artifacts
+        ))
+
+async def generate_tests_async(code_analysis: Dict, test_analysis: Dict, project_type: str,
+                               max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                               timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                               async_client: Optional['AsyncOpenAI'] = None,
+                               response_cache: Optional[ResponseCache] = None,
+                               requests_per_minute: Optional[float] = None,
+                               tokens_per_minute: Optional[float] = None,
+                               retry_policy: Optional[RetryPolicy] = None,
+                               progress: Optional[Callable[[int, int], None]] = None,
+                               on_update: Optional[TestUpdateCallback] = None,
+                               validator: Optional['TestValidator'] = None,
+                               max_validation_attempts: int = DEFAULT_VALIDATION_ATTEMPTS,
+                               artifacts: Optional['TestArtifactWriter'] = None) -> Tuple[str, str]:
+    """
+    Generate unit and integration tests for uncovered functions with concurrent requests.
+
+    At most max_concurrency requests are in flight at once, each attempt bounded by
+    timeout seconds. Requests are paced to stay within requests_per_minute and
+    tokens_per_minute when given, and rate limited or transient failures are retried
+    according to retry_policy before falling back to the template. Results are
+    reassembled in the order of the uncovered functions, so the output matches
+    generate_tests.
+
+    progress, when given, is called with (functions done, total functions) each time
+    both tests of a function are ready; an exception it raises stops the generation.
+
+    on_update, when given, switches the requests to streaming: it is called with the
+    function name, test type and the test as formatted so far each time tokens arrive,
+    and once more with the final test (including cached responses and fallbacks).
+
+    validator, when given, validates every test as soon as it arrives (see
+    test_validator.TestValidator) while other requests continue. Failing tests are
+    requested again with the failure in the prompt, up to max_validation_attempts
+    requests per test, and tests that never pass are left out of the output.
+
+    artifacts, when given, receives each test as soon as it is final, in place of the
+    returned strings; see generate_tests.
+    """
+    uncovered_functions = code_analysis['coverage']['uncovered_functions']
+    language = get_language(project_type)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute) if requests_per_minute or tokens_per_minute else None
+    retry_policy = retry_policy or RetryPolicy()
+    owns_client = async_client is None
+    if owns_client:
+        # Retries are scheduled here so that they respect the shared rate limiter
+        from openai import AsyncOpenAI
+        async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+    done = 0
+
+    async def generate_test(func, source_file, test_type):
+        test = await generate_ai_test_case_async(async_client, semaphore, func, project_type, language, test_type,
+                                                 timeout, response_cache, limiter, retry_policy, on_update, validator,
+                                                 max_validation_attempts)
+        return keep_test(test, func, test_type, source_file, artifacts)
+
+    async def generate_function_tests(func, source_file):
+        nonlocal done
+        tests = await asyncio.gather(*(
+            generate_test(func, source_file, test_type) for test_type in ('unit', 'integration')
+        ))
+        done += 1
+        if progress:
+            progress(done, len(uncovered_functions))
+        return tests
+
+    try:
+        results = await asyncio.gather(*(
+            generate_function_tests(func, source_file)
+            for func, source_file in zip(uncovered_functions, uncovered_function_files(code_analysis))
+        ))
+    finally:
+        if owns_client:
+            await async_client.close()
+
+    return join_tests([unit for unit, _ in results]), join_tests([integration for _, integration in results])
+
+async def generate_ai_test_case_async(async_client: 'AsyncOpenAI', semaphore: asyncio.Semaphore, function_name: str,
+                                      project_type: str, language: str, test_type: str,
+                                      timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                                      response_cache: Optional[ResponseCache] = None,
+                                      limiter: Optional[RateLimiter] = None,
+                                      retry_policy: Optional[RetryPolicy] = None,
+                                      on_update: Optional[TestUpdateCallback] = None,
+                                      validator: Optional['TestValidator'] = None,
+                                      max_attempts: int = DEFAULT_VALIDATION_ATTEMPTS) -> str:
+    """
+    Generate a test case with the async client, falling back to a template on errors or timeout.
+
+    With on_update the response is streamed; see generate_tests_async.
+
+    With a validator, the test is only returned if it passes validation. A failing test
+    is requested again with the failure in the prompt, up to max_attempts requests in
+    all; when none passes, or the template a failed request falls back to does not
+    either, the result is an empty string.
+    """
+    messages = build_messages(build_prompt(function_name, project_type, language, test_type))
+    for _ in range(max_attempts if validator else 1):
+        test = await request_test_case_async(async_client, semaphore, messages, function_name, project_type, test_type,
+                                             timeout, response_cache, limiter, retry_policy, on_update)
+        fell_back = test is None
+        if fell_back:
+            test = generate_fallback_test_case(function_name, project_type, test_type)
+        if validator is None:
+            return report_test(test, function_name, test_type, on_update)
+
+        result = await validator.validate_async(test)
+        if result.ok:
+            return report_test(test, function_name, test_type, on_update)
+        if fell_back:
+            # The request itself failed; asking again would only fall back again
+            break
+        messages = build_messages(build_repair_prompt(function_name, project_type, language, test_type, test, result))
+    return report_test("", function_name, test_type, on_update)
+
+async def request_test_case_async(async_client: 'AsyncOpenAI', semaphore: asyncio.Semaphore, messages: List[Dict],
+                                  function_name: str, project_type: str, test_type: str, timeout: float,
+                                  response_cache: Optional[ResponseCache], limiter: Optional[RateLimiter],
+                                  retry_policy: Optional[RetryPolicy],
+                                  on_update: Optional[TestUpdateCallback]) -> Optional[str]:
+    """
+    Return the formatted test the model (or the response cache) answers messages with.
+
+    Returns None, after logging the error, if the request fails or times out.
+    """
+    generated_test = response_cache.get_response(messages, MODEL, TEMPERATURE, MAX_TOKENS) if response_cache else None
+    if generated_test is not None:
+        return format_generated_test(generated_test, function_name, project_type, test_type)
+
+    # The completion budget counts against the tokens per minute quota as well
+    request_tokens = sum(estimate_tokens(message['content']) for message in messages) + MAX_TOKENS
+
+    def on_text(text: str) -> None:
+        on_update(function_name, test_type, format_generated_test(text, function_name, project_type, test_type))
+
+    def make_request():
+        if on_update is None:
+            request = async_client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                max_tokens=MAX_TOKENS,
+                n=1,
+                stop=None,
+                temperature=TEMPERATURE,
+            )
+        else:
+            request = stream_chat_completion(async_client, messages, on_text)
+        return asyncio.wait_for(request, timeout)
+
+    async with semaphore:
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await call_with_retries(make_request, limiter, retry_policy, request_tokens)
+            METRICS.record_response(time.perf_counter() - start, response)
+            generated_test = response.content if on_update else response.choices[0].message.content
+            if response_cache:
+                response_cache.put_response(messages, MODEL, TEMPERATURE, MAX_TOKENS, generated_test)
+            return format_generated_test(generated_test, function_name, project_type, test_type)
+        except Exception as e:
+            if response is None:
+                METRICS.record_llm(time.perf_counter() - start, error=True)
+            print(f"Error generating AI test case: {str(e)}")
+            return None
+
+async def stream_chat_completion(async_client: 'AsyncOpenAI', messages: List[Dict],
+                                 on_text: Callable[[str], None]) -> StreamedCompletion:
+    """
+    Request a chat completion with stream=True, calling on_text with the text so far as
+    each chunk arrives, and return the whole text with its usage.
+    """
+    start = time.perf_counter()
+    stream = await async_client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        max_tokens=MAX_TOKENS,
+        n=1,
+        stop=None,
+        temperature=TEMPERATURE,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    text = ""
+    usage = None
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if not text:
+                METRICS.record_stage('llm_first_token', time.perf_counter() - start)
+            text += chunk.choices[0].delta.content
+            on_text(text)
+    finally:
+        await stream.close()
+    return StreamedCompletion(text, usage)
+
+def report_test(test: str, function_name: str, test_type: str, on_update: Optional[TestUpdateCallback]) -> str:
+    """
+    Pass a finished test to on_update, if given, and return it.
+    """
+    if on_update is not None:
+        on_update(function_name, test_type, test)
+    return test
+
+def generate_tests_batched(code_analysis: Dict, test_analysis: Dict, project_type: str,
+                           files: Optional[List[Dict]] = None,
+                           token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+                           max_functions_per_batch: int = DEFAULT_MAX_FUNCTIONS_PER_BATCH,
+                           response_cache: Optional[ResponseCache] = None,
+                           progress: Optional[Callable[[int, int], None]] = None,
+                           artifacts: Optional['TestArtifactWriter'] = None) -> Tuple[str, str]:
+    """
+    Generate unit and integration tests with one request per batch of functions.
+
+    Functions (with their source snippets, when files are given) are packed into prompts
+    of at most token_budget estimated tokens and max_functions_per_batch functions. The
+    model answers with delimited unit and integration tests for every function in the
+    batch; functions missing from a response fall back to generate_fallback_test_case.
+    Output matches generate_tests, including artifacts. progress, when given, is called
+    with (functions done, total functions) after every batch.
+    """
+    uncovered_functions = code_analysis['coverage']['uncovered_functions']
+    language = get_language(project_type)
+    sources = find_function_sources(files, uncovered_functions, project_type) if files else {}
+    unique_functions = list(dict.fromkeys(uncovered_functions))
+
+    generated = {}
+    done = 0
+    with METRICS.stage('generate_tests_batched'):
+        for batch in plan_batches(unique_functions, sources, token_budget, max_functions_per_batch):
+            generated.update(generate_batch(batch, sources, project_type, language, response_cache))
+            done += len(batch)
+            if progress:
+                progress(done, len(unique_functions))
+
+    unit_tests = []
+    integration_tests = []
+    for func, source_file in zip(uncovered_functions, uncovered_function_files(code_analysis)):
+        for test_type, tests in (('unit', unit_tests), ('integration', integration_tests)):
+            if (func, test_type) in generated:
+                test = format_generated_test(generated[(func, test_type)], func, project_type, test_type)
+            else:
+                test = generate_fallback_test_case(func, project_type, test_type)
+            tests.append(keep_test(test, func, test_type, source_file, artifacts))
+
+    return join_tests(unit_tests), join_tests(integration_tests)
+
+def generate_batch(functions: List[str], sources: Dict[str, str], project_type: str, language: str,
+                   response_cache: Optional[ResponseCache] = None) -> Dict[Tuple[str, str], str]:
+    """
+    Request tests for a batch of functions and return them keyed by (function, test type).
+    """
+    messages = build_messages(build_batch_prompt(functions, sources, project_type, language))
+    try:
+        content = response_cache.get_response(messages, MODEL, TEMPERATURE, BATCH_MAX_TOKENS) if response_cache else None
+        if content is None:
+            start = time.perf_counter()
+            try:
+                response = get_client().chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    max_tokens=BATCH_MAX_TOKENS,
+                    n=1,
+                    stop=None,
+                    temperature=TEMPERATURE,
+                )
+            except Exception:
+                METRICS.record_llm(time.perf_counter() - start, error=True)
+                raise
+            METRICS.record_response(time.perf_counter() - start, response)
+            content = response.choices[0].message.content
+            if response_cache:
+                response_cache.put_response(messages, MODEL, TEMPERATURE, BATCH_MAX_TOKENS, content)
+    except Exception as e:
+        print(f"Error generating batched AI test cases: {str(e)}")
+        return {}
+
+    wanted = set(functions)
+    return {key: test for key, test in parse_batch_response(content).items() if key[0] in wanted}
+
+def build_batch_prompt(functions: List[str], sources: Dict[str, str], project_type: str, language: str) -> str:
+    """
+    Render one prompt asking for unit and integration tests for several functions.
+    """
+    unit_framework = get_framework(project_type, 'unit')
+    integration_framework = get_framework(project_type, 'integration')
+    sections = []
+    for func in functions:
+        if func in sources:
+            sections.append(f"Function name: {func}\nSource:\n```\n{sources[func]}\n```")
+        else:
+            sections.append(f"Function name: {func}")
+    begin_unit = BATCH_BEGIN.format(test_type='UNIT', function_name='<function name>')
+    end_unit = BATCH_END.format(test_type='UNIT', function_name='<function name>')
+    begin_integration = BATCH_BEGIN.format(test_type='INTEGRATION', function_name='<function name>')
+    end_integration = BATCH_END.format(test_type='INTEGRATION', function_name='<function name>')
+    functions_text = "\n\n".join(sections)
+
+    return f"""
+    Generate tests for each of the following {project_type} functions in {language}.
+    For every function write one unit test case using {unit_framework} and one integration test case using {integration_framework}.
+
+{functions_text}
+
+    Each test case should:
+    1. Include multiple assertions
+    2. Test edge cases
+    3. Use mocks or spies if appropriate
+    4. Follow best practices for the framework
+    5. For unit tests, focus on testing the function's behavior and output
+    6. For integration tests, focus on the function's integration with other components, external services and user interactions, including setup and teardown, different workflows, data persistence and error handling
+
+    Wrap every test case exactly like this, with the delimiter lines on their own lines:
+    {begin_unit}
+    <code>
+    {end_unit}
+    {begin_integration}
+    <code>
+    {end_integration}
+
+    Please provide only the delimited code for the test cases, without any explanations.
+    """
+
+def parse_batch_response(content: str) -> Dict[Tuple[str, str], str]:
+    """
+    Extract delimited test cases from a batched response, keyed by (function, test type).
+    """
+    tests = {}
+    for test_type, function_name, body in BATCH_BLOCK_PATTERN.findall(content or ''):
+        body = CODE_FENCE_PATTERN.sub('', body.strip('\n'))
+        if body.strip():
+            tests[(function_name, test_type.lower())] = body
+    return tests
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of model tokens in a text (about four characters per token).
+    """
+    return len(text) // 4 + 1
+
+def plan_batches(functions: List[str], sources: Dict[str, str], token_budget: int,
+                 max_functions_per_batch: int) -> List[List[str]]:
+    """
+    Group functions into batches that fit the prompt token budget and batch size limit.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for func in functions:
+        tokens = estimate_tokens(func) + estimate_tokens(sources.get(func, '')) + 10
+        if batch and (batch_tokens + tokens > token_budget or len(batch) >= max_functions_per_batch):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(func)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def find_function_sources(files: List[Dict], functions: List[str], project_type: str,
+                          max_lines: int = MAX_SNIPPET_LINES) -> Dict[str, str]:
+    """
+    Find the source snippet (signature and body, truncated to max_lines) of each function.
+    """
+    wanted = set(functions)
+    sources = {}
+    for file in files:
+        if len(sources) == len(wanted):
+            break
+        if not is_source_file(file['name'], project_type):
+            continue
+        content = read_file_content(file)
+        if project_type == 'Python':
+            sources.update(_python_function_sources(content, wanted - sources.keys(), max_lines))
+        else:
+            sources.update(_braced_function_sources(content, wanted - sources.keys(), max_lines))
+    return sources
+
+def _python_function_sources(content: str, wanted: set, max_lines: int) -> Dict[str, str]:
+    """
+    Return snippets for the wanted Python functions defined in a file.
+    """
+    try:
+        table = get_symbol_table(content)
+    except PARSE_ERRORS:
+        return {}
+    lines = content.split('\n')
+    sources = {}
+    for symbol in table.symbols:
+        if symbol.name in wanted and symbol.name not in sources:
+            end = min(symbol.end_lineno, symbol.lineno + max_lines - 1)
+            sources[symbol.name] = '\n'.join(lines[symbol.lineno - 1:end])
+    return sources
+
+def _braced_function_sources(content: str, wanted: set, max_lines: int) -> Dict[str, str]:
+    """
+    Return snippets for the wanted functions in a brace-delimited language (JS/TS, Java, C#).
+    """
+    sources = {}
+    for match in DEFINITION_PATTERN.finditer(content):
+        name = match.group(1) or match.group(2) or match.group(3)
+        if name not in wanted or name in sources:
+            continue
+        start = content.rfind('\n', 0, match.start()) + 1
+        depth = 0
+        end = len(content)
+        for index in range(match.end() - 1, len(content)):
+            char = content[index]
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if depth <= 1:
+                    end = index + 1
+                    break
+                depth -= 1
+        sources[name] = '\n'.join(content[start:end].split('\n')[:max_lines])
+    return sources
+
 def generate_fallback_test_case(function_name: str, project_type: str, test_type: str) -> str:
     """
     Generate a basic test case when AI generation fails.
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+from code_analyzer import analyze_code
+from incremental import analyze_incremental, load_state
+from test_analyzer import analyze_tests
+from utils import iter_project_files
+
+class TestAnalyzeIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp.name, 'repo')
+        self.state_path = os.path.join(self.tmp.name, 'state.pickle')
+        os.makedirs(self.repo)
+        self.git('init', '-q')
+        self.write('app/core.py', "def alpha():\n    return 1\n")
+        self.write('app/extra.py', "def beta():\n    return 2\n")
+        self.write('app/core_test.py', "def test_alpha():\n    assert alpha() == 1\n")
+        self.commit('initial')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def git(self, *args):
+        subprocess.run(['git', '-C', self.repo, '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                       check=True, capture_output=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.repo, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as handle:
+            handle.write(content)
+
+    def commit(self, message):
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', message)
+
+    def full_analysis(self):
+        files = sorted(iter_project_files(self.repo), key=lambda f: f['name'])
+        return analyze_code(files, 'Python'), analyze_tests(files, 'Python')
+
+    def test_only_changed_files_are_reanalyzed(self):
+        first = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertTrue(first['full_scan'])
+        self.assertEqual(first['analyzed_files'], 3)
+
+        base = subprocess.run(['git', '-C', self.repo, 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        self.write('app/core.py', "def alpha():\n    return 1\n\ndef gamma():\n    return 3\n")
+        os.remove(os.path.join(self.repo, 'app/extra.py'))
+        self.commit('change')
+        self.write('app/new.py', "def delta():\n    pass\n")
+
+        with patch('incremental.iter_project_files') as mock_walk:
+            second = analyze_incremental(self.repo, 'Python', base_commit=base, state_path=self.state_path)
+            mock_walk.assert_not_called()
+        self.assertFalse(second['full_scan'])
+        self.assertEqual(second['analyzed_files'], 2)
+        self.assertEqual(second['deleted_files'], 1)
+
+        code_analysis, test_analysis = self.full_analysis()
+        self.assertEqual(second['code_analysis'], code_analysis)
+        self.assertEqual(second['test_analysis'], test_analysis)
+
+        # Reverting an uncommitted file is picked up because it was dirty last run
+        os.remove(os.path.join(self.repo, 'app/new.py'))
+        third = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertEqual(third['code_analysis'], self.full_analysis()[0])
+
+    def test_changes_are_diffed_from_the_state_commit_whatever_the_base(self):
+        analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.write('app/core.py', "def alpha():\n    return 10\n\ndef gamma():\n    return 3\n")
+        self.commit('second')
+        result = analyze_incremental(self.repo, 'Python', base_commit='HEAD', state_path=self.state_path)
+        self.assertFalse(result['full_scan'])
+        self.assertEqual(result['analyzed_files'], 1)
+        self.assertEqual(result['code_analysis'], self.full_analysis()[0])
+
+    def test_ignored_files_stay_ignored(self):
+        self.write('.gitignore', "generated/\n")
+        self.write('generated/schema.py', "def schema():\n    pass\n")
+        self.git('add', '-f', 'generated/schema.py')
+        self.commit('tracked but ignored')
+        first = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertTrue(first['full_scan'])
+
+        self.write('generated/schema.py', "def schema():\n    pass\n\ndef more():\n    pass\n")
+        self.commit('regenerate')
+        second = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertFalse(second['full_scan'])
+        self.assertNotIn('schema', second['code_analysis']['coverage']['uncovered_functions'])
+        self.assertEqual(second['code_analysis'], self.full_analysis()[0])
+
+        # A changed .gitignore may change which files are analyzed
+        self.write('.gitignore', "")
+        self.assertTrue(analyze_incremental(self.repo, 'Python', state_path=self.state_path)['full_scan'])
+
+    def test_missing_state_commit_triggers_full_scan(self):
+        analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.write('app/core.py', "def alpha():\n    return 10\n")
+        with patch('incremental.changed_files', side_effect=[subprocess.CalledProcessError(128, 'git'), (set(), set())]):
+            result = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertTrue(result['full_scan'])
+        self.assertEqual(result['code_analysis'], self.full_analysis()[0])
+
+    def test_state_from_another_analyzer_version_is_rejected(self):
+        analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertFalse(analyze_incremental(self.repo, 'Python', state_path=self.state_path)['full_scan'])
+        with patch('incremental.ANALYZER_VERSION', 'next'):
+            self.assertIsNone(load_state(self.state_path))
+            result = analyze_incremental(self.repo, 'Python', state_path=self.state_path)
+        self.assertTrue(result['full_scan'])
+        self.assertEqual(result['analyzed_files'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import unittest
+from job_runner import JobRunner, JobCancelled, DONE, FAILED, CANCELLED
+
+def wait_until_finished(job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.is_finished:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"{job.id} did not finish")
+
+class TestJobRunner(unittest.TestCase):
+    def setUp(self):
+        self.runner = JobRunner(max_workers=1)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_and_progress(self):
+        def count_files(job, files):
+            job.set_stage("Counting")
+            consumed = sum(1 for _ in job.track_files(files))
+            job.report_functions(3, 4)
+            return consumed
+
+        job = wait_until_finished(self.runner.submit(count_files, [{'name': 'a'}, {'name': 'b'}], description='two files'))
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, 2)
+        snapshot = job.snapshot()
+        self.assertEqual((snapshot['files_done'], snapshot['files_total']), (2, 2))
+        self.assertEqual((snapshot['functions_done'], snapshot['functions_total']), (3, 4))
+        self.assertEqual(job.progress(), 0.75)
+        self.assertEqual(self.runner.get(job.id), job)
+
+    def test_partial_dictionaries_are_copied_on_read(self):
+        def stream(job):
+            job.update_partial('tests', ('alpha', 'unit'), "def test_")
+            snapshot = job.get_partial('tests')
+            job.update_partial('tests', ('alpha', 'unit'), "def test_alpha")
+            return snapshot
+
+        job = wait_until_finished(self.runner.submit(stream))
+        self.assertEqual(job.result, {('alpha', 'unit'): "def test_"})
+        self.assertEqual(job.get_partial('tests'), {('alpha', 'unit'): "def test_alpha"})
+        self.assertIsNone(job.get_partial('missing'))
+
+    def test_failure_is_recorded(self):
+        def fail(job):
+            raise ValueError("bad input")
+
+        job = wait_until_finished(self.runner.submit(fail))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "bad input")
+
+    def test_cancel_running_and_queued_jobs(self):
+        started = threading.Event()
+
+        def endless(job):
+            started.set()
+            while True:
+                job.report_functions(0, 1)
+                threading.Event().wait(0.01)
+
+        running = self.runner.submit(endless)
+        queued = self.runner.submit(endless)
+        self.assertTrue(started.wait(5))
+        self.assertTrue(self.runner.cancel(queued.id))
+        self.assertEqual(queued.status, CANCELLED)
+        self.assertTrue(self.runner.cancel(running.id))
+        self.assertEqual(wait_until_finished(running).status, CANCELLED)
+        self.assertFalse(self.runner.cancel(running.id))
+
+    def test_track_files_stops_when_cancelled(self):
+        def consume(job):
+            for _ in job.track_files(iter(range(10))):
+                job.cancel()
+
+        job = wait_until_finished(self.runner.submit(consume))
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(job.files_done, 1)
+        self.assertIsNone(job.files_total)
+        with self.assertRaises(JobCancelled):
+            job.check_cancelled()
+
+    def test_finished_jobs_are_pruned(self):
+        runner = JobRunner(max_workers=1, max_finished=2)
+        try:
+            jobs = [wait_until_finished(runner.submit(lambda job: None)) for _ in range(4)]
+            runner.submit(lambda job: None)
+            self.assertIsNone(runner.get(jobs[0].id))
+            self.assertIsNotNone(runner.get(jobs[-1].id))
+        finally:
+            runner.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
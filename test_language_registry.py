@@ -0,0 +1,105 @@
+import re
+import unittest
+from unittest.mock import patch
+from language_registry import (
+    findall_bounded, get_language_plugin, register_language, LanguagePlugin, LANGUAGES, DECLARATION_PATTERN,
+    DEFINITION_PATTERN, METHOD_PATTERN, UI_ELEMENT_END, UI_ELEMENT_PATTERN
+)
+from mapped_scanner import find_functions_buffer
+from scanner import quality_markers
+from test_analyzer import extract_functions, extract_tested_functions
+
+class TestLanguageRegistry(unittest.TestCase):
+    def test_every_project_type_is_registered(self):
+        self.assertEqual(set(LANGUAGES), {"JavaScript", "Angular", "React", "Python", "Java", ".NET"})
+        with self.assertRaisesRegex(ValueError, "Unsupported project type: Cobol"):
+            get_language_plugin("Cobol")
+
+    def test_register_language(self):
+        plugin = LanguagePlugin(
+            name="Kotlin", source_extensions=('.kt',), comment_prefix='//',
+            function_patterns=(re.compile(r'fun\s++(\w++)'),), tested_pattern=re.compile(r'fun\s++test(\w++)'),
+            quality_markers={'total_tests': ('@Test',)}
+        )
+        with patch.dict(LANGUAGES):
+            register_language(plugin)
+            self.assertEqual(extract_functions("fun main() {}\nfun helper(x: Int) = x", "Kotlin"), ['main', 'helper'])
+            self.assertEqual(extract_tested_functions("fun testHelper() {}", "Kotlin"), ['Helper'])
+            self.assertEqual(quality_markers("Kotlin"), {'total_tests': ('@Test',)})
+        self.assertNotIn("Kotlin", LANGUAGES)
+
+    def test_bytes_patterns_find_the_same_names(self):
+        content = (
+            "public class Service {\n"
+            "    public int Count(int a) {\n"
+            "    private\tvoid  reset() {}\n"
+            "    privateHelper(x) {}\n"
+            "}\n"
+        )
+        for project_type in ("JavaScript", "Angular", "React", "Java", ".NET"):
+            plugin = get_language_plugin(project_type)
+            with self.subTest(project_type=project_type):
+                self.assertEqual(find_functions_buffer(plugin, content.encode()), plugin.find_functions(content))
+
+    def test_method_names_match_the_backtracking_pattern(self):
+        content = (
+            "class A {\n"
+            "  public static void Save(int id) {\n"
+            "  protected   String name( ) {\n"
+            "  int  privateCount() {\n"
+            "  privateHelper(x) {}\n"
+            "  void run(a, b)\n  {\n"
+            "}\n"
+        )
+        original = r'(?:public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{'
+        self.assertEqual(METHOD_PATTERN.findall(content), re.findall(original, content))
+
+    def test_declarations_match_the_backtracking_pattern(self):
+        content = (
+            "function render(view) { return view; }\n"
+            "const handler = (e) => { go(e); };\n"
+            "const  App  =  () =>  (<div/>);\n"
+            "const value = {a: 1};\n"
+            "function(x) {}\n"
+        )
+        original = r'(?:function|const)\s+(\w+)\s*[=]?\s*(?:\([^)]*\)|)\s*[=]?\s*[{(]'
+        self.assertEqual(DECLARATION_PATTERN.findall(content), re.findall(original, content))
+
+    def test_definitions_match_the_backtracking_pattern(self):
+        content = (
+            "function load(url) {\n"
+            "let count = 0;\n"
+            "  fetchAll(a, b): Promise<Map<string, number[]>> {\n"
+            "  run() : void\n  {\n"
+            "  skip(x): ;\n"
+        )
+        original = r'function\s+(\w+)|(?:const|let|var)\s+(\w+)\s*=|(\w+)\s*\([^)\n]*\)\s*(?::\s*[\w<>\[\], ]+)?\s*\{'
+        self.assertEqual([m.groups() for m in DEFINITION_PATTERN.finditer(content)],
+                         [m.groups() for m in re.finditer(original, content)])
+
+    def test_nested_parentheses_do_not_make_a_declaration(self):
+        self.assertEqual(METHOD_PATTERN.findall("  int sum(f(a)) {"), [])
+        self.assertEqual(DEFINITION_PATTERN.findall("  sum(f(a)) {"), [])
+
+    def test_bounded_search_finds_the_same_tested_functions(self):
+        content = (
+            "@Test\nvoid addsNumbers() {}\n"
+            "@Test @Disabled\npublic void\n  skipsNothing() {}\n"
+            "void helper() {}\n"
+            "@Test\n"
+        )
+        self.assertEqual(get_language_plugin("Java").find_tested_functions(content),
+                         re.findall(r'@Test.*?void\s+(\w+)', content, re.DOTALL))
+        self.assertEqual(get_language_plugin("Java").find_tested_functions(content),
+                         ['addsNumbers', 'skipsNothing'])
+        self.assertEqual(get_language_plugin(".NET").find_tested_functions("[TestMethod]\npublic void Adds() {}"),
+                         ['Adds'])
+        self.assertEqual(get_language_plugin("Java").find_tested_functions("@Test only"), [])
+
+    def test_ui_elements_stop_at_the_last_tag(self):
+        content = '<div class="a"><button (click)="go()">Go</button><input> <a'
+        self.assertEqual(findall_bounded(UI_ELEMENT_PATTERN, content, UI_ELEMENT_END),
+                         re.findall(r'<(\w+)[^>]*>', content))
+
+if __name__ == '__main__':
+    unittest.main()
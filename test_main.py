@@ -1,7 +1,13 @@
+import os
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch
 from main import add_numbers, main
 import streamlit as st
+from streamlit.testing.v1 import AppTest
+import code_analyzer
 
 class TestMain(unittest.TestCase):
     def setUp(self):
@@ -68,5 +74,147 @@ class TestMain(unittest.TestCase):
         mock_selectbox.assert_called_once()
         mock_button.assert_called_once()
 
+def wait_for_job(app, timeout=30):
+    """
+    Rerun the app until its background analysis job has finished.
+    """
+    deadline = time.monotonic() + timeout
+    while app.session_state['job_id'] is not None:
+        if time.monotonic() > deadline:
+            raise AssertionError("analysis job did not finish")
+        time.sleep(0.05)
+        app.run()
+    return app
+
+def write_generated_tests(code_analysis, test_analysis, project_type, artifacts=None, **kwargs):
+    artifacts.write('alpha', 'unit', 'unit body', 'input_file')
+    artifacts.write('alpha', 'integration', 'functional body', 'input_file')
+    return "", ""
+
+class TestRerunSafeResults(unittest.TestCase):
+    def setUp(self):
+        st.cache_data.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        patches = [
+            patch('analysis_cache.DEFAULT_CACHE_DIR', self.tmp.name),
+            patch('response_cache.DEFAULT_CACHE_DIR', self.tmp.name),
+            patch('code_analyzer.analyze_code', wraps=code_analyzer.analyze_code),
+            patch('test_generator.generate_tests_concurrently', side_effect=write_generated_tests),
+            # Archives of generated tests
+            patch('tempfile.tempdir', self.tmp.name),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.analyze_code = code_analyzer.analyze_code
+        self.addCleanup(self.tmp.cleanup)
+
+    def analyzed_app(self):
+        return wait_for_job(self.start_analysis())
+
+    def start_analysis(self):
+        app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'), default_timeout=30)
+        app.run()
+        app.sidebar.radio[0].set_value("File Content").run()
+        app.sidebar.text_area[0].input("def alpha():\n    return 1\n").run()
+        app.sidebar.selectbox[0].select("Python").run()
+        return app.sidebar.button[0].click().run()
+
+    def checkbox(self, app, label):
+        return next(box for box in app.sidebar.checkbox if box.label == label)
+
+    def test_toggling_views_keeps_results_without_reanalysis(self):
+        import test_generator
+        app = self.analyzed_app()
+        self.assertEqual(self.analyze_code.call_count, 1)
+        self.assertIn('Generated Test Cases', [header.value for header in app.header])
+
+        self.checkbox(app, "Show Functional Coverage").check().run()
+        self.checkbox(app, "Show Code Coverage and Test Quality").check().run()
+        subheaders = [subheader.value for subheader in app.subheader]
+        self.assertIn('Functional Coverage', subheaders)
+        self.assertIn('Code Coverage', subheaders)
+        self.assertEqual(app.main.selectbox[0].options,
+                         ['unit/input_file/test_alpha.py', 'integration/input_file/test_alpha.py'])
+        self.assertEqual([code.value for code in app.code], ['unit body'])
+        app.main.selectbox[0].select('integration/input_file/test_alpha.py').run()
+        self.assertEqual([code.value for code in app.code], ['functional body'])
+        self.assertEqual(self.analyze_code.call_count, 1)
+        self.assertEqual(test_generator.generate_tests_concurrently.call_count, 1)
+        self.assertFalse(app.exception)
+
+    def test_coverage_by_directory(self):
+        project = os.path.join(self.tmp.name, 'project')
+        for name in ('pkg/a.py', 'pkg/sub/b.py', 'c.py'):
+            os.makedirs(os.path.dirname(os.path.join(project, name)), exist_ok=True)
+            with open(os.path.join(project, name), 'w') as handle:
+                handle.write("def f():\n    return 1\n")
+        app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'), default_timeout=30)
+        app.run()
+        app.sidebar.text_input[0].input(project).run()
+        app.sidebar.selectbox[0].select("Python").run()
+        self.checkbox(app, "Show Code Coverage and Test Quality").check().run()
+        app = wait_for_job(app.sidebar.button[0].click().run())
+        self.assertIn('Coverage by Directory', [subheader.value for subheader in app.subheader])
+        self.assertEqual([tab.label for tab in app.tabs], ["Treemap", "Sunburst"])
+        self.assertFalse(app.exception)
+
+    def test_same_content_is_memoized_across_sessions(self):
+        self.analyzed_app()
+        self.analyzed_app()
+        self.assertEqual(self.analyze_code.call_count, 1)
+
+    def test_performance_panel(self):
+        app = self.analyzed_app()
+        self.checkbox(app, "Show Performance panel").check().run()
+        self.assertIn('Performance', [header.value for header in app.header])
+        stages = app.dataframe[0].value['Stage'].tolist()
+        self.assertIn('analyze_code', stages)
+        self.assertIn('analyze_tests', stages)
+        self.assertFalse(app.exception)
+
+    def test_progress_and_cancellation(self):
+        import test_generator
+        started = threading.Event()
+
+        def generate_until_cancelled(*args, progress=None, **kwargs):
+            started.set()
+            while True:
+                progress(1, 3)
+                time.sleep(0.01)
+
+        test_generator.generate_tests_concurrently.side_effect = generate_until_cancelled
+        app = self.start_analysis()
+        self.assertTrue(started.wait(10))
+        app.run()
+        self.assertEqual(app.get('progress')[0].proto.text, "Generating tests... 1 of 3 functions")
+        cancel = next(button for button in app.button if button.label == "Cancel analysis")
+        wait_for_job(cancel.click().run())
+        self.assertEqual([warning.value for warning in app.warning], ["The analysis was cancelled."])
+        self.assertNotIn('Generated Test Cases', [header.value for header in app.header])
+        self.assertFalse(app.exception)
+
+    def test_streamed_tests_show_while_generating(self):
+        import test_generator
+        started = threading.Event()
+        partial_test = "# Unit Test for alpha using unittest\nclass TestAlpha(unittest.TestCase):"
+
+        def stream_until_cancelled(*args, progress=None, on_update=None, **kwargs):
+            on_update('alpha', 'unit', partial_test)
+            started.set()
+            while True:
+                progress(0, 1)
+                time.sleep(0.01)
+
+        test_generator.generate_tests_concurrently.side_effect = stream_until_cancelled
+        app = self.start_analysis()
+        self.assertTrue(started.wait(10))
+        app.run()
+        self.assertIn('Generated Test Cases', [header.value for header in app.header])
+        self.assertEqual([code.value for code in app.code], [partial_test])
+        cancel = next(button for button in app.button if button.label == "Cancel analysis")
+        wait_for_job(cancel.click().run())
+        self.assertFalse(app.exception)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from code_analyzer import analyze_code, analyze_file_partial
+from language_registry import LANGUAGES
+from mapped_scanner import (
+    count_code_lines_buffer, count_literals_buffer, count_markers_buffer, find_tested_functions_buffer, iter_windows,
+    open_mapped, scan_script_buffer
+)
+from scanner import count_code_lines, count_literals, count_markers, scan_script, EVENT_HANDLER_LITERALS
+from synthetic_repo import iter_synthetic_repo, write_synthetic_repo, SOURCE_EXTENSIONS
+from test_analyzer import analyze_tests
+from utils import iter_project_files
+
+class TestBufferScans(unittest.TestCase):
+    SAMPLES = [
+        "",
+        "\n",
+        "x",
+        "\n\n\n",
+        "  // comment\n\tvalue = 1;\r\n\r\n    \n// end",
+        "a\n  b\n\x0b\x0c\n\x1c // not a comment\n//\n c //\n",
+        "function f() {}\n" * 7 + "   ",
+    ]
+
+    def test_line_counts_match_str_scan(self):
+        for content in self.SAMPLES:
+            for prefix in ('//', '#'):
+                expected = count_code_lines(content, prefix)
+                self.assertEqual(count_code_lines_buffer(content.encode(), prefix), expected, repr(content))
+
+    def test_windows_split_on_newlines(self):
+        content = ("short\n" "a much longer line of code\n" "\n" "x = onClick;\n") * 5
+        buffer = content.encode()
+        for window in range(1, 40):
+            chunks = list(iter_windows(buffer, window))
+            self.assertEqual(b''.join(chunks), buffer)
+            self.assertTrue(all(chunk.endswith(b'\n') for chunk in chunks[:-1]))
+            with patch('mapped_scanner.SCAN_WINDOW', window):
+                self.assertEqual(count_code_lines_buffer(buffer, '//'), count_code_lines(content, '//'))
+                self.assertEqual(count_literals_buffer(buffer, EVENT_HANDLER_LITERALS),
+                                 count_literals(content, EVENT_HANDLER_LITERALS))
+
+    def test_scan_script_matches_str_scan(self):
+        content = (
+            "// header\n"
+            "function render(view) { return view; }\n"
+            "const handler = (e) => { e.target.addEventListener('x', onClick); };\n"
+            "\n"
+            "test('render', () => { expect(render(1)).toBe(1); });\n"
+        )
+        self.assertEqual(scan_script_buffer(content.encode()), scan_script(content))
+
+    def test_test_file_scans_match_str_scan(self):
+        contents = {
+            'JavaScript': "test('adds', () => {\n  expect(add(1)).toBe(1);\n  jest.fn();\n});\n" * 3,
+            'Angular': "describe('x', () => {\n  it('renders', () => { expect(1).toBe(1); });\n});\n",
+            'Python': "def test_parse():\n    assert parse() == 1\n\ndef test_mock(mocker):\n    mocker.patch('x')\n",
+            'Java': "@Test\nvoid testAdd() {\n  assertEquals(1, add());\n}\n@Test\npublic void testSub() {}\n",
+            '.NET': "[Test]\npublic void TestAdd() {\n  Assert.AreEqual(1, Add());\n}\n",
+        }
+        for project_type, content in contents.items():
+            plugin = LANGUAGES[project_type]
+            for window in (1, 16, 1 << 20):
+                with self.subTest(project_type=project_type, window=window), \
+                        patch('mapped_scanner.SCAN_WINDOW', window):
+                    self.assertEqual(count_markers_buffer(content.encode(), plugin.quality_markers),
+                                     count_markers(content, plugin.quality_markers))
+                    self.assertEqual(find_tested_functions_buffer(plugin, content.encode()),
+                                     plugin.find_tested_functions(content))
+
+    def test_empty_file_maps_to_empty_buffer(self):
+        with tempfile.NamedTemporaryFile(delete=False) as handle:
+            path = handle.name
+        try:
+            with open_mapped(path) as buffer:
+                self.assertEqual(len(buffer), 0)
+                self.assertEqual(count_code_lines_buffer(buffer, '//'), (1, 0))
+        finally:
+            os.unlink(path)
+
+class TestMappedAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def write(self, project_type):
+        root = os.path.join(self.root, project_type.strip('.'))
+        write_synthetic_repo(iter_synthetic_repo(project_type, 12, seed=3), root)
+        with open(os.path.join(root, 'index.html'), 'w', encoding='utf-8') as handle:
+            handle.write('<div><button onClick="go()">Go</button></div>\n')
+        return root
+
+    def test_mapped_records_match_read_records(self):
+        for project_type in SOURCE_EXTENSIONS:
+            with self.subTest(project_type=project_type):
+                root = self.write(project_type)
+                read = list(iter_project_files(root))
+                mapped = list(iter_project_files(root, mapped_file_size=0))
+                self.assertTrue(all('path' in file and 'content' not in file for file in mapped))
+                self.assertEqual([file['name'] for file in mapped], [file['name'] for file in read])
+
+                for read_file, mapped_file in zip(read, mapped):
+                    self.assertEqual(analyze_file_partial(mapped_file, project_type),
+                                     analyze_file_partial(read_file, project_type))
+                self.assertEqual(analyze_code(mapped, project_type), analyze_code(read, project_type))
+                self.assertEqual(analyze_tests(mapped, project_type), analyze_tests(read, project_type))
+
+    def test_mapped_files_bypass_max_file_size(self):
+        root = self.write("JavaScript")
+        names = {file['name'] for file in iter_project_files(root, max_file_size=0, mapped_file_size=100)}
+        sizes = {file['name']: file['size'] for file in iter_project_files(root, mapped_file_size=0)}
+        self.assertEqual(names, {name for name, size in sizes.items() if size > 100})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from openai import OpenAI
+from analysis_cache import AnalysisCache
+from code_analyzer import analyze_code
+from metrics import METRICS, Histogram, MetricsRegistry
+from openai_stub import StubChatCompletionsServer
+from python_symbols import clear_memo
+from test_analyzer import analyze_tests
+from unittest.mock import patch
+import test_generator
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [('0.1', 2), ('1.0', 3), ('+Inf', 4)])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertIsNone(histogram.quantile(1.0))
+        self.assertIsNone(Histogram().quantile(0.5))
+
+    def test_stages_llm_and_caches(self):
+        registry = MetricsRegistry()
+        with registry.stage('parse', 10) as stage:
+            stage.add_bytes(5)
+        with self.assertRaises(ValueError), registry.stage('parse'):
+            raise ValueError("boom")
+        registry.record_llm(0.2, prompt_tokens=30, completion_tokens=12)
+        registry.record_llm(1.5, error=True)
+        registry.record_cache('analysis', True)
+        registry.record_cache('analysis', False)
+        registry.record_cache('analysis', True)
+
+        snapshot = registry.snapshot()
+        parse = snapshot['stages']['parse']
+        self.assertEqual((parse['calls'], parse['errors'], parse['bytes']), (2, 1, 15))
+        self.assertEqual(parse['latency']['count'], 2)
+        self.assertEqual(snapshot['llm']['requests'], 2)
+        self.assertEqual(snapshot['llm']['errors'], 1)
+        self.assertEqual((snapshot['llm']['prompt_tokens'], snapshot['llm']['completion_tokens']), (30, 12))
+        self.assertAlmostEqual(snapshot['caches']['analysis']['hit_rate'], 2 / 3)
+        self.assertEqual(json.loads(registry.to_json())['stages']['parse']['calls'], 2)
+
+        registry.reset()
+        self.assertEqual(registry.snapshot()['stages'], {})
+
+    def test_prometheus_export(self):
+        registry = MetricsRegistry(buckets=(0.5,))
+        registry.record_stage('scan "fast"', 0.25, 100)
+        registry.record_cache('responses', False)
+        text = registry.to_prometheus()
+        self.assertIn('# TYPE testcoveragemaster_stage_seconds_total counter', text)
+        self.assertIn('testcoveragemaster_stage_seconds_total{stage="scan \\"fast\\""} 0.25', text)
+        self.assertIn('testcoveragemaster_stage_duration_seconds_bucket{stage="scan \\"fast\\"",le="0.5"} 1', text)
+        self.assertIn('testcoveragemaster_stage_duration_seconds_bucket{stage="scan \\"fast\\"",le="+Inf"} 1', text)
+        self.assertIn('testcoveragemaster_cache_requests_total{cache="responses",result="hit"} 0', text)
+        self.assertIn('testcoveragemaster_cache_requests_total{cache="responses",result="miss"} 1', text)
+        self.assertIn('testcoveragemaster_llm_requests_total 0', text)
+
+    def test_write_picks_format_from_extension(self):
+        registry = MetricsRegistry()
+        registry.record_stage('analyze_code', 0.1)
+        with tempfile.TemporaryDirectory() as tmp:
+            registry.write(os.path.join(tmp, 'metrics.prom'))
+            registry.write(os.path.join(tmp, 'metrics.json'))
+            with open(os.path.join(tmp, 'metrics.prom')) as handle:
+                self.assertTrue(handle.read().startswith('# HELP'))
+            with open(os.path.join(tmp, 'metrics.json')) as handle:
+                self.assertIn('analyze_code', json.load(handle)['stages'])
+            self.assertEqual(sorted(os.listdir(tmp)), ['metrics.json', 'metrics.prom'])
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        METRICS.reset()
+        clear_memo()
+        self.files = [
+            {'name': 'app/core.py', 'content': "def alpha():\n    return 1\n"},
+            {'name': 'app/core_test.py', 'content': "def test_alpha():\n    assert alpha() == 1\n"},
+        ]
+
+    def test_analyzers_record_stages_and_cache_hits(self):
+        size = sum(len(file['content']) for file in self.files)
+        with tempfile.TemporaryDirectory() as tmp, AnalysisCache(os.path.join(tmp, 'analysis.sqlite')) as cache:
+            analyze_code(self.files, 'Python', cache=cache)
+            analyze_code(self.files, 'Python', cache=cache)
+            analyze_tests(self.files, 'Python')
+        stages = METRICS.snapshot()['stages']
+        self.assertEqual(stages['analyze_code']['calls'], 2)
+        self.assertEqual(stages['analyze_code']['bytes'], 2 * size)
+        self.assertEqual(stages['analyze_tests']['bytes'], size)
+        self.assertEqual(stages['analyze_file']['calls'], 2)
+        self.assertEqual(stages['aggregate_coverage']['calls'], 2)
+        self.assertIn('parse_python', stages)
+        analysis = METRICS.snapshot()['caches']['analysis']
+        self.assertEqual(analysis['hits'], 2)
+
+    def test_llm_requests_record_latency_and_tokens(self):
+        with StubChatCompletionsServer() as server:
+            client = OpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+            with patch('test_generator.client', client):
+                test_generator.generate_tests({'coverage': {'uncovered_functions': ['alpha']}}, {}, 'Python')
+        snapshot = METRICS.snapshot()
+        self.assertEqual(snapshot['stages']['generate_tests']['calls'], 1)
+        self.assertEqual(snapshot['llm']['requests'], 2)
+        self.assertEqual(snapshot['llm']['prompt_tokens'], 20)
+        self.assertEqual(snapshot['llm']['latency']['count'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
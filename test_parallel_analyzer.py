@@ -0,0 +1,45 @@
+import unittest
+from code_analyzer import analyze_code
+from parallel_analyzer import analyze_code_parallel
+
+class TestAnalyzeCodeParallel(unittest.TestCase):
+    def setUp(self):
+        # A small mixed project split across several chunks
+        self.js_files = []
+        for i in range(10):
+            self.js_files.append({
+                'name': f"src/module_{i}.js",
+                'content': f"function handler{i}() {{ button.addEventListener('click', go); }}\n// comment\nconst value{i} = () => {{}};\n"
+            })
+        self.js_files.append({'name': 'src/index.html', 'content': '<div><button onClick="go()">Go</button></div>'})
+        self.py_files = [
+            {'name': f"pkg/mod_{i}.py", 'content': f"def func_{i}():\n    return {i}\n\n# note\ndef test_func_{i}():\n    pass\n"}
+            for i in range(7)
+        ]
+        self.py_files.append({'name': 'README.md', 'content': 'Not python: ('})
+
+    def assertSameCoverage(self, expected, actual):
+        for key in ('total_lines', 'covered_lines', 'uncovered_functions'):
+            self.assertEqual(expected[key], actual[key])
+        for key in ('coverage_percentage', 'unit_coverage', 'functional_coverage'):
+            self.assertAlmostEqual(expected[key], actual[key])
+
+    def test_matches_serial_javascript(self):
+        serial = analyze_code(self.js_files, "JavaScript")['coverage']
+        parallel = analyze_code_parallel(iter(self.js_files), "JavaScript", max_workers=2, chunk_size=3)['coverage']
+        self.assertGreater(serial['functional_coverage'], 0)
+        self.assertSameCoverage(serial, parallel)
+
+    def test_matches_serial_python(self):
+        serial = analyze_code(self.py_files, "Python")['coverage']
+        parallel = analyze_code_parallel(self.py_files, "Python", max_workers=2, chunk_size=2)['coverage']
+        self.assertEqual(serial['total_lines'], 49)
+        self.assertSameCoverage(serial, parallel)
+
+    def test_single_worker_runs_in_process(self):
+        serial = analyze_code(self.py_files, "Python")['coverage']
+        in_process = analyze_code_parallel(self.py_files, "Python", max_workers=1)['coverage']
+        self.assertSameCoverage(serial, in_process)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import ast
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from analysis_cache import AnalysisCache
+from code_analyzer import analyze_code
+from python_symbols import PythonSymbolTable, build_symbol_table, clear_memo, get_symbol_table
+from test_analyzer import analyze_tests
+
+SOURCE = '''import functools
+
+def top():
+    def helper():
+        pass
+    return helper
+
+class Service:
+    @staticmethod
+    def create():
+        pass
+
+    @functools.lru_cache(maxsize=None)
+    async def fetch(self, url):
+        pass
+
+    class Inner:
+        def run(self):
+            pass
+
+if True:
+    try:
+        def guarded():
+            pass
+    except ValueError:
+        def fallback():
+            pass
+
+match top:
+    case _:
+        async def matched():
+            pass
+'''
+
+class TestPythonSymbols(unittest.TestCase):
+    def setUp(self):
+        clear_memo()
+
+    def test_symbols(self):
+        symbols = build_symbol_table(SOURCE).by_name()
+        self.assertEqual(symbols['helper'].qualname, 'top.<locals>.helper')
+        self.assertEqual(symbols['helper'].kind, 'function')
+        self.assertEqual(symbols['create'].qualname, 'Service.create')
+        self.assertEqual(symbols['create'].kind, 'method')
+        self.assertEqual(symbols['create'].decorators, ('staticmethod',))
+        self.assertEqual(symbols['fetch'].kind, 'async_method')
+        self.assertEqual(symbols['fetch'].decorators, ('functools.lru_cache',))
+        self.assertEqual(symbols['run'].qualname, 'Service.Inner.run')
+        self.assertEqual(symbols['matched'].kind, 'async_function')
+        self.assertEqual((symbols['top'].lineno, symbols['top'].end_lineno), (3, 6))
+
+    def test_function_names_match_ast_walk_order(self):
+        tree = ast.parse(SOURCE)
+        expected = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+        self.assertEqual(build_symbol_table(SOURCE).function_names(), expected)
+
+    def test_record_roundtrip(self):
+        table = build_symbol_table(SOURCE)
+        record = table.to_record()
+        self.assertTrue(all(type(fields) is tuple for fields in record))
+        self.assertEqual(PythonSymbolTable.from_record(record), table)
+
+    def test_analyzers_share_one_parse(self):
+        files = [
+            {'name': 'app/service.py', 'content': SOURCE},
+            {'name': 'app/service_test.py', 'content': "def test_top():\n    assert top()\n"},
+        ]
+        with patch('python_symbols.ast.parse', wraps=ast.parse) as parse:
+            analyze_code(files, 'Python')
+            analyze_tests(files, 'Python')
+        self.assertEqual(parse.call_count, 2)
+
+    def test_cached_symbols_skip_parsing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'analysis.sqlite')
+            with AnalysisCache(path) as cache:
+                expected = get_symbol_table(SOURCE, cache)
+            clear_memo()
+            with AnalysisCache(path) as cache, patch('python_symbols.ast.parse') as parse:
+                self.assertEqual(get_symbol_table(SOURCE, cache), expected)
+                parse.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import unittest
+import httpx
+import openai
+from openai import AsyncOpenAI
+from openai_stub import StubChatCompletionsServer
+from rate_limiter import RateLimiter, RetryPolicy, TokenBucket, call_with_retries, retry_after_seconds
+from test_generator import generate_tests_concurrently
+
+class RateLimitedStub(StubChatCompletionsServer):
+    """
+    Stub that answers every n-th request with a 429 and a Retry-After header.
+    """
+
+    def __init__(self, fail_every: int, retry_after: str = '0.05', **kwargs):
+        super().__init__(**kwargs)
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.rejected = 0
+
+    def handle(self, handler, body):
+        if len(self.requests) % self.fail_every == 0:
+            self.rejected += 1
+            self.send_json(handler, 429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                           headers={'Retry-After': self.retry_after})
+            return
+        super().handle(handler, body)
+
+def rate_limit_error(headers):
+    request = httpx.Request('POST', 'http://stub/v1/chat/completions')
+    response = httpx.Response(429, headers=headers, request=request)
+    return openai.RateLimitError('Rate limit reached', response=response, body=None)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refill_and_wait_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=2, clock=clock)
+        bucket.consume(2)
+        self.assertAlmostEqual(bucket.wait_time(1), 1.0)
+        clock.now = 0.5
+        self.assertAlmostEqual(bucket.wait_time(1), 0.5)
+        clock.now = 10
+        self.assertEqual(bucket.wait_time(2), 0)
+        self.assertEqual(bucket.level, 2)
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(600, capacity=10, clock=clock)
+        self.assertEqual(bucket.wait_time(50), 0)
+        bucket.consume(50)
+        self.assertAlmostEqual(bucket.wait_time(50), 5.0)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_per_minute_paces_requests(self):
+        async def run():
+            limiter = RateLimiter(requests_per_minute=600)
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire() for _ in range(14)))
+            return time.monotonic() - start
+
+        # A one second burst (10 requests) is available at once, the other four arrive at 10 per second
+        self.assertGreaterEqual(asyncio.run(run()), 0.35)
+
+    def test_pause_blocks_callers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=6000, clock=clock)
+        self.assertEqual(limiter.wait_time(50), 0)
+        limiter.pause(3)
+        self.assertEqual(limiter.wait_time(50), 3)
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after_seconds(rate_limit_error({'Retry-After': '7'})), 7.0)
+        self.assertEqual(retry_after_seconds(rate_limit_error({'retry-after-ms': '250'})), 0.25)
+        self.assertIsNone(retry_after_seconds(rate_limit_error({})))
+        self.assertIsNone(retry_after_seconds(ValueError()))
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0)
+        self.assertEqual([policy.delay(n, rate_limit_error({})) for n in range(4)], [1.0, 2.0, 4.0, 5.0])
+        self.assertEqual(policy.delay(0, rate_limit_error({'Retry-After': '3'})), 3.0)
+        self.assertTrue(policy.is_retryable(rate_limit_error({})))
+        self.assertFalse(policy.is_retryable(ValueError()))
+
+    def test_gives_up_after_max_retries(self):
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise rate_limit_error({'Retry-After': '0'})
+
+        with self.assertRaises(openai.RateLimitError):
+            asyncio.run(call_with_retries(failing, policy=RetryPolicy(max_retries=2)))
+        self.assertEqual(len(attempts), 3)
+
+class TestGenerationUnderRateLimits(unittest.TestCase):
+    def test_429s_are_retried_instead_of_falling_back(self):
+        functions = [f"func_{i}" for i in range(5)]
+        with RateLimitedStub(fail_every=3) as server:
+            client = AsyncOpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+            unit_tests, integration_tests = generate_tests_concurrently(
+                {'coverage': {'uncovered_functions': functions}}, {}, 'Python',
+                async_client=client, requests_per_minute=6000, retry_policy=RetryPolicy(base_delay=0.01)
+            )
+            self.assertGreater(server.rejected, 0)
+            self.assertEqual(len(server.requests), 10 + server.rejected)
+
+        self.assertNotIn('class TestFunc_', unit_tests)
+        self.assertNotIn('from your_app import', integration_tests)
+        self.assertEqual(unit_tests.count('# Unit Test for'), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'responses.sqlite')
+        self.messages = [{'role': 'user', 'content': 'Write a test for add'}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_depends_on_prompt_and_params(self):
+        key = ResponseCache.make_key(self.messages, 'gpt-3.5-turbo', 0.7, 1000)
+        self.assertEqual(key, ResponseCache.make_key(list(self.messages), 'gpt-3.5-turbo', 0.7, 1000))
+        self.assertNotEqual(key, ResponseCache.make_key(self.messages, 'gpt-3.5-turbo', 0.2, 1000))
+        self.assertNotEqual(key, ResponseCache.make_key(self.messages, 'gpt-4o', 0.7, 1000))
+        other = [{'role': 'user', 'content': 'Write a test for sub'}]
+        self.assertNotEqual(key, ResponseCache.make_key(other, 'gpt-3.5-turbo', 0.7, 1000))
+
+    def test_hits_misses_and_ttl(self):
+        with patch('analysis_cache.time.time', return_value=1000.0):
+            with ResponseCache(self.path, ttl_seconds=60) as cache:
+                self.assertIsNone(cache.get_response(self.messages, 'm', 0.7, 1000))
+                cache.put_response(self.messages, 'm', 0.7, 1000, 'test body')
+                self.assertEqual(cache.get_response(self.messages, 'm', 0.7, 1000), 'test body')
+                self.assertEqual((cache.hits, cache.misses), (1, 1))
+        with patch('analysis_cache.time.time', return_value=1100.0):
+            with ResponseCache(self.path, ttl_seconds=60) as cache:
+                self.assertIsNone(cache.get_response(self.messages, 'm', 0.7, 1000))
+                self.assertEqual(cache.stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from code_analyzer import analyze_code
+from runtime_collector import collect_runtime_coverage, parse_test_command, traced_lines, LineCollector, RuntimeCollectorError
+
+CALC = """def add(a, b):
+    return a + b
+
+def sub(a, b):
+    if a < b:
+        return 0
+    return a - b
+
+def unused():
+    return 1
+"""
+
+TESTS = """import unittest
+from calc import add, sub
+
+class TestCalc(unittest.TestCase):
+    def test_add(self):
+        for i in range(100):
+            self.assertEqual(add(i, 1), i + 1)
+
+    def test_sub(self):
+        self.assertEqual(sub(3, 1), 2)
+
+    def test_fails(self):
+        self.fail("still measured")
+"""
+
+class TestRuntimeCollector(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.write('calc.py', CALC)
+        self.write('test_calc.py', TESTS)
+
+    def write(self, name, content):
+        with open(os.path.join(self.root, name), 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+    def test_parse_test_command(self):
+        self.assertEqual(parse_test_command("pytest -q"), ['-m', 'pytest', '-q'])
+        self.assertEqual(parse_test_command("python3 -m unittest discover"), ['-m', 'unittest', 'discover'])
+        self.assertEqual(parse_test_command("tests/run.py --fast"), ['tests/run.py', '--fast'])
+        with self.assertRaisesRegex(ValueError, "No test command"):
+            parse_test_command("python -m")
+
+    def test_failing_tests_still_measure_coverage(self):
+        report = collect_runtime_coverage(self.root, "-m unittest test_calc")
+        calc = report.lookup('calc.py')
+        # Line 6 (a < b) and the body of unused never ran
+        self.assertEqual(calc.executed, sum(1 << n for n in (1, 2, 4, 5, 7, 9)))
+        self.assertEqual((calc.executable_lines, calc.executed_lines), (8, 6))
+        self.assertEqual(calc.functions, {'add': 1, 'sub': 1, 'unused': 0})
+        self.assertEqual(report.lookup('test_calc.py').functions['test_fails'], 1)
+
+    def test_merged_into_python_analysis(self):
+        report = collect_runtime_coverage(self.root, "-m unittest test_calc")
+        coverage = analyze_code([{'name': 'calc.py', 'content': CALC}], "Python", report=report)['coverage']
+        self.assertEqual((coverage['covered_lines'], coverage['total_lines']), (6, 8))
+        self.assertEqual(coverage['uncovered_functions'], ['unused'])
+
+    def test_command_that_cannot_start(self):
+        with self.assertRaisesRegex(RuntimeCollectorError, "without coverage data"):
+            collect_runtime_coverage(self.root, "-m no_such_module_here")
+
+    def test_settrace_stops_tracing_code_that_has_fully_run(self):
+        code = compile(CALC + "\nfor i in range(3):\n    add(i, 1)\n", os.path.join(self.root, 'calc.py'), 'exec')
+        add = code.co_consts[0]
+        self.assertEqual(traced_lines(add), {2})
+        collector = LineCollector(self.root)
+        sys.settrace(collector.trace_call)
+        try:
+            exec(code, {})
+        finally:
+            sys.settrace(None)
+        self.assertIsNone(collector.tracers[add])
+        self.assertEqual(collector.results()['lines'][code.co_filename], [1, 2, 4, 9, 12, 13])
+        self.assertEqual(collector.results()['functions'][code.co_filename], ['add'])
+
+if __name__ == '__main__':
+    unittest.main()
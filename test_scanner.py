@@ -0,0 +1,73 @@
+import re
+import unittest
+from language_registry import ANGULAR_METHOD_PATTERN, METHOD_PATTERN, PROPERTY_PATTERN
+from scanner import count_code_lines, count_markers, quality_markers, scan_script
+from test_analyzer import analyze_test_quality
+
+class TestScanner(unittest.TestCase):
+    def test_markers_match_str_count(self):
+        content = (
+            "describe('form', () => {\n"
+            "  const spy = jasmine.createSpyObj('svc', ['get']);\n"
+            "  const other = jasmine.createSpy('cb');\n"
+            "  it('submits', () => { submit(); expect(spy.get).toHaveBeenCalled(); });\n"
+            "});\n"
+        )
+        self.assertEqual(count_markers(content, quality_markers('Angular')), {
+            'total_tests': content.count('it('),
+            'assertions': content.count('expect('),
+            'mocks': content.count('jasmine.createSpy') + content.count('jasmine.createSpyObj'),
+            'test_depth': content.count('describe(')
+        })
+        # createSpyObj also contains createSpy, and submit( also contains it(
+        self.assertEqual(count_markers(content, quality_markers('Angular'))['mocks'], 3)
+        self.assertEqual(count_markers(content, quality_markers('Angular'))['total_tests'], 2)
+
+    def test_overlapping_markers_are_counted_independently(self):
+        content = "[TestMethod]\npublic void TestRun() { Assert.Setup(x); mock.Setup(y); }\n"
+        quality = analyze_test_quality([{'name': 'RunTest.cs', 'content': content}], '.NET')
+        self.assertEqual(quality, {'total_tests': 1, 'assertions': 1, 'mocks': 2, 'test_depth': 0})
+
+    def test_scan_script_matches_separate_patterns(self):
+        content = (
+            "// header\n"
+            "function render(view) { return view; }\n"
+            "const handler = (e) => { e.target.addEventListener('x', onClick); };\n"
+            "\n"
+            "test('render', () => { expect(render(1)).toBe(1); });\n"
+            "  describe ('group', () => {});\n"
+        )
+        scan = scan_script(content)
+        self.assertEqual(scan['total_lines'], 7)
+        self.assertEqual(scan['covered_lines'], 4)
+        self.assertEqual(scan['declarations'], [
+            m[1] for m in re.findall(r'(function|const)\s+(\w+)\s*[=]?\s*(\([^)]*\)|)\s*[=]?\s*[{(]', content)
+        ])
+        self.assertEqual(scan['test_calls'], len(re.findall(r'(describe|it|test)\s*\(', content)))
+        self.assertEqual(scan['event_handlers'], len(re.findall(r'(onClick|onSubmit|onChange|addEventListener)', content)))
+
+    def test_declaration_patterns_find_the_same_names(self):
+        content = (
+            "export class FormComponent {\n"
+            "  name: string;\n"
+            "  publicKey: string ;\n"
+            "  public submit(form) {\n"
+            "  private\treset() {}\n"
+            "  publicx(a) {}\n"
+            "  protected static void Save(int id) {\n"
+            "}\n"
+        )
+        unguarded = [
+            (ANGULAR_METHOD_PATTERN, r'(public|private)?\s*(\w+)\s*\([^)]*\)\s*{', 1),
+            (PROPERTY_PATTERN, r'(\w+)\s*:\s*(\w+)\s*;', 0),
+            (METHOD_PATTERN, r'(public|private|protected)?\s*\w+\s+(\w+)\s*\([^)]*\)\s*{', 1)
+        ]
+        for pattern, original, group in unguarded:
+            with self.subTest(pattern=original):
+                self.assertEqual(pattern.findall(content), [m[group] for m in re.findall(original, content)])
+
+    def test_count_code_lines(self):
+        self.assertEqual(count_code_lines("x = 1\n  # comment\n\n\ty = 2", '#'), (4, 2))
+
+if __name__ == '__main__':
+    unittest.main()
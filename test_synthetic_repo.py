@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from code_analyzer import analyze_code
+from synthetic_repo import iter_synthetic_repo, write_synthetic_repo, SOURCE_EXTENSIONS
+from test_analyzer import analyze_tests, is_test_file_name
+from utils import iter_project_files
+
+class TestSyntheticRepo(unittest.TestCase):
+    def test_sizes_and_determinism(self):
+        files = list(iter_synthetic_repo("Python", 101, test_file_ratio=0.2, seed=3))
+        self.assertEqual(len(files), 101)
+        self.assertEqual(sum(is_test_file_name(file['name']) for file in files), 20)
+        self.assertEqual(len({file['name'] for file in files}), 101)
+        self.assertEqual(files, list(iter_synthetic_repo("Python", 101, test_file_ratio=0.2, seed=3)))
+        self.assertNotEqual(files, list(iter_synthetic_repo("Python", 101, test_file_ratio=0.2, seed=4)))
+
+    def test_partial_coverage_for_every_project_type(self):
+        for project_type in SOURCE_EXTENSIONS:
+            with self.subTest(project_type):
+                files = list(iter_synthetic_repo(project_type, 40, functions_per_file=(4, 4)))
+                coverage = analyze_code(files, project_type)['coverage']
+                self.assertGreater(coverage['total_lines'], 0)
+                self.assertGreater(len(coverage['uncovered_functions']), 0)
+                self.assertLess(coverage['coverage_percentage'], 100)
+                quality = analyze_tests(files, project_type)['quality']
+                self.assertEqual(quality['test_depth'], 10)
+                self.assertGreater(quality['total_tests'], 0)
+
+    def test_function_density(self):
+        files = list(iter_synthetic_repo("JavaScript", 8, functions_per_file=(3, 3), test_file_ratio=0))
+        functions = analyze_code(files, "JavaScript")['coverage']['uncovered_functions']
+        self.assertEqual(len(functions), 24)
+
+    def test_write_synthetic_repo(self):
+        files = list(iter_synthetic_repo("Java", 30))
+        with tempfile.TemporaryDirectory() as root:
+            written = write_synthetic_repo(files, root)
+            self.assertEqual(written, sum(len(file['content']) for file in files))
+            self.assertTrue(os.path.isfile(os.path.join(root, 'pkg_0', 'Module0.java')))
+            self.assertEqual(sorted(file['name'] for file in iter_project_files(root)),
+                             sorted(file['name'] for file in files))
+
+if __name__ == '__main__':
+    unittest.main()
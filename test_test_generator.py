@@ -0,0 +1,190 @@
+import math
+import os
+import tempfile
+import unittest
+from openai import AsyncOpenAI, OpenAI
+from openai_stub import StubChatCompletionsServer
+from response_cache import ResponseCache
+from unittest.mock import patch
+from test_generator import (
+    format_generated_test, generate_tests_concurrently, generate_tests_batched, find_function_sources,
+    parse_batch_response, plan_batches
+)
+from test_validator import TestValidator
+
+class TestConcurrentGeneration(unittest.TestCase):
+    def setUp(self):
+        self.functions = [f"func_{i}" for i in range(6)]
+        self.code_analysis = {'coverage': {'uncovered_functions': self.functions}}
+
+    def make_client(self, server):
+        return AsyncOpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+
+    def test_bounded_concurrency_and_ordered_results(self):
+        def reply(body):
+            prompt = body['messages'][-1]['content']
+            test_type = 'unit' if 'a unit test' in prompt else 'integration'
+            name = prompt.split('Function name: ')[1].split()[0]
+            return f"{test_type} body for {name}"
+
+        with StubChatCompletionsServer(reply=reply, delay=0.05) as server:
+            unit_tests, integration_tests = generate_tests_concurrently(
+                self.code_analysis, {}, 'Python', max_concurrency=3, async_client=self.make_client(server)
+            )
+            self.assertEqual(len(server.requests), 12)
+            self.assertLessEqual(server.max_in_flight, 3)
+            self.assertGreater(server.max_in_flight, 1)
+
+        units = unit_tests.split('\n\n')
+        integrations = integration_tests.split('\n\n')
+        for func, unit, integration in zip(self.functions, units, integrations):
+            self.assertEqual(unit, f"# Unit Test for {func} using unittest\nunit body for {func}")
+            self.assertEqual(integration, f"# Integration Test for {func} using pytest\nintegration body for {func}")
+
+    def test_cached_responses_skip_the_api(self):
+        with tempfile.TemporaryDirectory() as tmp, ResponseCache(os.path.join(tmp, 'responses.sqlite')) as cache:
+            with StubChatCompletionsServer() as server:
+                first = generate_tests_concurrently(
+                    self.code_analysis, {}, 'Python', async_client=self.make_client(server), response_cache=cache
+                )
+                second = generate_tests_concurrently(
+                    self.code_analysis, {}, 'Python', async_client=self.make_client(server), response_cache=cache
+                )
+                self.assertEqual(len(server.requests), 12)
+            self.assertEqual(first, second)
+            self.assertEqual(cache.hits, 12)
+
+    def test_progress_counts_functions(self):
+        reports = []
+        with StubChatCompletionsServer() as server:
+            generate_tests_concurrently(
+                self.code_analysis, {}, 'Python', async_client=self.make_client(server),
+                progress=lambda done, total: reports.append((done, total))
+            )
+        self.assertEqual(reports, [(done, 6) for done in range(1, 7)])
+
+    def test_streaming_updates_each_test_as_tokens_arrive(self):
+        def reply(body):
+            return "def test_it():\n    assert compute(1) == 2\n"
+
+        updates = []
+        with StubChatCompletionsServer(reply=reply, chunk_size=5) as server:
+            streamed = generate_tests_concurrently(
+                self.code_analysis, {}, 'Python', async_client=self.make_client(server),
+                on_update=lambda func, test_type, text: updates.append((func, test_type, text))
+            )
+            self.assertTrue(all(body['stream'] for body in server.requests))
+        with StubChatCompletionsServer(reply=reply) as server:
+            whole = generate_tests_concurrently(self.code_analysis, {}, 'Python', async_client=self.make_client(server))
+        self.assertEqual(streamed, whole)
+
+        unit = [text for func, test_type, text in updates if (func, test_type) == ('func_0', 'unit')]
+        # One update per 5-character chunk, then the final test
+        self.assertEqual(len(unit), math.ceil(len(reply(None)) / 5) + 1)
+        self.assertTrue(all(later.startswith(earlier.rstrip()) for earlier, later in zip(unit, unit[1:])))
+        self.assertEqual(unit[-1], streamed[0].split('\n\n')[0])
+
+    def test_streaming_fallback_is_reported(self):
+        updates = []
+        with StubChatCompletionsServer(delay=1.0) as server:
+            unit_tests, _ = generate_tests_concurrently(
+                {'coverage': {'uncovered_functions': ['slow_func']}}, {}, 'Python', timeout=0.2,
+                async_client=self.make_client(server), on_update=lambda *update: updates.append(update)
+            )
+        self.assertIn(('slow_func', 'unit', unit_tests), updates)
+
+    def test_failing_tests_are_regenerated_then_dropped(self):
+        def reply(body):
+            prompt = body['messages'][-1]['content']
+            if 'failed validation' in prompt and 'AssertionError' in prompt:
+                return "```python\nimport unittest\n\nclass TestIt(unittest.TestCase):\n    def test_it(self):\n        pass\n```"
+            return "import unittest\n\nclass TestIt(unittest.TestCase):\n    def test_it(self):\n        assert False\n"
+
+        with TestValidator('Python', max_workers=4) as validator, StubChatCompletionsServer(reply=reply) as server:
+            unit_tests, integration_tests = generate_tests_concurrently(
+                {'coverage': {'uncovered_functions': ['a', 'b']}}, {}, 'Python', async_client=self.make_client(server),
+                validator=validator
+            )
+            self.assertEqual(len(server.requests), 8)
+        self.assertEqual(unit_tests.count("class TestIt"), 2)
+        self.assertNotIn("assert False", unit_tests + integration_tests)
+
+        with TestValidator('Python') as validator, StubChatCompletionsServer(reply=reply) as server:
+            unit_tests, _ = generate_tests_concurrently(
+                {'coverage': {'uncovered_functions': ['a']}}, {}, 'Python', async_client=self.make_client(server),
+                validator=validator, max_validation_attempts=1
+            )
+        self.assertEqual(unit_tests, "")
+
+    def test_format_generated_test(self):
+        self.assertEqual(format_generated_test("```python\nassert f()\n```\n", 'f', 'Python', 'unit'),
+                         "# Unit Test for f using unittest\nassert f()")
+        self.assertEqual(format_generated_test("```\nexpect(f()).toBe(1);\n```", 'f', 'React', 'unit'),
+                         "// Unit Test for f using Jest\nexpect(f()).toBe(1);")
+
+    def test_timeout_falls_back_to_template(self):
+        with StubChatCompletionsServer(delay=1.0) as server:
+            unit_tests, _ = generate_tests_concurrently(
+                {'coverage': {'uncovered_functions': ['slow_func']}}, {}, 'Python',
+                timeout=0.2, async_client=self.make_client(server)
+            )
+        self.assertIn('class TestSlow_func(unittest.TestCase)', unit_tests)
+
+class TestBatchedGeneration(unittest.TestCase):
+    def setUp(self):
+        self.files = [
+            {'name': 'app/math_utils.py', 'content': "def add(a, b):\n    return a + b\n\nasync def fetch(url):\n    return url\n"},
+            {'name': 'web/app.js', 'content': "function render(view) {\n  if (view) { return view; }\n  return null;\n}\nconst other = 1;\n"},
+        ]
+
+    def test_find_function_sources(self):
+        python_sources = find_function_sources(self.files, ['add', 'fetch'], 'Python')
+        self.assertEqual(python_sources['add'], "def add(a, b):\n    return a + b")
+        self.assertEqual(python_sources['fetch'], "async def fetch(url):\n    return url")
+        js_sources = find_function_sources(self.files, ['render'], 'JavaScript')
+        self.assertEqual(js_sources['render'], "function render(view) {\n  if (view) { return view; }\n  return null;\n}")
+
+    def test_plan_batches_respects_limits(self):
+        functions = [f"f{i}" for i in range(12)]
+        self.assertEqual([len(b) for b in plan_batches(functions, {}, 10000, 5)], [5, 5, 2])
+        sources = {'f0': 'x' * 400, 'f1': 'x' * 400}
+        self.assertEqual(plan_batches(['f0', 'f1', 'f2'], sources, 150, 5), [['f0'], ['f1', 'f2']])
+
+    def test_parse_batch_response(self):
+        content = (
+            "### BEGIN UNIT add\n```python\nassert add(1, 2) == 3\n```\n### END UNIT add\n"
+            "    ### BEGIN INTEGRATION add\nassert True\n    ### END INTEGRATION add\n"
+            "### BEGIN UNIT sub\nincomplete"
+        )
+        self.assertEqual(parse_batch_response(content), {
+            ('add', 'unit'): 'assert add(1, 2) == 3',
+            ('add', 'integration'): 'assert True'
+        })
+
+    def test_one_request_per_batch_with_fallback(self):
+        functions = [f"func_{i}" for i in range(10)]
+
+        def reply(body):
+            prompt = body['messages'][-1]['content']
+            names = [line.split(': ')[1] for line in prompt.split('\n') if line.startswith('Function name: ')]
+            # Leave the integration test of func_3 out to exercise the fallback
+            blocks = [f"### BEGIN UNIT {n}\nunit {n}\n### END UNIT {n}" for n in names]
+            blocks += [f"### BEGIN INTEGRATION {n}\nintegration {n}\n### END INTEGRATION {n}" for n in names if n != 'func_3']
+            return "\n".join(blocks)
+
+        with StubChatCompletionsServer(reply=reply) as server:
+            stub_client = OpenAI(base_url=server.base_url, api_key='test-key', max_retries=0)
+            with patch('test_generator.client', stub_client):
+                unit_tests, integration_tests = generate_tests_batched(
+                    {'coverage': {'uncovered_functions': functions}}, {}, 'Python', max_functions_per_batch=5
+                )
+            self.assertEqual(len(server.requests), 2)
+
+        units = unit_tests.split('\n\n')
+        self.assertEqual(units[0], "# Unit Test for func_0 using unittest\nunit func_0")
+        self.assertEqual(len(units), 10)
+        self.assertIn("# Integration Test for func_2 using pytest\nintegration func_2", integration_tests)
+        self.assertIn("# Integration Test for func_3", integration_tests)
+
+if __name__ == '__main__':
+    unittest.main()
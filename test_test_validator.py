@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from test_validator import TestValidator, COMPILED, FAILED, PASSED, SYNTAX_ERROR, TIMEOUT, UNCHECKED
+
+UNIT_TEST = """# Unit Test for double using unittest
+import unittest
+from calc import double
+
+class TestDouble(unittest.TestCase):
+    def test_double(self):
+        self.assertEqual(double(2), {expected})
+"""
+
+class TestTestValidator(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        with open(os.path.join(self.root, 'calc.py'), 'w') as handle:
+            handle.write("def double(x):\n    return 2 * x\n")
+        self.validator = TestValidator('Python', self.root, max_workers=4, timeout=5)
+        self.addCleanup(self.validator.close)
+
+    def test_python_tests_run_against_the_project(self):
+        passed, failed = self.validator.validate_all([UNIT_TEST.format(expected=4), UNIT_TEST.format(expected=5)])
+        self.assertEqual(passed.status, PASSED)
+        self.assertTrue(passed.ok)
+        self.assertEqual(failed.status, FAILED)
+        self.assertFalse(failed.ok)
+        self.assertIn("AssertionError: 4 != 5", failed.message)
+
+    def test_syntax_errors_and_empty_modules(self):
+        result = self.validator.validate("// Unit Test for double using unittest\nassert double(2) == 4\n")
+        self.assertEqual(result.status, SYNTAX_ERROR)
+        self.assertEqual(self.validator.validate("import calc\n").status, FAILED)
+        self.assertIn("no tests ran", self.validator.validate("import calc\n").message)
+
+    def test_single_run_mode(self):
+        # Used where os.fork is not available
+        scratch = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, scratch)
+        path = os.path.join(scratch, 'test_generated.py')
+        for expected, status in ((4, PASSED), (5, FAILED)):
+            with open(path, 'w') as handle:
+                handle.write(UNIT_TEST.format(expected=expected))
+            result = self.validator.run(self.validator.sandbox_command('run', path, 'unittest', '5'), scratch)
+            self.assertEqual(result.status, status)
+
+    def test_pytest_style_tests(self):
+        result = self.validator.validate("from calc import double\n\ndef test_double():\n    assert double(3) == 6\n")
+        self.assertEqual(result.status, PASSED)
+
+    def test_sandbox_limits(self):
+        body = "import unittest\n\nclass TestLimits(unittest.TestCase):\n    def test_it(self):\n        {}\n"
+        validator = TestValidator('Python', self.root, timeout=1, memory_limit=256 * 1024 * 1024)
+        self.addCleanup(validator.close)
+        self.assertEqual(validator.validate(body.format("while True: pass")).status, TIMEOUT)
+        result = validator.validate(body.format("data = bytearray(1024 ** 3)"))
+        self.assertEqual(result.status, FAILED)
+        self.assertIn("MemoryError", result.message)
+        os.environ['VALIDATOR_SECRET'] = 'secret'
+        self.addCleanup(os.environ.pop, 'VALIDATOR_SECRET')
+        check = "self.assertNotIn('VALIDATOR_SECRET', __import__('os').environ)"
+        self.assertEqual(validator.validate(body.format(check)).status, PASSED)
+
+    @unittest.skipUnless(shutil.which('node'), "node is not installed")
+    def test_javascript_syntax_check(self):
+        validator = TestValidator('React')
+        self.addCleanup(validator.close)
+        self.assertEqual(validator.validate("// Unit Test\ntest('x', () => { expect(1).toBe(1); });").status, COMPILED)
+        self.assertEqual(validator.validate("import { f } from './f';\ntest('f', () => f());").status, COMPILED)
+        self.assertEqual(validator.validate("test('x', () => { expect(1).toBe(1); ").status, SYNTAX_ERROR)
+
+    def test_languages_without_a_checker_are_kept(self):
+        validator = TestValidator('Java')
+        self.addCleanup(validator.close)
+        result = validator.validate("class Broken {")
+        self.assertEqual(result.status, UNCHECKED)
+        self.assertTrue(result.ok)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from xml.etree import ElementTree as ET
+from testcoveragemaster import main
+from utils import ProjectFiles
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = self.tmp.name
+        with open(os.path.join(self.project, 'core.py'), 'w') as handle:
+            handle.write("def alpha():\n    return 1\n\ndef beta():\n    return 2\n")
+        with open(os.path.join(self.project, 'core_test.py'), 'w') as handle:
+            handle.write("def test_alpha():\n    assert alpha() == 1\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *args):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = main(['analyze', self.project, '-t', 'Python', '--no-cache', *args])
+        return code, output.getvalue()
+
+    def test_json_report(self):
+        code, output = self.run_cli()
+        self.assertEqual(code, 0)
+        report = json.loads(output)
+        self.assertEqual(report['code_analysis']['coverage']['uncovered_functions'], ['beta', 'test_alpha'])
+        self.assertEqual(report['test_analysis']['quality']['total_tests'], 1)
+        self.assertNotIn('generated_tests', report)
+
+    def test_junit_report_and_threshold(self):
+        code, output = self.run_cli('--format', 'junit', '--fail-under', '90')
+        self.assertEqual(code, 1)
+        suite = ET.fromstring(output).find('testsuite')
+        self.assertEqual(suite.get('tests'), '3')
+        self.assertEqual(suite.get('failures'), '3')
+        names = [case.get('name') for case in suite.iter('testcase')]
+        self.assertEqual(names, ['beta', 'test_alpha', 'coverage_percentage'])
+
+        code, _ = self.run_cli('--format', 'junit', '--fail-under', '50')
+        self.assertEqual(code, 0)
+
+    def test_files_are_streamed_once_per_analysis(self):
+        passes = []
+
+        class CountingProjectFiles(ProjectFiles):
+            def __iter__(self):
+                passes.append(self.path)
+                return super().__iter__()
+
+        with patch('testcoveragemaster.ProjectFiles', CountingProjectFiles):
+            code, _ = self.run_cli()
+        self.assertEqual(code, 0)
+        # One pass for the code analysis and one for the test analysis
+        self.assertEqual(passes, [self.project, self.project])
+
+    def test_memory_mapped_files(self):
+        _, expected = self.run_cli()
+        code, output = self.run_cli('--map-larger-than', '0', '--max-file-size', '0')
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(output), json.loads(expected))
+
+    def test_coverage_report(self):
+        path = os.path.join(self.project, 'lcov.info')
+        with open(path, 'w') as handle:
+            handle.write("SF:/ci/core.py\nFN:1,alpha\nFN:4,beta\nFNDA:1,alpha\nFNDA:1,beta\n"
+                         "DA:1,1\nDA:2,1\nDA:4,1\nDA:5,0\nend_of_record\n")
+        code, output = self.run_cli('--coverage-report', path, '--fail-under', '40')
+        self.assertEqual(code, 0)
+        report = json.loads(output)
+        coverage = report['code_analysis']['coverage']
+        # core.py: 3 of 4 lines executed; core_test.py is not in the report
+        self.assertEqual((coverage['covered_lines'], coverage['total_lines']), (3, 6))
+        self.assertEqual(coverage['measured_files'], 1)
+        self.assertEqual(coverage['uncovered_functions'], ['test_alpha'])
+        self.assertEqual(report['coverage_report'], {'path': path, 'format': 'lcov', 'files': 1})
+
+    def test_run_tests(self):
+        with open(os.path.join(self.project, 'run_tests.py'), 'w') as handle:
+            handle.write("from core import alpha\nalpha()\n")
+        code, output = self.run_cli('--run-tests', 'run_tests.py')
+        self.assertEqual(code, 0)
+        report = json.loads(output)
+        coverage = report['code_analysis']['coverage']
+        # core.py: 3 of 4 lines run; run_tests.py: 2 of 2; core_test.py never ran
+        self.assertEqual((coverage['covered_lines'], coverage['total_lines']), (5, 8))
+        self.assertEqual(coverage['uncovered_functions'], ['beta', 'test_alpha'])
+        self.assertEqual(report['coverage_report'], {'command': 'run_tests.py', 'format': 'runtime', 'files': 2})
+
+    def test_run_tests_is_python_only(self):
+        with patch('sys.stderr', new_callable=io.StringIO), self.assertRaises(SystemExit):
+            main(['analyze', self.project, '-t', 'Java', '--run-tests', 'pytest'])
+
+    def test_base_rejects_workers_and_mapped_files(self):
+        for option in (['-j', '2'], ['--map-larger-than', '0']):
+            with self.subTest(option=option), patch('sys.stderr', new_callable=io.StringIO) as stderr, \
+                    self.assertRaises(SystemExit):
+                main(['analyze', self.project, '-t', 'Python', '--base', 'HEAD', *option])
+            self.assertIn('cannot be combined with --base', stderr.getvalue())
+
+    def test_generated_tests_zip(self):
+        def generate(code_analysis, test_analysis, project_type, artifacts=None, **kwargs):
+            for function_name, source_file in zip(code_analysis['coverage']['uncovered_functions'],
+                                                  code_analysis['coverage']['uncovered_function_files']):
+                artifacts.write(function_name, 'unit', f"# Unit Test for {function_name}\n", source_file)
+            return "", ""
+
+        path = os.path.join(self.project, 'tests.zip')
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}), \
+                patch('test_generator.generate_tests_concurrently', side_effect=generate):
+            code, output = self.run_cli('--generate', '--tests-zip', path)
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(output)['generated_tests'], {'archive': path, 'files': 2})
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(archive.namelist(), ['unit/core/test_beta.py', 'unit/core_test/test_test_alpha.py'])
+
+    def test_metrics_file(self):
+        path = os.path.join(self.project, 'metrics.prom')
+        code, _ = self.run_cli('--metrics', path)
+        self.assertEqual(code, 0)
+        with open(path) as handle:
+            text = handle.read()
+        self.assertIn('testcoveragemaster_stage_calls_total{stage="analyze_code"}', text)
+        self.assertIn('testcoveragemaster_stage_calls_total{stage="analyze_tests"}', text)
+
+    def test_unparsable_files_do_not_stop_the_analysis(self):
+        with open(os.path.join(self.project, 'broken.py'), 'w') as handle:
+            handle.write("def broken(:\n")
+        for options in ([], ['--map-larger-than', '0']):
+            with self.subTest(options=options):
+                code, output = self.run_cli(*options)
+                self.assertEqual(code, 0)
+                coverage = json.loads(output)['code_analysis']['coverage']
+                self.assertEqual(coverage['unparsed_files'], ['broken.py'])
+                self.assertEqual(coverage['uncovered_functions'], ['beta', 'test_alpha'])
+
+    def test_errors_exit_with_status_2(self):
+        path = os.path.join(self.project, 'report.txt')
+        with open(path, 'w') as handle:
+            handle.write("not a coverage report\n")
+        with redirect_stdout(io.StringIO()), patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            code = main(['analyze', self.project, '-t', 'Python', '--no-cache', '--coverage-report', path])
+        self.assertEqual(code, 2)
+        self.assertIn('error:', stderr.getvalue())
+
+    def test_does_not_import_ui_or_sdk(self):
+        script = (
+            "import sys, testcoveragemaster\n"
+            "print(sorted(m for m in ('streamlit', 'pandas', 'plotly', 'openai', 'main') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from test_analyzer import analyze_tests
+from utils import iter_project_files, parse_gitignore, is_ignored, is_archive, read_project_file, ProjectFiles
+
+class TestIterProjectFiles(unittest.TestCase):
+    def setUp(self):
+        # Build a small repository layout on disk
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.files = {
+            '.gitignore': 'secrets/\n*.log\n!keep.log\n',
+            'src/app.js': 'function add(a, b) { return a + b; }\n',
+            'src/app.test.js': "test('add', () => {});\n",
+            'src/debug.log': 'noise\n',
+            'src/keep.log': 'kept\n',
+            'secrets/key.py': 'TOKEN = 1\n',
+            'node_modules/lib/index.js': 'module.exports = {};\n',
+            'src/vendor.min.js': 'var a=1;\n',
+            'big.py': 'x = 1\n' * 100,
+        }
+        for name, content in self.files.items():
+            path = os.path.join(self.root, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as handle:
+                handle.write(content)
+        with open(os.path.join(self.root, 'image.dat'), 'wb') as handle:
+            handle.write(b'\x89PNG\x00\x00binary')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected_names(self):
+        return ['.gitignore', 'src/app.js', 'src/app.test.js', 'src/keep.log']
+
+    def test_directory_walk(self):
+        files = iter_project_files(self.root, max_file_size=200)
+        self.assertFalse(isinstance(files, list))
+        self.assertEqual(sorted(f['name'] for f in files), self.expected_names())
+
+    def test_project_files_walk_again_on_each_pass(self):
+        files = ProjectFiles(self.root, max_file_size=200)
+        first = sorted(f['name'] for f in files)
+        with open(os.path.join(self.root, 'src', 'util.js'), 'w') as handle:
+            handle.write('export const one = 1;\n')
+        self.assertEqual(first, self.expected_names())
+        self.assertEqual(sorted(f['name'] for f in files), sorted(self.expected_names() + ['src/util.js']))
+
+    def test_test_analysis_walks_project_files_once(self):
+        passes = []
+
+        class CountingProjectFiles(ProjectFiles):
+            def __iter__(self):
+                passes.append(self.path)
+                return super().__iter__()
+
+        result = analyze_tests(CountingProjectFiles(self.root, max_file_size=200), 'JavaScript')
+        self.assertEqual(len(passes), 1)
+        self.assertEqual(result['quality']['total_tests'], 1)
+        self.assertEqual(result['functional_coverage']['total_functions'], 1)
+
+    def test_read_project_file_applies_the_walk_rules(self):
+        names = [name for name in self.files if name != 'big.py']
+        cache = {}
+        kept = [name for name in names if read_project_file(self.root, name, 200, gitignore_cache=cache)]
+        self.assertEqual(sorted(kept), self.expected_names())
+        self.assertIsNotNone(read_project_file(self.root, 'secrets/key.py', respect_gitignore=False))
+
+    def test_zip_archive(self):
+        archive_path = os.path.join(self.root, 'repo.zip')
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            for name, content in self.files.items():
+                archive.writestr(f"project-main/{name}", content)
+        self.assertTrue(is_archive(archive_path))
+        names = sorted(f['name'] for f in iter_project_files(archive_path, max_file_size=200))
+        self.assertEqual(names, self.expected_names())
+
+    def test_tar_archive(self):
+        archive_path = os.path.join(self.root, 'repo.tar.gz')
+        with tarfile.open(archive_path, 'w:gz') as archive:
+            for name, content in self.files.items():
+                data = content.encode()
+                info = tarfile.TarInfo(f"project-main/{name}")
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        self.assertTrue(is_archive(archive_path))
+        records = {f['name']: f['content'] for f in iter_project_files(archive_path, max_file_size=200)}
+        self.assertEqual(sorted(records), self.expected_names())
+        self.assertEqual(records['src/app.js'], self.files['src/app.js'])
+
+    def test_gitignore_rules(self):
+        rules = parse_gitignore('build/\n/docs/*.md\n**/tmp\n!docs/keep.md\n')
+        self.assertTrue(is_ignored('build', True, rules))
+        self.assertFalse(is_ignored('build', False, rules))
+        self.assertTrue(is_ignored('docs/readme.md', False, rules))
+        self.assertFalse(is_ignored('docs/keep.md', False, rules))
+        self.assertFalse(is_ignored('src/docs/readme.md', False, rules))
+        self.assertTrue(is_ignored('a/b/tmp', True, rules))
+
+    def test_gitignore_directory_rules(self):
+        anchored = parse_gitignore('/build/\n')
+        self.assertTrue(is_ignored('build', True, anchored))
+        self.assertFalse(is_ignored('src/build', True, anchored))
+        self.assertFalse(is_ignored('build', False, anchored))
+        anywhere = parse_gitignore('build/\n')
+        self.assertTrue(is_ignored('build', True, anywhere))
+        self.assertTrue(is_ignored('src/build', True, anywhere))
+        self.assertFalse(is_ignored('src/build', False, anywhere))
+
+if __name__ == '__main__':
+    unittest.main()
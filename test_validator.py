@@ -0,0 +1,435 @@
+"""
+Validation of generated tests: do they compile, and do the Python ones pass?
+
+    with TestValidator("Python", project_root="path/to/project") as validator:
+        results = validator.validate_all(tests)
+
+Python tests are compiled in-process and then run in isolated processes. Long-lived
+sandbox workers (interpreters in isolated mode, -I, that write no bytecode, with an
+almost empty environment and the project root on sys.path) fork a child per test,
+which runs in a scratch directory with limits on wall clock time, CPU time and address
+space. Forking from a worker that has already imported the test frameworks takes
+milliseconds where starting an interpreter takes a tenth of a second or more; without
+os.fork each test gets a fresh interpreter instead.
+
+JavaScript and TypeScript tests are syntax-checked with node and tsc where those are
+installed; they are not run, as that needs the project's own test runner and
+dependencies. Java and C# tests are left unchecked: compiling them needs the project's
+build.
+
+Up to max_workers tests are validated at once, each worker one test at a time.
+"""
+import asyncio
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional
+from metrics import METRICS
+
+DEFAULT_TEST_TIMEOUT = 10.0
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Characters of test output kept in a ValidationResult
+MAX_MESSAGE_LENGTH = 2000
+
+# Statuses of a ValidationResult. Tests that compiled but could not be run, or that no
+# local toolchain can check, are kept along with the passing ones.
+PASSED = 'passed'
+COMPILED = 'compiled'
+UNCHECKED = 'unchecked'
+FAILED = 'failed'
+SYNTAX_ERROR = 'syntax_error'
+TIMEOUT = 'timeout'
+KEPT_STATUSES = (PASSED, COMPILED, UNCHECKED)
+
+# Environment variables passed to test subprocesses; nothing else (API keys included) is
+SANDBOX_ENV_VARS = ('PATH', 'LANG', 'LC_ALL', 'SYSTEMROOT', 'TZ')
+
+# Python tests written for pytest rather than unittest
+PYTEST_PATTERN = re.compile(r'^(?:import pytest|from pytest\b|@pytest\.|def test_)', re.MULTILINE)
+
+# ES module syntax, which node only accepts in .mjs files
+ES_MODULE_PATTERN = re.compile(r'^(?:import\s[^(]|export\s)', re.MULTILINE)
+
+# tsc diagnostics numbered TS1xxx are syntax errors; the rest need types and imports
+TYPESCRIPT_SYNTAX_ERROR = re.compile(r'error TS1\d{3}:')
+
+# Exit status of a run that found no tests (pytest uses the same)
+NO_TESTS_STATUS = 5
+
+# The Python sandbox. "serve" mode is a long-lived worker (where os.fork exists) that
+# reads [test file, runner, timeout] requests as JSON lines and answers each with the
+# exit code of a forked child that ran the test, or null if the child was killed at
+# its deadline; unittest, pytest and pytest's plugins are imported once, before forking,
+# so each test only pays for its own imports. "run" mode runs a single test in this
+# process. argv: project root, address space limit in bytes, mode, then for "run" the
+# request.
+PYTHON_SANDBOX = r"""
+import importlib, json, os, signal, sys, time, traceback, unittest
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+def limit(memory, timeout):
+    if resource is not None:
+        if memory:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        cpu = int(timeout) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+
+def run_test(path, runner):
+    sys.path.insert(0, os.path.dirname(path))
+    if runner == 'pytest':
+        return pytest.main(['-q', '-x', '-p', 'no:cacheprovider', path])
+    module = importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+    result = unittest.TextTestRunner(stream=sys.stderr, verbosity=0).run(
+        unittest.defaultTestLoader.loadTestsFromModule(module))
+    if not result.testsRun:
+        print('no tests ran', file=sys.stderr)
+        return %(no_tests)d
+    return 0 if result.wasSuccessful() else 1
+
+def run_child(path, runner, timeout, memory):
+    status = 1
+    try:
+        output = os.open(os.path.join(os.path.dirname(path), 'output.txt'), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.dup2(output, 1)
+        os.dup2(output, 2)
+        os.chdir(os.path.dirname(path))
+        limit(memory, timeout)
+        status = run_test(path, runner)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+def wait(pid, timeout):
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        if time.monotonic() >= deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 0.005)
+
+def warm_up():
+    # Run pytest once so that its plugins are imported here rather than in every child
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'test_warm_up.py')
+        with open(path, 'w') as handle:
+            handle.write('def test_warm_up():\n    pass\n')
+        saved = [os.dup(1), os.dup(2)]
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        try:
+            pytest.main(['-q', '-p', 'no:cacheprovider', path])
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved + [devnull]:
+                os.close(fd)
+
+def serve(memory):
+    if pytest is not None:
+        warm_up()
+    for line in sys.stdin:
+        path, runner, timeout = json.loads(line)
+        pid = os.fork()
+        if pid == 0:
+            run_child(path, runner, timeout, memory)
+        print(json.dumps(wait(pid, timeout)), flush=True)
+
+root, memory, mode = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+if root:
+    sys.path.insert(0, root)
+if mode == 'serve':
+    serve(memory)
+else:
+    limit(memory, float(sys.argv[6]))
+    sys.exit(run_test(sys.argv[4], sys.argv[5]))
+""" % {'no_tests': NO_TESTS_STATUS}
+
+# Exit codes of tests stopped by their CPU time limit
+CPU_LIMIT_EXIT_CODES = (-signal.SIGXCPU,) if hasattr(signal, 'SIGXCPU') else ()
+
+class ValidationResult(NamedTuple):
+    """
+    The outcome of validating one test: a status and the compiler or test output.
+    """
+    status: str
+    message: str = ''
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the test is kept: it passed, or it could not be disproved.
+        """
+        return self.status in KEPT_STATUSES
+
+def validator_language(project_type: str) -> Optional[str]:
+    """
+    Return the language validate() checks tests of the project type as, if any.
+    """
+    if project_type == 'Python':
+        return 'Python'
+    if project_type in ('JavaScript', 'React'):
+        return 'JavaScript'
+    if project_type == 'Angular':
+        return 'TypeScript'
+    return None
+
+@lru_cache(maxsize=None)
+def find_tool(name: str) -> Optional[str]:
+    """
+    Return the path of an executable on PATH, looked up once.
+    """
+    return shutil.which(name)
+
+@lru_cache(maxsize=None)
+def has_pytest() -> bool:
+    """
+    Return whether pytest can be imported by the test subprocesses.
+    """
+    return subprocess.run([sys.executable, '-I', '-c', 'import pytest'], stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).returncode == 0
+
+def sandbox_env() -> Dict[str, str]:
+    """
+    Return the environment of test subprocesses.
+    """
+    return {name: os.environ[name] for name in SANDBOX_ENV_VARS if name in os.environ}
+
+def truncate(output: str) -> str:
+    """
+    Keep the end of a tool's output, where the error usually is.
+    """
+    output = output.strip()
+    return output if len(output) <= MAX_MESSAGE_LENGTH else '...' + output[-MAX_MESSAGE_LENGTH:]
+
+class TestValidator:
+    """
+    Validates generated tests of one project type, up to max_workers at a time.
+
+    validate() checks a single test and can be called from several threads;
+    validate_all() and validate_async() run validations on the validator's own pool of
+    max_workers threads, each driving one test subprocess. Use the validator as a
+    context manager, or call close(), to shut the pool down.
+    """
+    __test__ = False  # not a test case, despite the name
+
+    def __init__(self, project_type: str, project_root: Optional[str] = None, max_workers: Optional[int] = None,
+                 timeout: float = DEFAULT_TEST_TIMEOUT, memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT):
+        self.language = validator_language(project_type)
+        self.project_root = os.path.abspath(project_root) if project_root else None
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                            thread_name_prefix='validate')
+        # Sandbox workers, started as validations need them
+        self._workers: List[SandboxWorker] = []
+        self._idle_workers: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'TestValidator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+    def validate_all(self, tests: List[str]) -> List[ValidationResult]:
+        """
+        Validate several tests concurrently, returning their results in order.
+        """
+        return list(self._executor.map(self.validate, tests))
+
+    async def validate_async(self, test: str) -> ValidationResult:
+        """
+        Validate a test on the validator's pool without blocking the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.validate, test)
+
+    def validate(self, test: str) -> ValidationResult:
+        """
+        Validate one generated test.
+        """
+        if not test.strip():
+            return ValidationResult(FAILED, "The test is empty")
+        with METRICS.stage('validate_test', len(test)):
+            if self.language == 'Python':
+                return self.validate_python(test)
+            if self.language == 'JavaScript':
+                return self.check_javascript(test)
+            if self.language == 'TypeScript':
+                return self.check_typescript(test)
+            return ValidationResult(UNCHECKED)
+
+    def validate_python(self, code: str) -> ValidationResult:
+        """
+        Compile a Python test, then run it in a sandboxed subprocess.
+        """
+        try:
+            compile(code, 'test_generated.py', 'exec', dont_inherit=True)
+        except (SyntaxError, ValueError) as e:
+            return ValidationResult(SYNTAX_ERROR, f"{type(e).__name__}: {str(e)}")
+
+        runner = 'pytest' if PYTEST_PATTERN.search(code) else 'unittest'
+        if runner == 'pytest' and not has_pytest():
+            return ValidationResult(COMPILED, "pytest is not installed")
+        with tempfile.TemporaryDirectory(prefix='testcoveragemaster-') as scratch:
+            path = os.path.join(scratch, 'test_generated.py')
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(code)
+            if not hasattr(os, 'fork'):
+                return self.run(self.sandbox_command('run', path, runner, str(self.timeout)), scratch)
+
+            worker = self.checkout_worker()
+            try:
+                exit_code = worker.run(path, runner, self.timeout)
+            except OSError as e:
+                worker.close()
+                return ValidationResult(FAILED, f"The sandbox worker stopped: {str(e)}")
+            self._idle_workers.put(worker)
+            with open(os.path.join(scratch, 'output.txt'), encoding='utf-8', errors='replace') as output:
+                message = truncate(output.read())
+        return self.classify(exit_code, message)
+
+    def sandbox_command(self, mode: str, *request: str) -> List[str]:
+        return [sys.executable, '-I', '-B', '-c', PYTHON_SANDBOX, self.project_root or '', str(self.memory_limit or 0), mode,
+                *request]
+
+    def checkout_worker(self) -> 'SandboxWorker':
+        """
+        Take an idle sandbox worker, starting one if all are busy.
+        """
+        try:
+            return self._idle_workers.get_nowait()
+        except queue.Empty:
+            worker = SandboxWorker(self.sandbox_command('serve'))
+            with self._lock:
+                self._workers.append(worker)
+            return worker
+
+    def classify(self, exit_code: Optional[int], message: str) -> ValidationResult:
+        """
+        Turn the exit code of a test run (None if it was killed at its deadline) into a result.
+        """
+        if exit_code is None or exit_code in CPU_LIMIT_EXIT_CODES:
+            return ValidationResult(TIMEOUT, f"The test did not finish within {self.timeout:g} seconds")
+        if exit_code == 0:
+            return ValidationResult(PASSED, message)
+        if exit_code < 0:
+            message = f"The test was killed by signal {-exit_code}\n{message}".strip()
+        return ValidationResult(FAILED, message)
+
+    def check_javascript(self, code: str) -> ValidationResult:
+        """
+        Syntax-check a JavaScript test with node --check.
+        """
+        node = find_tool('node')
+        if node is None:
+            return ValidationResult(UNCHECKED, "node is not installed")
+        extension = '.mjs' if ES_MODULE_PATTERN.search(code) else '.js'
+        return self.check_file(code, extension, lambda path: [node, '--check', path])
+
+    def check_typescript(self, code: str) -> ValidationResult:
+        """
+        Syntax-check a TypeScript test with tsc; only syntax errors (TS1xxx) count.
+        """
+        tsc = find_tool('tsc')
+        if tsc is None:
+            return ValidationResult(UNCHECKED, "tsc is not installed")
+        result = self.check_file(code, '.tsx' if '</' in code else '.ts', lambda path: [
+            tsc, '--noEmit', '--noResolve', '--noLib', '--skipLibCheck', '--jsx', 'preserve', path
+        ])
+        if result.status == SYNTAX_ERROR and not TYPESCRIPT_SYNTAX_ERROR.search(result.message):
+            return ValidationResult(COMPILED)
+        return result
+
+    def check_file(self, code: str, extension: str, command: Callable[[str], List[str]]) -> ValidationResult:
+        """
+        Write a test to a scratch file and run a syntax checker on it.
+        """
+        with tempfile.TemporaryDirectory(prefix='testcoveragemaster-') as scratch:
+            path = os.path.join(scratch, 'generated.test' + extension)
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(code)
+            result = self.run(command(path), scratch)
+        if result.status == FAILED:
+            return ValidationResult(SYNTAX_ERROR, result.message)
+        return ValidationResult(COMPILED) if result.status == PASSED else result
+
+    def run(self, command: List[str], cwd: str) -> ValidationResult:
+        """
+        Run a validation command in the sandbox and classify its outcome.
+        """
+        try:
+            completed = subprocess.run(command, cwd=cwd, env=sandbox_env(), stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return self.classify(None, '')
+        return self.classify(completed.returncode, truncate(completed.stdout.decode('utf-8', errors='replace')))
+
+class SandboxWorker:
+    """
+    A long-lived sandbox process that runs one test at a time, each in a forked child.
+    """
+    def __init__(self, command: List[str]):
+        self.process = subprocess.Popen(command, cwd=tempfile.gettempdir(), env=sandbox_env(), stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    def run(self, path: str, runner: str, timeout: float) -> Optional[int]:
+        """
+        Run a test file and return its exit code, or None if it was killed at the timeout.
+
+        Raises OSError if the worker is no longer running.
+        """
+        self.process.stdin.write(json.dumps([path, runner, timeout]) + "\n")
+        self.process.stdin.flush()
+        reply = self.process.stdout.readline()
+        if not reply:
+            raise OSError(f"exit status {self.process.wait()}")
+        return json.loads(reply)
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()
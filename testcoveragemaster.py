@@ -0,0 +1,240 @@
+"""
+Headless entry point for CI and batch use.
+
+    python -m testcoveragemaster analyze <path> --project-type Python --format json
+
+Only the analysis modules are imported; the Streamlit UI is never loaded and the OpenAI
+SDK is loaded only when --generate is given.
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from analysis_cache import AnalysisCache
+from code_analyzer import analyze_code
+from coverage_reports import load_coverage_report, REPORT_FORMATS
+from metrics import METRICS
+from test_analyzer import analyze_tests
+from utils import ProjectFiles, DEFAULT_MAX_FILE_SIZE
+
+PROJECT_TYPES = ["JavaScript", "Angular", "React", "Python", "Java", ".NET"]
+OUTPUT_FORMATS = ('json', 'junit')
+
+# Same default as test_generator.DEFAULT_MAX_CONCURRENCY, which is not imported up front
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Exit codes: analysis succeeded, coverage below --fail-under, analysis failed
+EXIT_OK = 0
+EXIT_BELOW_THRESHOLD = 1
+EXIT_ERROR = 2
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line interface and return its exit code.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.generate and not os.getenv("OPENAI_API_KEY"):
+        parser.error("--generate requires the OPENAI_API_KEY environment variable")
+    if args.validate and not args.generate:
+        parser.error("--validate requires --generate")
+    if args.tests_zip and not args.generate:
+        parser.error("--tests-zip requires --generate")
+    if args.run_tests and args.project_type != "Python":
+        parser.error("--run-tests is only supported for Python projects")
+    if args.run_tests and not os.path.isdir(args.path):
+        parser.error("--run-tests requires a project directory")
+    if args.base and args.workers > 1:
+        parser.error("--workers cannot be combined with --base")
+    if args.base and args.map_larger_than is not None:
+        parser.error("--map-larger-than cannot be combined with --base")
+
+    try:
+        result = run_analysis(args)
+    except Exception as e:
+        print(f"error: {str(e)}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if args.metrics:
+            METRICS.write(args.metrics)
+
+    output = format_junit(result) if args.format == 'junit' else format_json(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(output)
+    else:
+        sys.stdout.write(output)
+
+    return EXIT_OK if result['passed'] else EXIT_BELOW_THRESHOLD
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='testcoveragemaster', description="Analyze test coverage without the web UI.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help="analyze a file, directory or .zip/.tar.gz archive")
+    analyze.add_argument('path', help="file, project directory or archive to analyze")
+    analyze.add_argument('-t', '--project-type', required=True, choices=PROJECT_TYPES)
+    analyze.add_argument('-f', '--format', default='json', choices=OUTPUT_FORMATS, help="output format (default: json)")
+    analyze.add_argument('-o', '--output', help="write the report to this file instead of stdout")
+    analyze.add_argument('--base', help="git base commit; analyze incrementally, re-reading only files changed since the last run")
+    analyze.add_argument('-j', '--workers', type=int, default=1, help="analysis worker processes (default: 1)")
+    analyze.add_argument('--no-cache', action='store_true', help="do not read or write the analysis cache")
+    analyze.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_SIZE,
+                         help="skip files larger than this many bytes")
+    analyze.add_argument('--map-larger-than', type=int, metavar='BYTES',
+                         help="scan files larger than this many bytes through a memory map instead of reading "
+                              "them (such files are not skipped by --max-file-size)")
+    measurement = analyze.add_mutually_exclusive_group()
+    measurement.add_argument('--coverage-report', metavar='PATH',
+                             help="take line and function coverage from an lcov, Cobertura, JaCoCo or coverage.py report")
+    measurement.add_argument('--run-tests', metavar='COMMAND',
+                             help="measure line coverage by running this Python test command in the project "
+                                  "directory, e.g. 'pytest -q'")
+    analyze.add_argument('--coverage-format', choices=REPORT_FORMATS,
+                         help="format of --coverage-report (default: detected from its contents)")
+    analyze.add_argument('--generate', action='store_true', help="generate tests for uncovered functions with OpenAI")
+    analyze.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY, help="concurrent OpenAI requests with --generate")
+    analyze.add_argument('--validate', action='store_true',
+                         help="with --generate, compile generated tests and run the Python ones, regenerating or "
+                              "dropping those that fail")
+    analyze.add_argument('--tests-zip',
+                         help="with --generate, write each generated test to its own file in this zip archive, laid "
+                              "out like the source tree, instead of into the report")
+    analyze.add_argument('--fail-under', type=float,
+                         help="exit with status 1 if the coverage percentage is below this value")
+    analyze.add_argument('--metrics', help="write per-stage timings to this file (Prometheus text if it ends in .prom, else JSON)")
+    return parser
+
+def run_analysis(args: argparse.Namespace) -> Dict:
+    """
+    Run analysis (and optionally test generation) and return the report dictionary.
+    """
+    report = None
+    if args.coverage_report:
+        report = load_coverage_report(args.coverage_report, args.coverage_format)
+    elif args.run_tests:
+        # Deferred like the other optional stages; it starts the test suite in a subprocess
+        from runtime_collector import collect_runtime_coverage
+        report = collect_runtime_coverage(args.path, args.run_tests)
+
+    with AnalysisCache() if not args.no_cache else nullcontext() as cache:
+        # Incremental and parallel analysis pull in subprocess and multiprocessing, so they
+        # are only imported when asked for
+        if args.base:
+            from incremental import analyze_incremental
+            incremental = analyze_incremental(args.path, args.project_type, base_commit=args.base, cache=cache,
+                                              max_file_size=args.max_file_size, report=report)
+            code_analysis = incremental['code_analysis']
+            test_analysis = incremental['test_analysis']
+        else:
+            # Walked again by each analysis, so only one file is in memory at a time
+            files = ProjectFiles(args.path, args.max_file_size, mapped_file_size=args.map_larger_than)
+            if args.workers > 1:
+                from parallel_analyzer import analyze_code_parallel
+                code_analysis = analyze_code_parallel(files, args.project_type, max_workers=args.workers, cache=cache,
+                                                      report=report)
+            else:
+                code_analysis = analyze_code(files, args.project_type, cache=cache, report=report)
+            test_analysis = analyze_tests(files, args.project_type, cache=cache)
+
+    result = {
+        'path': args.path,
+        'project_type': args.project_type,
+        'code_analysis': code_analysis,
+        'test_analysis': test_analysis,
+        'passed': True
+    }
+    if args.coverage_report:
+        result['coverage_report'] = {'path': args.coverage_report, 'format': report.format, 'files': len(report)}
+    elif args.run_tests:
+        result['coverage_report'] = {'command': args.run_tests, 'format': report.format, 'files': len(report)}
+    if args.fail_under is not None:
+        result['fail_under'] = args.fail_under
+        result['passed'] = code_analysis['coverage']['coverage_percentage'] >= args.fail_under
+
+    if args.generate:
+        # Deferred so that plain analysis never loads the OpenAI SDK
+        from response_cache import ResponseCache
+        from test_generator import generate_tests_concurrently
+        from test_validator import TestValidator
+        from artifact_writer import TestArtifactWriter
+        project_root = args.path if os.path.isdir(args.path) else None
+        with ResponseCache() if not args.no_cache else nullcontext() as response_cache, \
+                TestValidator(args.project_type, project_root) if args.validate else nullcontext() as validator, \
+                TestArtifactWriter(args.project_type, args.tests_zip) if args.tests_zip else nullcontext() as artifacts:
+            unit_tests, integration_tests = generate_tests_concurrently(
+                code_analysis, test_analysis, args.project_type, max_concurrency=args.max_concurrency,
+                response_cache=response_cache, validator=validator, artifacts=artifacts
+            )
+        if artifacts is not None:
+            result['generated_tests'] = {'archive': args.tests_zip, 'files': len(artifacts.artifacts)}
+        else:
+            result['generated_tests'] = {'unit': unit_tests, 'integration': integration_tests}
+
+    return result
+
+def format_json(result: Dict) -> str:
+    """
+    Render the report as JSON.
+    """
+    return json.dumps(result, indent=2, sort_keys=True) + "\n"
+
+def format_junit(result: Dict) -> str:
+    """
+    Render the report as JUnit-style XML.
+
+    Every uncovered function becomes a failed test case, the coverage threshold (if any)
+    a test case of its own, and the metrics are attached as suite properties.
+    """
+    from xml.etree import ElementTree as ET
+
+    coverage = result['code_analysis']['coverage']
+    quality = result['test_analysis']['quality']
+    functional = result['test_analysis']['functional_coverage']
+    suite = ET.Element('testsuite', name=f"testcoveragemaster.{result['project_type']}")
+
+    properties = ET.SubElement(suite, 'properties')
+    metrics = [
+        ('coverage_percentage', coverage['coverage_percentage']),
+        ('total_lines', coverage['total_lines']),
+        ('covered_lines', coverage['covered_lines']),
+        ('unit_coverage', coverage['unit_coverage']),
+        ('functional_coverage', coverage['functional_coverage']),
+        ('test_functional_coverage_percentage', functional['coverage_percentage'])
+    ] + [(f"test_{key}", value) for key, value in quality.items()]
+    for name, value in metrics:
+        ET.SubElement(properties, 'property', name=name, value=str(value))
+
+    failures = 0
+    cases = 0
+    for function_name in coverage['uncovered_functions']:
+        case = ET.SubElement(suite, 'testcase', classname='uncovered_functions', name=function_name)
+        ET.SubElement(case, 'failure', type='UncoveredFunction', message=f"No test found for {function_name}")
+        cases += 1
+        failures += 1
+
+    if 'fail_under' in result:
+        case = ET.SubElement(suite, 'testcase', classname='thresholds', name='coverage_percentage')
+        cases += 1
+        if not result['passed']:
+            ET.SubElement(case, 'failure', type='CoverageBelowThreshold', message=(
+                f"Coverage {coverage['coverage_percentage']:.2f}% is below {result['fail_under']:.2f}%"
+            ))
+            failures += 1
+
+    if 'generated_tests' in result and 'archive' not in result['generated_tests']:
+        system_out = ET.SubElement(suite, 'system-out')
+        system_out.text = "\n\n".join(result['generated_tests'].values())
+
+    suite.set('tests', str(cases))
+    suite.set('failures', str(failures))
+    suite.set('errors', '0')
+    root = ET.Element('testsuites', tests=str(cases), failures=str(failures), errors='0')
+    root.append(suite)
+    ET.indent(root)
+    return ET.tostring(root, encoding='unicode', xml_declaration=True) + "\n"
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,40 @@
-from typing import List, Dict
+import os
+import posixpath
+import re
+import tarfile
+import zipfile
+from typing import List, Dict, Iterator, Optional, Tuple
+
+# Files larger than this are skipped during repository ingestion
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Number of leading bytes inspected when deciding whether a file is binary
+BINARY_SNIFF_BYTES = 8192
+
+# Directories holding third-party, generated or VCS content that is never analyzed
+VENDORED_DIRS = frozenset([
+    '.git', '.hg', '.svn', 'node_modules', 'bower_components', 'jspm_packages',
+    'vendor', 'third_party', 'site-packages', '__pycache__', '.venv', 'venv',
+    '.tox', '.nox', '.mypy_cache', '.pytest_cache', '.angular', 'dist', 'build',
+    'target', 'bin', 'obj', 'coverage', '.idea', '.vscode'
+])
+
+# Extensions that are known to be binary, so they can be skipped without reading them
+BINARY_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.svgz', '.webp', '.pdf',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war', '.ear',
+    '.class', '.dll', '.exe', '.so', '.dylib', '.o', '.a', '.lib', '.pyc', '.pyo',
+    '.whl', '.egg', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4',
+    '.mov', '.avi', '.wav', '.db', '.sqlite', '.nupkg', '.pdb'
+)
+
+# Bundled or minified assets that are vendored in practice
+MINIFIED_SUFFIXES = ('.min.js', '.min.css', '.bundle.js', '.map')
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# A gitignore rule: (base directory, compiled pattern, negated, directory only)
+IgnoreRule = Tuple[str, re.Pattern, bool, bool]
 
 def process_upload(file_content: str) -> List[Dict]:
     """
@@ -14,6 +50,409 @@ def process_upload(file_content: str) -> List[Dict]:
     
     return processed_files
 
+def is_archive(path: str) -> bool:
+    """
+    Check if the path points to a supported repository archive (.zip or tarball).
+    """
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+def iter_project_files(path: str, max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                       respect_gitignore: bool = True, mapped_file_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Lazily yield file dictionaries for every analyzable file in a directory, .zip or tarball.
+
+    Records use the same {'name', 'content'} shape as process_upload, with 'name' set to the
+    POSIX path relative to the repository root. Vendored trees, binaries, files matched by
+    .gitignore and files larger than max_file_size are skipped, and only one file is held
+    in memory at a time.
+
+    When mapped_file_size is given, files on disk (not archive members) larger than it are
+    not read at all: they are yielded as {'name', 'path', 'size'} records, which the code
+    analyzer scans through a memory map (see mapped_scanner), whatever max_file_size is.
+    """
+    if os.path.isdir(path):
+        return _walk_directory(path, max_file_size, respect_gitignore, mapped_file_size)
+    if zipfile.is_zipfile(path):
+        return _walk_zip(path, max_file_size, respect_gitignore)
+    if tarfile.is_tarfile(path):
+        return _walk_tar(path, max_file_size, respect_gitignore)
+    return _read_single_file(path, max_file_size, mapped_file_size)
+
+class ProjectFiles:
+    """
+    The files of a directory, .zip or tarball, walked again with iter_project_files on every iteration.
+
+    Analyses that go over a repository several times (fingerprinting, code, tests, test
+    sources) take one of these instead of a list, so no more than one file is held in
+    memory at a time, at the cost of reading the files once per pass.
+    """
+
+    def __init__(self, path: str, max_file_size: int = DEFAULT_MAX_FILE_SIZE, respect_gitignore: bool = True,
+                 mapped_file_size: Optional[int] = None):
+        self.path = path
+        self.max_file_size = max_file_size
+        self.respect_gitignore = respect_gitignore
+        self.mapped_file_size = mapped_file_size
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter_project_files(self.path, self.max_file_size, self.respect_gitignore, self.mapped_file_size)
+
+def is_skipped_path(rel_path: str) -> bool:
+    """
+    Check if a relative path lives in a vendored tree or names a binary or minified file.
+    """
+    parts = rel_path.split('/')
+    if any(part in VENDORED_DIRS for part in parts[:-1]):
+        return True
+    lower_name = parts[-1].lower()
+    return lower_name.endswith(BINARY_EXTENSIONS) or lower_name.endswith(MINIFIED_SUFFIXES)
+
+def is_binary(data: bytes) -> bool:
+    """
+    Check if a chunk of file data looks binary (contains a NUL byte).
+    """
+    return b'\0' in data[:BINARY_SNIFF_BYTES]
+
+def decode_content(data: bytes) -> str:
+    """
+    Decode raw file bytes as UTF-8, replacing undecodable sequences.
+    """
+    return data.decode('utf-8', errors='replace')
+
+def read_file_content(file: Dict) -> str:
+    """
+    Return the content of a file record, reading the file of a memory-mapped record.
+    """
+    if 'content' in file:
+        return file['content']
+    with open(file['path'], 'rb') as handle:
+        return decode_content(handle.read())
+
+def parse_gitignore(text: str, base_dir: str = '') -> List[IgnoreRule]:
+    """
+    Parse the contents of a .gitignore file into an ordered list of ignore rules.
+
+    base_dir is the POSIX path of the directory holding the .gitignore, relative to the
+    repository root ('' for the root itself).
+    """
+    rules = []
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # Patterns with a leading or inner slash are relative to the .gitignore; others match at any depth
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if not line:
+            continue
+        body = _translate_glob(line)
+        regex = '^' + body + '$' if anchored else '^(?:.*/)?' + body + '$'
+        rules.append((base_dir, re.compile(regex), negated, dir_only))
+    return rules
+
+def is_ignored(rel_path: str, is_dir: bool, rules: List[IgnoreRule]) -> bool:
+    """
+    Check a single path against gitignore rules; the last matching rule wins.
+    """
+    ignored = False
+    for base_dir, pattern, negated, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if base_dir:
+            if not rel_path.startswith(base_dir + '/'):
+                continue
+            candidate = rel_path[len(base_dir) + 1:]
+        else:
+            candidate = rel_path
+        if pattern.match(candidate):
+            ignored = not negated
+    return ignored
+
+def _translate_glob(pattern: str) -> str:
+    """
+    Translate a gitignore glob into a regular expression body.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                char_class = pattern[i + 1:end]
+                if char_class.startswith('!'):
+                    char_class = '^' + char_class[1:]
+                out.append('[' + char_class.replace('\\', '\\\\') + ']')
+                i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+def _is_ignored_with_parents(rel_path: str, rules: List[IgnoreRule], dir_cache: Dict[str, bool]) -> bool:
+    """
+    Check a file path and each of its parent directories against gitignore rules.
+    """
+    parts = rel_path.split('/')
+    for depth in range(1, len(parts)):
+        dir_path = '/'.join(parts[:depth])
+        if dir_path not in dir_cache:
+            dir_cache[dir_path] = is_ignored(dir_path, True, rules)
+        if dir_cache[dir_path]:
+            return True
+    return is_ignored(rel_path, False, rules)
+
+def _walk_directory(root: str, max_file_size: int, respect_gitignore: bool,
+                    mapped_file_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Walk a directory tree, pruning vendored and ignored directories before descending.
+    """
+    rules_by_dir = {root: []}
+    for dirpath, dirnames, filenames in os.walk(root):
+        rules = rules_by_dir.pop(dirpath, [])
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        rel_dir = '' if rel_dir == '.' else rel_dir
+
+        if respect_gitignore and '.gitignore' in filenames:
+            try:
+                with open(os.path.join(dirpath, '.gitignore'), 'r', encoding='utf-8', errors='replace') as handle:
+                    rules = rules + parse_gitignore(handle.read(), rel_dir)
+            except OSError:
+                pass
+
+        kept_dirs = []
+        for dirname in sorted(dirnames):
+            rel_path = f"{rel_dir}/{dirname}" if rel_dir else dirname
+            if dirname in VENDORED_DIRS or (rules and is_ignored(rel_path, True, rules)):
+                continue
+            kept_dirs.append(dirname)
+            rules_by_dir[os.path.join(dirpath, dirname)] = rules
+        dirnames[:] = kept_dirs
+
+        for filename in sorted(filenames):
+            rel_path = f"{rel_dir}/{filename}" if rel_dir else filename
+            if is_skipped_path(rel_path) or (rules and is_ignored(rel_path, False, rules)):
+                continue
+            record = _file_record(os.path.join(dirpath, filename), rel_path, max_file_size, mapped_file_size)
+            if record is not None:
+                yield record
+
+def read_project_file(root: str, rel_path: str, max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                      respect_gitignore: bool = True,
+                      gitignore_cache: Optional[Dict[str, List[IgnoreRule]]] = None) -> Optional[Dict]:
+    """
+    Read one repository file into a file dictionary, applying the same skip rules as
+    iter_project_files, .gitignore files included. Returns None if the file is missing or skipped.
+
+    When reading several files of one root, pass the same gitignore_cache dict so each
+    directory's .gitignore is parsed once.
+    """
+    if is_skipped_path(rel_path):
+        return None
+    if respect_gitignore:
+        rules = _directory_rules(root, posixpath.dirname(rel_path), {} if gitignore_cache is None else gitignore_cache)
+        if rules and _is_ignored_with_parents(rel_path, rules, {}):
+            return None
+    content = _read_text_file(os.path.join(root, *rel_path.split('/')), max_file_size)
+    if content is None:
+        return None
+    return {'name': rel_path, 'content': content}
+
+def _directory_rules(root: str, rel_dir: str, cache: Dict[str, List[IgnoreRule]]) -> List[IgnoreRule]:
+    """
+    Return the rules of the .gitignore files in a directory and all its parents, as _walk_directory applies them.
+    """
+    if rel_dir in cache:
+        return cache[rel_dir]
+    rules = _directory_rules(root, posixpath.dirname(rel_dir), cache) if rel_dir else []
+    try:
+        with open(os.path.join(root, *rel_dir.split('/'), '.gitignore'), 'r', encoding='utf-8',
+                  errors='replace') as handle:
+            rules = rules + parse_gitignore(handle.read(), rel_dir)
+    except OSError:
+        pass
+    cache[rel_dir] = rules
+    return rules
+
+def _file_record(full_path: str, name: str, max_file_size: int, mapped_file_size: Optional[int]) -> Optional[Dict]:
+    """
+    Return the record of a file on disk: read if it is small enough, a path record if it
+    is larger than mapped_file_size, or None if it is missing, skipped or binary.
+    """
+    if mapped_file_size is not None:
+        try:
+            size = os.path.getsize(full_path) if os.path.isfile(full_path) else None
+            if size is not None and size > mapped_file_size:
+                with open(full_path, 'rb') as handle:
+                    head = handle.read(BINARY_SNIFF_BYTES)
+                return None if is_binary(head) else {'name': name, 'path': full_path, 'size': size}
+        except OSError:
+            return None
+    content = _read_text_file(full_path, max_file_size)
+    if content is None:
+        return None
+    return {'name': name, 'content': content}
+
+def _read_text_file(full_path: str, max_file_size: int) -> Optional[str]:
+    """
+    Read and decode a file, returning None if it is missing, too large or binary.
+    """
+    try:
+        if not os.path.isfile(full_path) or os.path.getsize(full_path) > max_file_size:
+            return None
+        with open(full_path, 'rb') as handle:
+            data = handle.read()
+    except OSError:
+        return None
+    if is_binary(data):
+        return None
+    return decode_content(data)
+
+def _archive_prefix(names: List[str]) -> str:
+    """
+    Return the single top-level directory shared by all archive members, if any.
+
+    Archives of a repository usually wrap everything in one folder (e.g. 'project-main/'),
+    which is stripped so .gitignore rules and names are relative to the repository root.
+    """
+    tops = set()
+    for name in names:
+        name = _strip_leading_dot_slash(name)
+        if not name:
+            continue
+        if '/' not in name:
+            return ''
+        tops.add(name.split('/', 1)[0])
+        if len(tops) > 1:
+            return ''
+    return tops.pop() + '/' if tops else ''
+
+def _strip_leading_dot_slash(name: str) -> str:
+    """
+    Remove leading './' and '/' components from an archive member name.
+    """
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+def _normalize_member(name: str, prefix: str) -> Optional[str]:
+    """
+    Convert an archive member name to a repository-relative POSIX path.
+    """
+    name = _strip_leading_dot_slash(name.replace('\\', '/'))
+    if prefix:
+        if not name.startswith(prefix):
+            return None
+        name = name[len(prefix):]
+    if not name or name.endswith('/') or '..' in name.split('/'):
+        return None
+    return name
+
+def _gitignore_rules_from_members(members: List[Tuple[str, object]], read_member) -> List[IgnoreRule]:
+    """
+    Collect gitignore rules from (relative path, member) pairs, shallowest directories first.
+    """
+    rules = []
+    gitignores = [(path, member) for path, member in members if path.rsplit('/', 1)[-1] == '.gitignore']
+    for path, member in sorted(gitignores, key=lambda item: item[0].count('/')):
+        base_dir = path.rsplit('/', 1)[0] if '/' in path else ''
+        rules.extend(parse_gitignore(decode_content(read_member(member)), base_dir))
+    return rules
+
+def _walk_zip(path: str, max_file_size: int, respect_gitignore: bool) -> Iterator[Dict]:
+    """
+    Yield file dictionaries from a .zip archive, decompressing one member at a time.
+    """
+    with zipfile.ZipFile(path) as archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        prefix = _archive_prefix([info.filename for info in infos])
+        members = []
+        for info in infos:
+            rel_path = _normalize_member(info.filename, prefix)
+            if rel_path is not None:
+                members.append((rel_path, info))
+
+        rules = _gitignore_rules_from_members(members, archive.read) if respect_gitignore else []
+        dir_cache = {}
+        for rel_path, info in members:
+            if is_skipped_path(rel_path) or info.file_size > max_file_size:
+                continue
+            if rules and _is_ignored_with_parents(rel_path, rules, dir_cache):
+                continue
+            data = archive.read(info)
+            if is_binary(data):
+                continue
+            yield {'name': rel_path, 'content': decode_content(data)}
+
+def _walk_tar(path: str, max_file_size: int, respect_gitignore: bool) -> Iterator[Dict]:
+    """
+    Yield file dictionaries from a tarball (optionally gzip/bzip2/xz compressed).
+
+    Only member headers are indexed up front; file data is extracted one member at a time.
+    """
+    with tarfile.open(path, 'r:*') as archive:
+        infos = [info for info in archive if info.isfile()]
+        prefix = _archive_prefix([info.name for info in infos])
+        members = []
+        for info in infos:
+            rel_path = _normalize_member(info.name, prefix)
+            if rel_path is not None:
+                members.append((rel_path, info))
+
+        def read_member(info):
+            handle = archive.extractfile(info)
+            return handle.read() if handle else b''
+
+        rules = _gitignore_rules_from_members(members, read_member) if respect_gitignore else []
+        dir_cache = {}
+        for rel_path, info in members:
+            if is_skipped_path(rel_path) or info.size > max_file_size:
+                continue
+            if rules and _is_ignored_with_parents(rel_path, rules, dir_cache):
+                continue
+            data = read_member(info)
+            if is_binary(data):
+                continue
+            yield {'name': rel_path, 'content': decode_content(data)}
+
+def _read_single_file(path: str, max_file_size: int, mapped_file_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Yield a single file dictionary for a plain file path.
+    """
+    size = os.path.getsize(path)
+    if mapped_file_size is not None and size > mapped_file_size:
+        record = _file_record(path, os.path.basename(path), max_file_size, mapped_file_size)
+        if record is not None:
+            yield record
+        return
+    if size > max_file_size:
+        return
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    if not is_binary(data):
+        yield {'name': os.path.basename(path), 'content': decode_content(data)}
+
 def is_angular_file(file_name: str) -> bool:
     """
     Check if the file is an Angular-specific file.
@@ -1,16 +1,24 @@
 import streamlit as st
+import pandas as pd
 import plotly.graph_objects as go
-from typing import Dict
+from typing import Dict, List, Tuple
+from coverage_tree import DEFAULT_MAX_NODES
+from metrics import METRICS
 
-def display_coverage(coverage: Dict):
+# Figures kept per chart type; building a figure validates every property, so reruns
+# that show the same numbers reuse the figure instead
+FIGURE_CACHE_ENTRIES = 32
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def coverage_figure(coverage_percentage: float, title: str = "Code Coverage") -> go.Figure:
     """
-    Display code coverage information using a gauge chart.
+    Build the code coverage gauge chart.
     """
-    fig = go.Figure(go.Indicator(
+    return go.Figure(go.Indicator(
         mode = "gauge+number",
-        value = coverage['coverage_percentage'],
+        value = coverage_percentage,
         domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': "Code Coverage"},
+        title = {'text': title},
         gauge = {
             'axis': {'range': [None, 100]},
             'bar': {'color': "darkblue"},
@@ -22,35 +30,148 @@ def display_coverage(coverage: Dict):
             'threshold' : {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 90}
         }
     ))
-    
-    st.plotly_chart(fig)
-    
-    st.write(f"Total Lines: {coverage['total_lines']}")
-    st.write(f"Covered Lines: {coverage['covered_lines']}")
 
-def display_test_quality(quality: Dict):
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def test_quality_figure(labels: Tuple[str, ...], values: Tuple[int, ...]) -> go.Figure:
     """
-    Display test quality information using a bar chart.
+    Build the test quality bar chart.
     """
     fig = go.Figure(data=[
-        go.Bar(name='Count', x=list(quality.keys()), y=list(quality.values()))
+        go.Bar(name='Count', x=list(labels), y=list(values))
     ])
     
     fig.update_layout(title_text='Test Quality Metrics')
-    st.plotly_chart(fig)
+    return fig
 
-def display_functional_coverage(coverage: Dict):
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def functional_coverage_figure(tested_functions: int, untested_functions: int) -> go.Figure:
     """
-    Display functional test coverage information using a pie chart.
+    Build the functional coverage pie chart.
     """
     labels = ['Tested', 'Untested']
-    values = [coverage['tested_functions'], coverage['total_functions'] - coverage['tested_functions']]
+    values = [tested_functions, untested_functions]
     
     fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.3)])
     fig.update_layout(title_text='Functional Test Coverage')
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def coverage_tree_figure(tree: Dict[str, List], kind: str = 'treemap') -> go.Figure:
+    """
+    Build a treemap or sunburst of a coverage tree (see coverage_tree.build_coverage_tree).
+
+    Areas are lines of code and colors the share of them covered. The tree is already
+    bounded in size, so the figure is too.
+    """
+    percentages = [
+        covered / total * 100 if total else 0.0 for covered, total in zip(tree['covered_lines'], tree['total_lines'])
+    ]
+    trace = go.Treemap if kind == 'treemap' else go.Sunburst
+    fig = go.Figure(trace(
+        ids=tree['ids'],
+        labels=tree['labels'],
+        parents=tree['parents'],
+        values=tree['total_lines'],
+        branchvalues='total',
+        maxdepth=3,
+        marker={'colors': percentages, 'colorscale': 'RdYlGn', 'cmin': 0, 'cmax': 100,
+                'colorbar': {'title': {'text': 'Coverage %'}}},
+        customdata=list(zip(percentages, tree['covered_lines'], tree['files'], tree['uncovered_functions'])),
+        hovertemplate=(
+            "<b>%{id}</b><br>Coverage: %{customdata[0]:.1f}%<br>Lines: %{customdata[1]} of %{value}<br>"
+            "Files: %{customdata[2]}<br>Uncovered functions: %{customdata[3]}<extra></extra>"
+        )
+    ))
+    fig.update_layout(margin={'t': 30, 'l': 0, 'r': 0, 'b': 0})
+    return fig
+
+def display_coverage(coverage: Dict):
+    """
+    Display code coverage information using a gauge chart.
+
+    Coverage measured by a coverage report (see code_analyzer.apply_coverage_report) is
+    shown as line coverage; otherwise the gauge shows the share of code lines.
+    """
+    measured = 'measured_files' in coverage
+    with METRICS.stage('render_coverage'):
+        st.plotly_chart(coverage_figure(coverage['coverage_percentage'], "Line Coverage" if measured else "Code Coverage"))
     
-    st.plotly_chart(fig)
+    if measured:
+        st.write(f"Executable Lines: {coverage['total_lines']}")
+        st.write(f"Executed Lines: {coverage['covered_lines']}")
+        st.write(f"Files Found in Coverage Report: {coverage['measured_files']}")
+    else:
+        st.write(f"Total Lines: {coverage['total_lines']}")
+        st.write(f"Covered Lines: {coverage['covered_lines']}")
+    if coverage.get('unparsed_files'):
+        st.write(f"Python Files That Do Not Parse (no functions counted): {', '.join(coverage['unparsed_files'])}")
+
+def display_coverage_tree(tree: Dict[str, List]):
+    """
+    Display coverage per directory and file as a treemap and a sunburst; click a node to zoom in.
+    """
+    treemap, sunburst = st.tabs(["Treemap", "Sunburst"])
+    with METRICS.stage('render_coverage_tree'):
+        with treemap:
+            st.plotly_chart(coverage_tree_figure(tree, 'treemap'))
+        with sunburst:
+            st.plotly_chart(coverage_tree_figure(tree, 'sunburst'))
+    st.caption(f"Small files are grouped per directory, so the charts show at most {DEFAULT_MAX_NODES} files "
+               "and directories however large the project is.")
+
+def display_test_quality(quality: Dict):
+    """
+    Display test quality information using a bar chart.
+    """
+    with METRICS.stage('render_test_quality'):
+        st.plotly_chart(test_quality_figure(tuple(quality.keys()), tuple(quality.values())))
+
+def display_functional_coverage(coverage: Dict):
+    """
+    Display functional test coverage information using a pie chart.
+    """
+    tested = coverage['tested_functions']
+    with METRICS.stage('render_functional_coverage'):
+        st.plotly_chart(functional_coverage_figure(tested, coverage['total_functions'] - tested))
     
     st.write(f"Total Functions: {coverage['total_functions']}")
     st.write(f"Tested Functions: {coverage['tested_functions']}")
     st.write(f"Coverage Percentage: {coverage['coverage_percentage']:.2f}%")
+
+def display_performance(snapshot: Dict):
+    """
+    Display per-stage timings, LLM usage and cache hit rates from a metrics snapshot.
+    """
+    stages = snapshot['stages']
+    if stages:
+        rows = [{
+            'Stage': name,
+            'Calls': stage['calls'],
+            'Total (s)': round(stage['seconds'], 4),
+            'Mean (ms)': round(stage['seconds'] / stage['calls'] * 1000, 3),
+            'p95 (s) ≤': stage['latency']['p95'],
+            'MB processed': round(stage['bytes'] / 1e6, 3),
+            'MB/s': round(stage['mb_per_second'], 2) if stage['mb_per_second'] else None,
+            'Errors': stage['errors']
+        } for name, stage in sorted(stages.items(), key=lambda item: -item[1]['seconds'])]
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    else:
+        st.write("No stages recorded yet.")
+    
+    llm = snapshot['llm']
+    st.write(
+        f"LLM requests: {llm['requests']} ({llm['errors']} failed), "
+        f"tokens: {llm['prompt_tokens']} prompt / {llm['completion_tokens']} completion"
+    )
+    if llm['latency']['count']:
+        st.write(f"LLM latency: mean {llm['latency']['sum'] / llm['latency']['count']:.3f}s, "
+                 f"p50 ≤ {llm['latency']['p50']}s, p95 ≤ {llm['latency']['p95']}s")
+    
+    caches = snapshot['caches']
+    if caches:
+        st.dataframe(pd.DataFrame([{
+            'Cache': name,
+            'Hits': cache['hits'],
+            'Misses': cache['misses'],
+            'Hit rate': f"{cache['hit_rate']:.1%}"
+        } for name, cache in sorted(caches.items())]), hide_index=True)